@@ -0,0 +1,609 @@
+"""
+JSON endpoints for Supplier, Product and Store lookups and bulk updates.
+
+Write endpoints are wrapped in json_write(), which requires an API token or a
+logged-in session and a JSON body.
+"""
+
+import hmac
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse, Http404
+from django.middleware.csrf import CsrfViewMiddleware
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from neomodel import db
+
+from . import (
+    bulk, cache, graph, instrumentation, price_history, reports, risk, search as fulltext, sourcing, stock_ledger
+)
+from .export import iso_datetime
+from .models import Supplier, Product, Store, low_stock_feed, DASHBOARD_LOW_STOCK_LIMIT
+from .pagination import get_page_size
+
+
+# Maps the <kind> URL segment to the model searched by the typeahead endpoint
+TYPEAHEAD_MODELS = {
+    'suppliers': Supplier,
+    'products': Product,
+    'stores': Store,
+}
+
+TYPEAHEAD_MAX_RESULTS = 20
+
+
+@require_GET
+def typeahead(request, kind):
+    """
+    Return suggestions for the link and stock forms.
+
+    Query parameters:
+        q: Prefix matched against the model's indexed typeahead fields
+        limit: Maximum number of suggestions (default 10)
+    """
+    model = TYPEAHEAD_MODELS.get(kind)
+    if model is None:
+        raise Http404('Unknown typeahead type')
+
+    term = request.GET.get('q', '').strip()
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+    limit = max(1, min(limit, TYPEAHEAD_MAX_RESULTS))
+
+    results = []
+    if term:
+        results = [
+            {'uid': node.uid, 'label': node.typeahead_label()}
+            for node in model.search_prefix(term, limit=limit)
+        ]
+    return JsonResponse({'results': results})
+
+
+# Detail page URL name per search result kind
+SEARCH_DETAIL_URLS = {
+    'products': 'product_detail',
+    'suppliers': 'supplier_detail',
+    'stores': 'store_detail',
+}
+
+
+def search_params(request):
+    """Read (text, kinds, page, limit) from ?q=, ?type=, ?page= and ?limit=."""
+    kind = request.GET.get('type')
+    kinds = [kind] if kind in fulltext.SEARCH_MODELS else None
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 1
+    return request.GET.get('q', '').strip(), kinds, page, get_page_size(request)
+
+
+@require_GET
+def search(request):
+    """
+    Ranked full-text search over suppliers, products and stores.
+
+    Query parameters:
+        q:     Words to look for; each must match a word or word prefix
+        type:  products, suppliers or stores (default: all)
+        page:  1-based page number
+        limit: Page size, clamped to SUPPLIERS_MAX_PAGE_SIZE
+    """
+    text, kinds, page, limit = search_params(request)
+    results = fulltext.search(text, kinds=kinds, page=page, limit=limit)
+    return JsonResponse({
+        'results': [{
+            'type': kind,
+            'uid': node.uid,
+            'label': node.typeahead_label(),
+            'score': round(score, 4),
+            'url': reverse(SEARCH_DETAIL_URLS[kind], args=[node.uid]),
+        } for kind, node, score in results],
+        'page': results.page,
+        'next_page': results.next_page if results.has_next else None,
+    })
+
+
+def low_stock_limit(request):
+    """Read ?limit= for the low stock feed, clamped to DASHBOARD_LOW_STOCK_LIMIT."""
+    try:
+        limit = int(request.GET.get('limit', DASHBOARD_LOW_STOCK_LIMIT))
+    except ValueError:
+        limit = DASHBOARD_LOW_STOCK_LIMIT
+    return max(1, min(limit, DASHBOARD_LOW_STOCK_LIMIT))
+
+
+def low_stock_response(items, next_cursor):
+    return JsonResponse({
+        'results': [
+            {
+                'product_uid': item['product'].uid,
+                'sku': item['product'].sku,
+                'store_uid': item['store'].uid,
+                'store': item['store'].name,
+                'quantity': item['quantity'],
+                'reorder_level': item['threshold'],
+            }
+            for item in items
+        ],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+def low_stock(request):
+    """
+    Return one page of stock levels below their reorder level, lowest first.
+
+    Query parameters:
+        after: Cursor returned as ``next`` by the previous page
+        limit: Maximum number of items (default and maximum 100)
+    """
+    items, next_cursor = low_stock_feed(after=request.GET.get('after'), limit=low_stock_limit(request))
+    return low_stock_response(items, next_cursor)
+
+
+def _risk_supplier(supplier):
+    return {
+        'uid': supplier.uid,
+        'name': supplier.name,
+        'country': supplier.country,
+        **{figure: getattr(supplier, figure) or 0 for figure in risk.RISK_FIGURES},
+    }
+
+
+@require_GET
+def risk_single_source(request):
+    """
+    Return one page of products with exactly one supplier, ordered by SKU.
+
+    Query parameters:
+        after: Cursor returned as ``next`` by the previous page
+        limit: Page size, clamped to SUPPLIERS_MAX_PAGE_SIZE
+
+    ``summary.pending`` is the number of nodes still waiting for the
+    scheduled risk refresh.
+    """
+    items, next_cursor = risk.single_source_products(request.GET.get('after'), limit=get_page_size(request))
+    return JsonResponse({
+        'summary': risk.summary(),
+        'results': [{
+            'product_uid': item['product'].uid,
+            'sku': item['product'].sku,
+            'name': item['product'].name,
+            'supplier_uid': item['supplier'].uid if item['supplier'] else None,
+            'supplier': item['supplier'].name if item['supplier'] else None,
+            'stores': item['stores'],
+            'quantity': item['quantity'],
+        } for item in items],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+def risk_suppliers(request):
+    """
+    Rank suppliers by the precomputed damage their failure would cause.
+
+    Query parameters:
+        order: sole_quantity (default), sole_products, quantity or stores
+        limit: Number of suppliers, clamped to SUPPLIERS_MAX_PAGE_SIZE
+
+    ``sole_*`` figures only count products the supplier is the only source of.
+    """
+    order = request.GET.get('order', 'sole_quantity')
+    if order not in risk.RANKINGS:
+        return JsonResponse({'error': f"order must be one of {', '.join(risk.RANKINGS)}"}, status=400)
+    suppliers = risk.supplier_ranking(order, limit=get_page_size(request))
+    return JsonResponse({'results': [_risk_supplier(supplier) for supplier in suppliers]})
+
+
+@require_GET
+def risk_blast_radius(request, uid):
+    """Return the stores, products and stocked quantity affected if supplier ``uid`` fails."""
+    radius = risk.blast_radius(uid)
+    if radius is None:
+        raise Http404('Supplier not found')
+    return JsonResponse({
+        'supplier': {'uid': radius['supplier'].uid, 'name': radius['supplier'].name},
+        'stores': [{
+            'store_uid': row['store'].uid,
+            'store': row['store'].name,
+            'products': row['products'],
+            'quantity': row['quantity'],
+            'sole_products': row['sole_products'],
+            'sole_quantity': row['sole_quantity'],
+        } for row in radius['stores']],
+        'quantity': sum(row['quantity'] for row in radius['stores']),
+        'sole_quantity': sum(row['sole_quantity'] for row in radius['stores']),
+    })
+
+
+@require_GET
+def product_price_history(request, uid):
+    """
+    Summarise what each supplier charged for product ``uid`` over a window.
+
+    Query parameters:
+        start, end: ISO 8601 dates or datetimes (default: the last 90 days)
+        supplier: Supplier uid; also returns that supplier's observations
+
+    Each supplier row holds the observation count, min/avg/max/last unit
+    price and min/avg/last lead time within [start, end).
+    """
+    try:
+        start, end = (
+            price_history.parse_time(request.GET[name]) if request.GET.get(name) else None
+            for name in ('start', 'end')
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    start, end = price_history.default_window(start, end)
+    supplier_uid = request.GET.get('supplier') or None
+    summaries = price_history.price_summary(uid, start, end, supplier_uid=supplier_uid)
+    if summaries is None:
+        raise Http404('Product not found')
+
+    response = {
+        'product_uid': uid,
+        'start': iso_datetime(start),
+        'end': iso_datetime(end),
+        'suppliers': [{**row, 'last_observed': iso_datetime(row['last_observed'])} for row in summaries],
+    }
+    if supplier_uid:
+        response['observations'] = [
+            {**row, 'time': iso_datetime(row['time'])}
+            for row in price_history.observations(supplier_uid, uid, start, end)
+        ]
+    return JsonResponse(response)
+
+
+@require_GET
+def report_rows(request, report):
+    """
+    Return one page of the stored rows of a precomputed report.
+
+    Query parameters:
+        after: Cursor returned as ``next`` by the previous page
+        group: Only rows of this group (store uid, country or category)
+        limit: Page size, clamped to SUPPLIERS_MAX_PAGE_SIZE
+
+    ``refreshed_at`` is when the rows were last brought up to date; the
+    rows are never computed on request.
+    """
+    try:
+        state, rows, next_cursor = reports.report_page(
+            report, request.GET.get('after'), limit=get_page_size(request), group=request.GET.get('group') or None
+        )
+    except reports.ReportError as e:
+        raise Http404(str(e))
+    columns = [prop for prop, _ in reports.REPORTS[report].columns]
+    return JsonResponse({
+        'report': report,
+        'refreshed_at': iso_datetime(state['refreshed_at']) if state else None,
+        'results': [{'group': row['group'], **{prop: row.get(prop) for prop in columns}} for row in rows],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+def store_inventory(request, uid):
+    """
+    Return the stock levels of store ``uid`` at a point in time.
+
+    Query parameters:
+        at: ISO 8601 date or datetime (default: now)
+
+    Answered from the latest stock snapshot before ``at`` and the ledger
+    entries after it; ``snapshot_at`` and ``movements`` tell which.
+    """
+    try:
+        at = price_history.parse_time(request.GET['at']) if request.GET.get('at') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    inventory = stock_ledger.inventory_at(uid, at)
+    if inventory is None:
+        raise Http404('Store not found')
+    return JsonResponse({
+        'store': {'uid': inventory['store'].uid, 'name': inventory['store'].name},
+        'at': iso_datetime(inventory['at']),
+        'snapshot_at': iso_datetime(inventory['snapshot_at']),
+        'movements': inventory['movements'],
+        'total_quantity': sum(item['quantity'] for item in inventory['items']),
+        'items': inventory['items'],
+    })
+
+
+@require_GET
+def store_stock_ledger(request, uid):
+    """
+    List the stock movements of store ``uid``, newest first.
+
+    Query parameters:
+        product: Product uid; only list its movements
+        start, end: ISO 8601 dates or datetimes (default: the last 90 days)
+        limit: Maximum number of entries (default SUPPLIERS_PAGE_SIZE)
+    """
+    try:
+        start, end = (
+            price_history.parse_time(request.GET[name]) if request.GET.get(name) else None
+            for name in ('start', 'end')
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    start, end = price_history.default_window(start, end)
+    entries = stock_ledger.ledger_entries(
+        uid, request.GET.get('product') or None, start, end, limit=get_page_size(request)
+    )
+    return JsonResponse({
+        'store_uid': uid,
+        'start': iso_datetime(start),
+        'end': iso_datetime(end),
+        'entries': [{**entry, 'time': iso_datetime(entry['time'])} for entry in entries],
+    })
+
+
+@require_GET
+def health(request):
+    """
+    Report Neo4j reachability, connection pool usage and query latencies.
+
+    Returns 503 when Neo4j does not answer a trivial query. Histograms are per
+    process and cover everything since it started: connection acquisition
+    waits and latencies per query fingerprint, in milliseconds.
+    """
+    try:
+        started = time.perf_counter()
+        driver = graph.get_driver()
+        db.cypher_query('RETURN 1')
+        neo4j = {'status': 'ok', 'ping_ms': round((time.perf_counter() - started) * 1000, 3)}
+    except Exception as e:
+        driver = db.driver
+        neo4j = {'status': 'unavailable', 'error': str(e)}
+
+    return JsonResponse({
+        'status': neo4j['status'],
+        'neo4j': neo4j,
+        'pool': instrumentation.pool_stats(driver) if driver is not None else None,
+        'acquisition_wait_ms': instrumentation.acquisition_wait.snapshot(),
+        'query_latency_ms': instrumentation.query_metrics.snapshot(),
+    }, status=200 if neo4j['status'] == 'ok' else 503)
+
+
+def _cache_stats_response(stats):
+    return JsonResponse({
+        'backend': settings.CACHES[settings.SUPPLIERS_CACHE_ALIAS]['BACKEND'],
+        'timeout': settings.SUPPLIERS_CACHE_TIMEOUT,
+        **stats,
+    })
+
+
+@require_GET
+def cache_stats(request):
+    """
+    Return hit, miss and invalidation counters of the read-through cache.
+
+    Counters are kept per process since it started, or since the last
+    POST to cache_stats_reset.
+    """
+    return _cache_stats_response(cache.metrics.snapshot())
+
+
+def _api_token(request):
+    """Whether the request carries one of SUPPLIERS_API_TOKENS as a bearer token."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    return any(hmac.compare_digest(token.encode(), valid.encode()) for valid in settings.SUPPLIERS_API_TOKENS)
+
+
+def json_write(view):
+    """
+    Guard a JSON write endpoint: POST only, authenticated, JSON body.
+
+    Requests authenticate with a bearer token from SUPPLIERS_API_TOKENS, or
+    with a logged-in session, which must then pass the usual CSRF check (the
+    CSRF exemption only applies to token requests). Other content types are
+    answered with 415.
+    """
+    @csrf_exempt
+    @require_POST
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _api_token(request):
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': 'Authentication required'}, status=401)
+            rejected = CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+            if rejected is not None:
+                return JsonResponse({'error': 'CSRF verification failed'}, status=403)
+        if request.content_type != 'application/json':
+            return JsonResponse({'error': 'Content-Type must be application/json'}, status=415)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _json_body(request):
+    """Parse the JSON request body; returns (payload, None) or (None, error response)."""
+    try:
+        return json.loads(request.body), None
+    except ValueError:
+        return None, JsonResponse({'error': 'Request body must be valid JSON'}, status=400)
+
+
+def _json_rows(payload, key):
+    """
+    Extract the rows of a parsed body holding either a list of rows or {key: [rows]}.
+
+    Returns (rows, None) or (None, error response).
+    """
+    rows = payload.get(key) if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        return None, JsonResponse({'error': f'Expected a list of {key}'}, status=400)
+    if len(rows) > settings.SUPPLIERS_BULK_MAX_ROWS:
+        return None, JsonResponse(
+            {'error': f'At most {settings.SUPPLIERS_BULK_MAX_ROWS} {key} per request'}, status=413
+        )
+    return rows, None
+
+
+def _apply_in_batches(kind, rows, apply):
+    """
+    Validate ``rows`` and write them with ``apply`` in batches of SUPPLIERS_BULK_BATCH_SIZE.
+
+    Returns one result dict per input row, in input order.
+    """
+    results = [None] * len(rows)
+    batch = []
+
+    def flush():
+        applied, rejected = apply(batch)
+        for index, fields in applied.items():
+            results[index] = {'index': index, 'status': 'ok', **fields}
+        for index, reason in rejected:
+            results[index] = {'index': index, 'status': 'rejected', 'error': reason}
+        batch.clear()
+
+    for index, raw in enumerate(rows):
+        try:
+            batch.append(bulk.clean_row(kind, raw, index))
+        except bulk.RowError as e:
+            results[index] = {'index': index, 'status': 'rejected', 'error': str(e)}
+            continue
+        if len(batch) >= settings.SUPPLIERS_BULK_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    return results
+
+
+def _bulk_response(results):
+    applied = sum(1 for result in results if result['status'] == 'ok')
+    return JsonResponse({
+        'applied': applied,
+        'rejected': len(results) - applied,
+        'results': results,
+    })
+
+
+@json_write
+def cache_stats_reset(request):
+    """Zero the cache counters of this process; returns the counters as they were before."""
+    stats = cache.metrics.snapshot()
+    cache.metrics.reset()
+    return _cache_stats_response(stats)
+
+
+@json_write
+def stock_bulk_update(request):
+    """
+    Set stock levels for many product/store pairs at once.
+
+    Body: {"updates": [{"product_uid" | "sku", "store_uid" | "store", "quantity", "aisle"}, ...]}
+
+    Each batch is applied as one UNWIND ... MERGE transaction that sets
+    last_updated on every relationship. The response lists a result per row.
+    """
+    payload, error = _json_body(request)
+    if error:
+        return error
+    rows, error = _json_rows(payload, 'updates')
+    if error:
+        return error
+    return _bulk_response(_apply_in_batches('stock', rows, bulk.upsert_stock))
+
+
+@json_write
+def supplies_bulk_update(request):
+    """
+    Link many suppliers to products at once, e.g. a supplier's price list.
+
+    Body: {"links": [{"supplier_uid" | "supplier", "product_uid" | "sku",
+                      "unit_price", "lead_time_days"}, ...]}
+
+    Each batch is applied as one UNWIND ... MERGE transaction. A pair that is
+    already linked has its SUPPLIES properties updated; it never gets a
+    second relationship. The response lists a result per row.
+    """
+    payload, error = _json_body(request)
+    if error:
+        return error
+    rows, error = _json_rows(payload, 'links')
+    if error:
+        return error
+    return _bulk_response(_apply_in_batches('supplies', rows, bulk.upsert_supplies))
+
+
+@json_write
+def stock_movements(request):
+    """
+    Apply stock movements as atomic deltas and return the new levels.
+
+    Body: {"movements": [{"product_uid" | "sku", "store_uid" | "store",
+                          "movement": "receive" | "sell" | "adjust", "quantity", "aisle"}, ...],
+           "allow_negative": false}
+
+    receive adds and sell subtracts ``quantity``; adjust applies a signed
+    quantity. Movements that would make a level negative are rejected unless
+    allow_negative is true.
+    """
+    payload, error = _json_body(request)
+    if error:
+        return error
+    rows, error = _json_rows(payload, 'movements')
+    if error:
+        return error
+    allow_negative = isinstance(payload, dict) and payload.get('allow_negative') is True
+
+    def apply(batch):
+        return bulk.apply_stock_movements(batch, allow_negative=allow_negative)
+
+    return _bulk_response(_apply_in_batches('movement', rows, apply))
+
+
+@json_write
+def sourcing_best_suppliers(request):
+    """
+    Rank the suppliers of many products at once.
+
+    Body: {"skus": [...]} or {"product_uids": [...]}, plus optional
+          "strategy": "price" | "lead_time" | "score" (default price),
+          "alternatives": ranked offers after the best (default 0),
+          "countries": [...] to only consider suppliers in those countries,
+          "weights": {"unit_price": 0.5, "lead_time_days": 0.5} for "score"
+
+    Products are ranked in batches, one aggregated query per batch. The
+    response has one result per product found, in input order, and the keys
+    that matched no product.
+    """
+    payload, error = _json_body(request)
+    if error:
+        return error
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+
+    key_property, key = ('uid', 'product_uids') if 'product_uids' in payload else ('sku', 'skus')
+    keys, error = _json_rows(payload, key)
+    if error:
+        return error
+    countries = payload.get('countries')
+    if countries is not None and not isinstance(countries, list):
+        return JsonResponse({'error': 'countries must be a list'}, status=400)
+    try:
+        results, not_found = sourcing.best_suppliers(
+            keys,
+            key_property=key_property,
+            strategy=payload.get('strategy', 'price'),
+            alternatives=int(payload.get('alternatives', 0)),
+            countries=countries,
+            weights=payload.get('weights'),
+        )
+    except (sourcing.SourcingError, TypeError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': results, 'not_found': not_found})
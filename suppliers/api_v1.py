@@ -0,0 +1,270 @@
+"""
+Read-only JSON API (version 1) for suppliers, products, stores, SUPPLIES and AVAILABLE_AT.
+
+Endpoints (under /suppliers/api/v1/):
+    GET /                          Resources and their fields
+    GET /<resource>/               One keyset page: {"results": [...], "next": cursor}
+    GET /<resource>/?format=jsonl  The whole collection, streamed as JSON lines
+    GET /<resource>/<uid>/         One supplier, product or store
+
+Query parameters:
+    fields: Comma separated properties to return (default: all). Only these
+            are projected in Cypher, so unused properties never leave Neo4j.
+    after:  Cursor returned as ``next`` by the previous page
+    limit:  Page size, clamped to SUPPLIERS_MAX_PAGE_SIZE
+    Relationship resources also filter on their endpoint uids
+    (e.g. /stock/?store_uid=...).
+"""
+
+import json
+
+from django.http import JsonResponse, StreamingHttpResponse, Http404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from neomodel import db
+
+from .conditional import conditional_view
+from .export import DATETIME_COLUMNS, achunked, chunked, iso_datetime
+from .graph import astream_records, is_asgi, stream_records
+from .models import Supplier, Product, Store
+from .pagination import encode_cursor, decode_cursor, get_page_size
+
+
+class ApiError(Exception):
+    """Invalid request parameters, reported as a 400 response."""
+
+
+# Bookkeeping properties that are not part of the API
+INTERNAL_PROPERTIES = {'risk_dirty', 'counts_updated_at'}
+
+
+class NodeResource:
+    """A collection of nodes, paged by the model's (ordering_key, uid) keyset."""
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = {
+            name: f'n.{name}'
+            for name in model.defined_properties(aliases=False, rels=False)
+            if name not in INTERNAL_PROPERTIES
+        }
+        self.filters = {}
+
+    def page_query(self, projection, filters, after, limit):
+        projection += f', n.{self.model.ordering_key} AS _key, n.uid AS _tie'
+        return self.model._page_query(after, None, limit, projection=projection)
+
+    def stream_query(self, projection, filters):
+        return f'MATCH (n:{self.model.__label__}) RETURN {projection}', {}
+
+    def detail_query(self, projection, uid):
+        return f'MATCH (n:{self.model.__label__} {{uid: $uid}}) RETURN {projection}', {'uid': uid}
+
+
+class RelationshipResource:
+    """A collection of relationships, paged by the (start uid, end uid) keyset."""
+
+    model = None
+
+    def __init__(self, pattern, fields, key, tie, filters):
+        self.pattern = pattern
+        self.fields = fields
+        self.key = key
+        self.tie = tie
+        self.filters = filters
+
+    def _where(self, filters, after):
+        conditions = [f'{self.filters[name]} = ${name}' for name in filters]
+        if after is not None:
+            conditions.append(f'{self.key} >= $key AND ({self.key} > $key OR {self.tie} > $tie)')
+        return 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+    def page_query(self, projection, filters, after, limit):
+        params = {**filters, 'limit': limit + 1}
+        if after is not None:
+            params['key'], params['tie'] = after
+        query = f"""
+        MATCH {self.pattern}
+        {self._where(filters, after)}
+        RETURN {projection}, {self.key} AS _key, {self.tie} AS _tie
+        ORDER BY {self.key}, {self.tie}
+        LIMIT $limit
+        """
+        return query, params
+
+    def stream_query(self, projection, filters):
+        query = f"""
+        MATCH {self.pattern}
+        {self._where(filters, None)}
+        RETURN {projection}
+        """
+        return query, dict(filters)
+
+
+RESOURCES = {
+    'suppliers': NodeResource(Supplier),
+    'products': NodeResource(Product),
+    'stores': NodeResource(Store),
+    'supplies': RelationshipResource(
+        '(supplier:Supplier)-[rel:SUPPLIES]->(product:Product)',
+        fields={
+            'supplier_uid': 'supplier.uid',
+            'supplier': 'supplier.name',
+            'product_uid': 'product.uid',
+            'sku': 'product.sku',
+            'unit_price': 'rel.unit_price',
+            'lead_time_days': 'rel.lead_time_days',
+            'since': 'rel.since',
+            'last_updated': 'rel.last_updated',
+        },
+        key='supplier.uid',
+        tie='product.uid',
+        filters={'supplier_uid': 'supplier.uid', 'product_uid': 'product.uid'},
+    ),
+    'stock': RelationshipResource(
+        '(product:Product)-[rel:AVAILABLE_AT]->(store:Store)',
+        fields={
+            'product_uid': 'product.uid',
+            'sku': 'product.sku',
+            'store_uid': 'store.uid',
+            'store': 'store.name',
+            'quantity': 'rel.quantity',
+            'aisle': 'rel.aisle',
+            'low_stock': 'rel.low_stock',
+            'last_updated': 'rel.last_updated',
+        },
+        key='product.uid',
+        tie='store.uid',
+        filters={'product_uid': 'product.uid', 'store_uid': 'store.uid'},
+    ),
+}
+
+
+def _get_resource(name):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise Http404('Unknown resource')
+    return resource
+
+
+def _selected_fields(request, resource):
+    """Return the requested field names, validated against the resource's whitelist."""
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(resource.fields)
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in resource.fields]
+    if unknown or not fields:
+        raise ApiError(
+            f"Unknown fields: {', '.join(unknown) or '(none given)'}. "
+            f"Available: {', '.join(resource.fields)}"
+        )
+    return fields
+
+
+def _selected_filters(request, resource):
+    return {name: request.GET[name] for name in resource.filters if request.GET.get(name)}
+
+
+def _projection(resource, fields):
+    return ', '.join(f'{resource.fields[field]} AS {field}' for field in fields)
+
+
+def _serialize(record, fields):
+    row = {field: record[field] for field in fields}
+    for field in DATETIME_COLUMNS.intersection(row):
+        row[field] = iso_datetime(row[field])
+    return row
+
+
+def _jsonl_chunks(query, params, fields):
+    return chunked(json.dumps(_serialize(record, fields)) + '\n' for record in stream_records(query, params))
+
+
+def _ajsonl_chunks(query, params, fields):
+    return achunked(json.dumps(_serialize(record, fields)) + '\n' async for record in astream_records(query, params))
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+@require_GET
+def index(request):
+    """List the available resources with their fields and filters."""
+    return JsonResponse({
+        'version': 1,
+        'resources': {
+            name: {
+                'url': reverse('api_v1_collection', args=[name]),
+                'fields': list(resource.fields),
+                'filters': list(resource.filters),
+            }
+            for name, resource in RESOURCES.items()
+        }
+    })
+
+
+@require_GET
+def collection(request, resource):
+    """Return one page of ``resource``, or stream all of it with ?format=jsonl."""
+    resource = _get_resource(resource)
+    try:
+        fields = _selected_fields(request, resource)
+    except ApiError as e:
+        return _error(str(e))
+    filters = _selected_filters(request, resource)
+    projection = _projection(resource, fields)
+
+    file_format = request.GET.get('format', 'json')
+    if file_format == 'jsonl':
+        query, params = resource.stream_query(projection, filters)
+        # Under ASGI a sync iterator would be collected in full before sending
+        chunks = (_ajsonl_chunks if is_asgi(request) else _jsonl_chunks)(query, params, fields)
+        return StreamingHttpResponse(chunks, content_type='application/x-ndjson')
+    if file_format != 'json':
+        return _error('format must be json or jsonl')
+
+    after = request.GET.get('after')
+    cursor = decode_cursor(after)
+    if after and cursor is None:
+        return _error('Invalid cursor')
+    limit = get_page_size(request)
+
+    query, params = resource.page_query(projection, filters, cursor, limit)
+    results, columns = db.cypher_query(query, params)
+    records = [dict(zip(columns, row)) for row in results]
+    next_cursor = None
+    if len(records) > limit:
+        last = records[limit - 1]
+        next_cursor = encode_cursor(last['_key'], last['_tie'])
+    return JsonResponse({
+        'results': [_serialize(record, fields) for record in records[:limit]],
+        'next': next_cursor,
+    })
+
+
+def _detail_version(resource, uid):
+    resource = RESOURCES.get(resource)
+    if resource is None or resource.model is None:
+        return None
+    return resource.model.detail_version(uid)
+
+
+@require_GET
+@conditional_view(_detail_version)
+def detail(request, resource, uid):
+    """Return one supplier, product or store by uid."""
+    resource = _get_resource(resource)
+    if resource.model is None:
+        raise Http404('Relationships have no detail endpoint')
+    try:
+        fields = _selected_fields(request, resource)
+    except ApiError as e:
+        return _error(str(e))
+
+    query, params = resource.detail_query(_projection(resource, fields), uid)
+    results, columns = db.cypher_query(query, params)
+    if not results:
+        raise Http404(f'{resource.model.__name__} not found')
+    return JsonResponse(_serialize(dict(zip(columns, results[0])), fields))
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class SuppliersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suppliers'
+
+    def ready(self):
+        from neomodel import db
+        from .instrumentation import instrument_database
+
+        # Time every query for the health endpoint (no connection is opened here)
+        instrument_database(db)
@@ -0,0 +1,147 @@
+"""
+Async versions of the read-only views, for running under ASGI.
+
+They build the same Cypher as the sync views (via the model query helpers)
+but run it on the async Neo4j driver, so a worker is never blocked on a Bolt
+round trip. Pages that need several independent queries run them
+concurrently with asyncio.gather. Like the sync views they read through the
+generation cache (suppliers.cache) and answer conditional GETs
+(suppliers.conditional), so only cache misses reach Neo4j.
+
+Enabled with SUPPLIERS_ASYNC_VIEWS=True (see urls.py). Under WSGI every
+request would get a fresh event loop and driver, so keep them off there.
+"""
+
+import asyncio
+
+from django.http import Http404
+from django.shortcuts import render
+from django.views.decorators.http import require_GET
+
+from . import cache
+from .api import low_stock_limit, low_stock_response
+from .conditional import conditional_view, async_list_version, async_detail_version
+from .graph import async_cypher_query
+from .models import (
+    Supplier, Product, Store, DASHBOARD_COUNTS, DASHBOARD_LOW_STOCK_LIMIT,
+    low_stock_feed_query, low_stock_items
+)
+from .pagination import decode_cursor, get_page_size, list_options
+from .views import dashboard_context, list_context
+
+
+async def _page(request, model):
+    """Async equivalent of pagination.paginate()."""
+    after = decode_cursor(request.GET.get('after'))
+    before = decode_cursor(request.GET.get('before'))
+    limit = get_page_size(request)
+    sort, list_filter = list_options(request, model)
+    results, _ = await async_cypher_query(*model._page_query(after, before, limit, sort=sort, list_filter=list_filter))
+    return model._page_from_results(results, after, before, limit, sort=sort)
+
+
+async def _node(model, uid):
+    """Async equivalent of ``model.nodes.get(uid=uid)``."""
+    results, _ = await async_cypher_query(f'MATCH (n:{model.__label__} {{uid: $uid}}) RETURN n', {'uid': uid})
+    if not results:
+        raise model.DoesNotExist(f'{model.__name__} {uid} not found')
+    return model.inflate(results[0][0])
+
+
+async def _detail(model, uid):
+    """Fetch a node (through the cache) and its detail page rows concurrently."""
+    try:
+        node, (related, _) = await asyncio.gather(
+            cache.aget_node(model, uid, lambda: _node(model, uid)),
+            async_cypher_query(model.related_query(), {'uid': uid})
+        )
+    except model.DoesNotExist:
+        raise Http404(f'{model.__name__} not found')
+    return node, model.detail_rows(model.inflate_related(related))
+
+
+# ==================== LIST VIEWS ====================
+
+@conditional_view(async_list_version(Supplier))
+async def supplier_list(request):
+    """Display a page of suppliers ordered by name or products supplied (keyset pagination)."""
+    page = await cache.apaginate(request, Supplier, lambda: _page(request, Supplier))
+    return render(request, 'suppliers/supplier_list.html', list_context(request, Supplier, page, 'suppliers'))
+
+
+@conditional_view(async_list_version(Product))
+async def product_list(request):
+    """Display a page of products ordered by SKU or number of suppliers (keyset pagination)."""
+    page = await cache.apaginate(request, Product, lambda: _page(request, Product))
+    return render(request, 'suppliers/product_list.html', list_context(request, Product, page, 'products'))
+
+
+@conditional_view(async_list_version(Store))
+async def store_list(request):
+    """Display a page of stores ordered by name, products stocked or units in stock (keyset pagination)."""
+    page = await cache.apaginate(request, Store, lambda: _page(request, Store))
+    return render(request, 'suppliers/store_list.html', list_context(request, Store, page, 'stores'))
+
+
+# ==================== DETAIL VIEWS ====================
+
+@conditional_view(async_detail_version(Supplier))
+async def supplier_detail(request, uid):
+    """Display a supplier and the products it supplies."""
+    supplier, supplied_products = await _detail(Supplier, uid)
+    return render(request, 'suppliers/supplier_detail.html', {
+        'supplier': supplier,
+        'supplied_products': supplied_products
+    })
+
+
+@conditional_view(async_detail_version(Product))
+async def product_detail(request, uid):
+    """Display a product and its suppliers."""
+    product, suppliers = await _detail(Product, uid)
+    return render(request, 'suppliers/product_detail.html', {
+        'product': product,
+        'suppliers': suppliers
+    })
+
+
+@conditional_view(async_detail_version(Store))
+async def store_detail(request, uid):
+    """Display a store and its stock levels."""
+    store, products_data = await _detail(Store, uid)
+    return render(request, 'suppliers/store_detail.html', {
+        'store': store,
+        'products_data': products_data
+    })
+
+
+# ==================== ANALYTICS AND STOCK VIEWS ====================
+
+async def _dashboard_stats(low_stock_after=None, low_stock_limit=DASHBOARD_LOW_STOCK_LIMIT):
+    """Async equivalent of models.dashboard_stats(), with every figure queried concurrently."""
+    after = decode_cursor(low_stock_after)
+    *counts, (feed, _) = await asyncio.gather(
+        *(async_cypher_query(query) for query in DASHBOARD_COUNTS.values()),
+        async_cypher_query(*low_stock_feed_query(after, low_stock_limit))
+    )
+    items, next_cursor = low_stock_items([row[0] for row in feed], low_stock_limit)
+    return {
+        **{name: results[0][0] for name, (results, _) in zip(DASHBOARD_COUNTS, counts)},
+        'low_stock_items': items,
+        'low_stock_next_cursor': next_cursor,
+    }
+
+
+async def dashboard(request):
+    """Dashboard showing stock levels below their reorder level."""
+    after = request.GET.get('after')
+    stats = await cache.adashboard_stats(after, lambda: _dashboard_stats(low_stock_after=after))
+    return render(request, 'suppliers/dashboard.html', dashboard_context(request, stats))
+
+
+@require_GET
+async def low_stock(request):
+    """Async equivalent of api.low_stock()."""
+    limit = low_stock_limit(request)
+    results, _ = await async_cypher_query(*low_stock_feed_query(decode_cursor(request.GET.get('after')), limit))
+    return low_stock_response(*low_stock_items([row[0] for row in results], limit))
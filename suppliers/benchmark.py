@@ -0,0 +1,420 @@
+"""
+Synthetic graph seeding and the query budget benchmark for every suppliers URL.
+
+seed_graph() writes a reproducible graph of suppliers, products and stores
+through the bulk upserts. Seeded nodes carry the SEED_PREFIX in their natural
+key, so clear_seeded() removes them without touching real data.
+
+run_benchmark() requests every URL pattern in suppliers/urls.py with the
+Django test client, against whatever graph the app is connected to but on a
+local-memory cache of its own (BENCHMARK_CACHE_ALIAS), and measures latency
+and the number of Cypher queries each view runs. A view fails when it runs
+more queries than its VIEW_QUERY_BUDGETS entry (default
+SUPPLIERS_QUERY_BUDGET) or its median latency exceeds its
+VIEW_TIME_BUDGETS_MS entry (default SUPPLIERS_QUERY_TIME_BUDGET_MS).
+
+Used by the seed_graph and benchmark_views management commands and by tests.py.
+"""
+
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.test import Client, override_settings
+from neomodel import db
+
+from . import api, api_v1, bulk, cache, export, graph, reports
+from .middleware import profile_queries
+from .models import Supplier, Product, Store, delete_history
+
+
+# Natural key prefix of every seeded node
+SEED_PREFIX = 'Bench'
+SEED_SKU_PREFIX = 'BENCH-'
+
+# Graph sizes by number of products; stores and suppliers scale with them
+SIZES = {
+    'small': 1_000,
+    'medium': 50_000,
+    'large': 500_000,
+}
+
+PRODUCTS_PER_STORE = 100
+PRODUCTS_PER_SUPPLIER = 50
+STORES_PER_PRODUCT = 5
+SUPPLIERS_PER_PRODUCT = 2
+
+CATEGORIES = ('Electronics', 'Grocery', 'Hardware', 'Apparel', 'Toys', 'Garden', 'Office', 'Health')
+COUNTRIES = ('Germany', 'France', 'Italy', 'Poland', 'Spain', 'Netherlands')
+STORE_TYPES = ('Retail', 'Warehouse', 'Outlet')
+
+# Maximum queries per URL name on a cold cache; views not listed get
+# SUPPLIERS_QUERY_BUDGET. Conditional views run their version query first,
+# detail pages add the node lookup and one query for their related rows.
+VIEW_QUERY_BUDGETS = {
+    'supplier_list': 2,
+    'product_list': 2,
+    'store_list': 2,
+    'supplier_detail': 3,
+    'product_detail': 3,
+    'store_detail': 3,
+    'supplier_edit': 1,
+    'product_edit': 1,
+    'store_edit': 1,
+    'supplier_create': 0,
+    'product_create': 0,
+    'store_create': 0,
+    'stock_assignment': 0,
+    'link_supplier_product': 0,
+    'dashboard': 1,
+    'low_stock_feed': 1,
+    'typeahead': 1,
+    'health': 1,
+    'cache_stats': 0,
+    'api_v1_index': 0,
+    'api_v1_collection': 1,
+    'api_v1_detail': 2,
+    'export_dataset': 1,
+    'sourcing': 0,
+    'search': 1,
+    'search_api': 1,
+    # Risk reports run one refresh step before reading precomputed figures
+    'supply_risk': 3,
+    'supplier_risk': 1,
+    'risk_single_source': 2,
+    'risk_suppliers': 1,
+    'risk_blast_radius': 1,
+    'product_price_history': 2,
+    'store_inventory': 2,
+    'store_stock_ledger': 1,
+    # Reports read rows precomputed by refresh_reports
+    'reports': 1,
+    'report_detail': 1,
+    'report_rows': 1,
+}
+
+# Maximum median latency per URL name; None disables the check. Views not
+# listed get SUPPLIERS_QUERY_TIME_BUDGET_MS.
+VIEW_TIME_BUDGETS_MS = {
+    # Exports stream the whole dataset, so their latency grows with the graph
+    'export_dataset': None,
+}
+
+# Cache the benchmark runs against: every request starts on a cold cache, and
+# emptying the shared one would evict the entries of the running app
+BENCHMARK_CACHE_ALIAS = 'suppliers-benchmark'
+
+# URL names never requested: they change data on GET or only accept POST
+SKIPPED_URLS = {
+    'supplier_delete', 'product_delete', 'store_delete',
+    'supplies_bulk_update', 'stock_bulk_update', 'stock_movements', 'sourcing_best_suppliers',
+    'cache_stats_reset',
+}
+
+
+# ==================== SEEDING ====================
+
+def graph_size(size):
+    """Return (products, stores, suppliers) for a SIZES name or a product count."""
+    products = SIZES[size] if size in SIZES else int(size)
+    return (
+        products,
+        max(1, products // PRODUCTS_PER_STORE),
+        max(1, products // PRODUCTS_PER_SUPPLIER),
+    )
+
+
+def _supplier_name(i):
+    return f'{SEED_PREFIX} Supplier {i:06d}'
+
+
+def _sku(i):
+    return f'{SEED_SKU_PREFIX}{i:07d}'
+
+
+def _store_name(i):
+    return f'{SEED_PREFIX} Store {i:05d}'
+
+
+def _seed_rows(products, stores, suppliers, rng):
+    """Yield (kind, raw row) pairs for the whole graph, nodes before relationships."""
+    for i in range(suppliers):
+        yield 'suppliers', {
+            'name': _supplier_name(i),
+            'contact_person': f'Contact {i}',
+            'email': f'supplier{i}@example.com',
+            'country': rng.choice(COUNTRIES),
+        }
+    for i in range(stores):
+        yield 'stores', {
+            'name': _store_name(i),
+            'location': f'City {i % 97}',
+            'store_type': rng.choice(STORE_TYPES),
+        }
+    for i in range(products):
+        yield 'products', {
+            'sku': _sku(i),
+            'name': f'Product {i}',
+            'category': rng.choice(CATEGORIES),
+        }
+    for i in range(products):
+        for supplier in rng.sample(range(suppliers), min(SUPPLIERS_PER_PRODUCT, suppliers)):
+            yield 'supplies', {
+                'supplier': _supplier_name(supplier),
+                'sku': _sku(i),
+                'unit_price': round(rng.uniform(0.5, 500), 2),
+                'lead_time_days': rng.randint(1, 60),
+            }
+    for i in range(products):
+        for store in rng.sample(range(stores), min(STORES_PER_PRODUCT, stores)):
+            yield 'stock', {
+                'sku': _sku(i),
+                'store': _store_name(store),
+                'quantity': rng.randint(0, 200),
+                'aisle': f'A{rng.randint(1, 40)}',
+            }
+
+
+UPSERTS = {
+    'suppliers': lambda rows: bulk.upsert_nodes('suppliers', rows),
+    'products': lambda rows: bulk.upsert_nodes('products', rows),
+    'stores': lambda rows: bulk.upsert_nodes('stores', rows),
+    'supplies': bulk.upsert_supplies,
+    'stock': bulk.upsert_stock,
+}
+
+
+def seed_graph(size='small', seed=0, batch_size=None, progress=None):
+    """
+    Write a synthetic graph with the bulk upserts.
+
+    Seeding is idempotent for a given size and seed: nodes are merged on
+    their natural key and relationships on their endpoints.
+
+    Args:
+        size: A SIZES name or a number of products
+        seed: Random seed, so the same graph is produced every time
+        batch_size: Rows per transaction (default SUPPLIERS_BULK_BATCH_SIZE)
+        progress: Optional callable receiving (kind, rows written so far)
+
+    Returns:
+        Dict of rows written per kind.
+    """
+    batch_size = batch_size or settings.SUPPLIERS_BULK_BATCH_SIZE
+    products, stores, suppliers = graph_size(size)
+    written = dict.fromkeys(UPSERTS, 0)
+    batch, batch_kind = [], None
+
+    def flush():
+        UPSERTS[batch_kind](batch)
+        written[batch_kind] += len(batch)
+        if progress:
+            progress(batch_kind, written[batch_kind])
+
+    for kind, raw in _seed_rows(products, stores, suppliers, random.Random(seed)):
+        if batch and (kind != batch_kind or len(batch) >= batch_size):
+            flush()
+            batch = []
+        batch_kind = kind
+        batch.append(bulk.clean_row(kind, raw, written[kind] + len(batch)))
+    if batch:
+        flush()
+    return written
+
+
+def clear_seeded(batch_size=None):
+    """Delete every seeded node, its relationships and its history. Returns the number of nodes deleted."""
+    batch_size = batch_size or settings.SUPPLIERS_BULK_BATCH_SIZE
+    deleted = 0
+    seeded = (
+        (Supplier, 'name', f'{SEED_PREFIX} Supplier '),
+        (Product, 'sku', SEED_SKU_PREFIX),
+        (Store, 'name', f'{SEED_PREFIX} Store '),
+    )
+    for model, key, prefix in seeded:
+        query = f"""
+        MATCH (n:{model.__label__}) WHERE n.{key} STARTS WITH $prefix
+        CALL {{
+            WITH n
+            {delete_history(model.__label__, 'n')}
+            DETACH DELETE n
+        }} IN TRANSACTIONS OF $batch_size ROWS
+        """
+        counters = graph.run_in_transactions(query, {'prefix': prefix, 'batch_size': batch_size})
+        deleted += counters.nodes_deleted
+    cache.invalidate_all()
+    return deleted
+
+
+# ==================== BENCHMARK ====================
+
+def _sample_uids():
+    """Return the uid of the first node of each model, or None for an empty label."""
+    uids = {}
+    for model in (Supplier, Product, Store):
+        results, _ = db.cypher_query(
+            f'MATCH (n:{model.__label__}) RETURN n.uid ORDER BY n.{model.ordering_key} LIMIT 1'
+        )
+        uids[model] = results[0][0] if results else None
+    return uids
+
+
+def _uid_model(name):
+    if name.startswith('product'):
+        return Product
+    if name.startswith('store'):
+        return Store
+    return Supplier
+
+
+def benchmark_targets(uids):
+    """
+    Return (url name, label, path) for every URL pattern that can be requested.
+
+    URL arguments are filled with sample nodes and every valid resource,
+    dataset and typeahead kind; patterns needing a missing node are left out.
+    """
+    from django.urls import reverse
+    from .urls import urlpatterns
+
+    targets = []
+    for pattern in urlpatterns:
+        name = pattern.name
+        if name in SKIPPED_URLS:
+            continue
+        converters = set(pattern.pattern.converters)
+        if name == 'api_v1_collection':
+            variants = [({'resource': resource}, '') for resource in api_v1.RESOURCES]
+        elif name == 'api_v1_detail':
+            variants = [
+                ({'resource': resource, 'uid': uids[definition.model]}, '')
+                for resource, definition in api_v1.RESOURCES.items()
+                if definition.model is not None and uids[definition.model]
+            ]
+        elif name == 'export_dataset':
+            variants = [({'dataset': dataset}, '') for dataset in export.DATASETS]
+        elif name in ('report_detail', 'report_rows'):
+            variants = [({'report': report}, '') for report in reports.REPORTS]
+        elif name == 'typeahead':
+            variants = [({'kind': kind}, f'?q={SEED_PREFIX}') for kind in api.TYPEAHEAD_MODELS]
+        elif name in ('search', 'search_api'):
+            variants = [({}, f'?q={SEED_PREFIX}')]
+        elif converters == {'uid'}:
+            uid = uids[_uid_model(name)]
+            variants = [({'uid': uid}, '')] if uid else []
+        else:
+            variants = [({}, '')]
+        for kwargs, query_string in variants:
+            path = reverse(name, kwargs=kwargs) + query_string
+            label = name + ''.join(f' {value}' for key, value in kwargs.items() if key != 'uid')
+            targets.append((name, label, path))
+    return targets
+
+
+def _request(client, path):
+    """Request ``path`` on a cold benchmark cache; return (status, elapsed ms, QueryProfile)."""
+    cache.invalidate_all()
+    with profile_queries() as profile:
+        started = time.perf_counter()
+        response = client.get(path)
+        status = response.status_code
+        if response.streaming:
+            try:
+                for _ in response.streaming_content:
+                    pass
+            except Exception:
+                # The headers were sent already; a real client gets a truncated body
+                status = 500
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    return status, elapsed_ms, profile
+
+
+def run_benchmark(repeat=3, only=None):
+    """
+    Request every benchmark target ``repeat`` times.
+
+    Args:
+        repeat: Timed requests per URL, after one warm-up request
+        only: Optional collection of URL names to restrict the run to
+
+    Returns:
+        Dict with run metadata and one result per URL, each holding the status,
+        query count, latency (median, p95, max), budgets and failure reasons.
+    """
+    # Errors are reported as failing results rather than aborting the run
+    client = Client(raise_request_exception=False, HTTP_HOST=(settings.ALLOWED_HOSTS or ['localhost'])[0])
+    benchmark_cache = override_settings(
+        CACHES={**settings.CACHES, BENCHMARK_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': BENCHMARK_CACHE_ALIAS,
+        }},
+        SUPPLIERS_CACHE_ALIAS=BENCHMARK_CACHE_ALIAS,
+    )
+    results = []
+    with benchmark_cache:
+        for name, label, path in benchmark_targets(_sample_uids()):
+            if only and name not in only:
+                continue
+            _request(client, path)
+            runs = [_request(client, path) for _ in range(repeat)]
+            statuses = sorted({status for status, _, _ in runs})
+            timings = sorted(elapsed for _, elapsed, _ in runs)
+            profile = runs[-1][2]
+            query_budget = VIEW_QUERY_BUDGETS.get(name, settings.SUPPLIERS_QUERY_BUDGET)
+            time_budget = VIEW_TIME_BUDGETS_MS.get(name, settings.SUPPLIERS_QUERY_TIME_BUDGET_MS)
+
+            failures = []
+            if any(status >= 400 for status in statuses):
+                failures.append(f'status {statuses}')
+            if profile.count > query_budget:
+                failures.append(f'{profile.count} queries > budget {query_budget}')
+            median = statistics.median(timings)
+            if time_budget is not None and median > time_budget:
+                failures.append(f'median {median:.1f}ms > budget {time_budget:.0f}ms')
+            results.append({
+                'url': label,
+                'path': path,
+                'statuses': statuses,
+                'queries': profile.count,
+                'query_ms': round(profile.total_ms, 3),
+                'repeated_queries': len(profile.repeated()),
+                'median_ms': round(median, 3),
+                'p95_ms': round(timings[max(0, round(0.95 * len(timings)) - 1)], 3),
+                'max_ms': round(timings[-1], 3),
+                'query_budget': query_budget,
+                'time_budget_ms': time_budget,
+                'failures': failures,
+            })
+
+    return {
+        'commit': _git_commit(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'graph': _graph_counts(),
+        'repeat': repeat,
+        'results': results,
+        'failed': sum(1 for result in results if result['failures']),
+    }
+
+
+def _graph_counts():
+    results, _ = db.cypher_query("""
+    CALL { MATCH (n:Supplier) RETURN count(n) AS suppliers }
+    CALL { MATCH (n:Product) RETURN count(n) AS products }
+    CALL { MATCH (n:Store) RETURN count(n) AS stores }
+    RETURN suppliers, products, stores
+    """)
+    return dict(zip(('suppliers', 'products', 'stores'), results[0]))
+
+
+def _git_commit():
+    """Return the current git commit of the checkout, or None outside git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,441 @@
+"""
+Batched write helpers for Suppliers, Products, Stores and their relationships.
+
+Every upsert takes a list of rows produced by clean_row() and applies the
+whole batch with a single UNWIND ... MERGE statement, so a batch costs one
+round trip no matter how many rows it holds. Upserts are idempotent: nodes
+are merged on their natural key (Supplier.name, Product.sku, Store.name) and
+relationships on their two endpoints.
+
+Quantity changes are appended to the stock ledger (see suppliers.stock_ledger)
+and SUPPLIES price changes to the price history in the same statement.
+
+Relationship upserts keep the endpoint counters (Supplier.supply_count,
+Product.supplier_count, Store.sku_count and Store.total_quantity) in step
+within the same statement. Creating a relationship locks both endpoints;
+quantity changes lock the store first, so concurrent batches never lose an
+update.
+"""
+
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from neo4j.exceptions import TransientError
+from neomodel import db
+
+from . import cache, price_history, stock_ledger
+from .models import Supplier, Product, Store, LOW_STOCK_EXPRESSION, MARK_PRODUCT_RISK_DIRTY, epoch_now
+
+
+# Number of times a batch is retried after a transient error (e.g. deadlock)
+MAX_BATCH_RETRIES = 3
+
+# Node import kinds: model, natural key and the properties accepted from input
+NODE_KINDS = {
+    'suppliers': (Supplier, 'name', ('name', 'contact_person', 'email', 'phone', 'address', 'country')),
+    'products': (Product, 'sku', ('sku', 'name', 'description', 'category', 'unit_of_measure')),
+    'stores': (Store, 'name', ('name', 'location', 'store_type')),
+}
+
+# Relationship import kinds
+RELATIONSHIP_KINDS = ('supplies', 'stock')
+
+# Stock movement types and the sign applied to their quantity.
+# "adjust" takes a signed quantity as-is (e.g. -3 after a stock count).
+MOVEMENT_SIGNS = {'receive': 1, 'sell': -1, 'adjust': 0}
+
+KINDS = tuple(NODE_KINDS) + RELATIONSHIP_KINDS
+
+# Properties that must be present when a node is first created
+REQUIRED_FIELDS = {
+    'suppliers': ('name',),
+    'products': ('sku', 'name'),
+    'stores': ('name',),
+}
+
+# Defaults applied only when a node is created by an import
+CREATE_DEFAULTS = {
+    'suppliers': {'supply_count': 0},
+    'products': {'unit_of_measure': 'pieces', 'supplier_count': 0},
+    'stores': {'store_type': 'Retail', 'sku_count': 0, 'total_quantity': 0},
+}
+
+# Cypher adding ``{change}`` (an expression) to the stock total of ``store``.
+# Callers lock the store before merging the AVAILABLE_AT relationship:
+# creating the relationship locks the store anyway, so taking the store lock
+# first on every path keeps one lock order (store, then relationship).
+ADD_STORE_QUANTITY = """
+    SET store.total_quantity = coalesce(store.total_quantity, 0) + {change},
+        store.counts_updated_at = $now
+"""
+
+
+class RowError(ValueError):
+    """Raised when an input row cannot be imported."""
+
+
+def _text(raw, field):
+    value = raw.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _number(raw, field, cast, minimum=None):
+    value = raw.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be a number, got {value!r}')
+    if minimum is not None and number < minimum:
+        raise RowError(f'{field} must be at least {minimum}')
+    return number
+
+
+def _endpoint(raw, uid_field, key_field, label):
+    uid = _text(raw, uid_field)
+    key = _text(raw, key_field)
+    if uid is None and key is None:
+        raise RowError(f'{label} requires {uid_field} or {key_field}')
+    return {uid_field: uid, key_field: key}
+
+
+def clean_row(kind, raw, index):
+    """
+    Validate and normalise one input row.
+
+    Args:
+        kind: One of KINDS
+        raw: Mapping read from CSV or JSON
+        index: Position of the row in the input, echoed back in results
+
+    Returns:
+        Row dict ready to be passed to the matching upsert function.
+
+    Raises:
+        RowError: if the row is invalid.
+    """
+    if not isinstance(raw, dict):
+        raise RowError('row must be an object')
+
+    if kind in NODE_KINDS:
+        _, key, fields = NODE_KINDS[kind]
+        props = {field: _text(raw, field) for field in fields}
+        for field in REQUIRED_FIELDS[kind]:
+            if props[field] is None:
+                raise RowError(f'{field} is required')
+        if props.get('email'):
+            try:
+                validate_email(props['email'])
+            except ValidationError:
+                raise RowError(f"invalid email {props['email']!r}")
+        return {
+            'index': index,
+            'key': props[key],
+            'uid': uuid4().hex,
+            'props': {field: value for field, value in props.items() if value is not None},
+        }
+
+    if kind == 'supplies':
+        row = {'index': index}
+        row.update(_endpoint(raw, 'supplier_uid', 'supplier', 'supplier'))
+        row.update(_endpoint(raw, 'product_uid', 'sku', 'product'))
+        props = {
+            'unit_price': _number(raw, 'unit_price', float, minimum=0),
+            'lead_time_days': _number(raw, 'lead_time_days', int, minimum=0),
+        }
+        row['props'] = {field: value for field, value in props.items() if value is not None}
+        return row
+
+    if kind in ('stock', 'movement'):
+        row = {'index': index}
+        row.update(_endpoint(raw, 'product_uid', 'sku', 'product'))
+        row.update(_endpoint(raw, 'store_uid', 'store', 'store'))
+        row['aisle'] = _text(raw, 'aisle')
+        if kind == 'stock':
+            row['quantity'] = _number(raw, 'quantity', int, minimum=0)
+            if row['quantity'] is None:
+                raise RowError('quantity is required')
+            return row
+
+        movement = _text(raw, 'movement')
+        if movement not in MOVEMENT_SIGNS:
+            raise RowError(f"movement must be one of {', '.join(MOVEMENT_SIGNS)}")
+        sign = MOVEMENT_SIGNS[movement]
+        quantity = _number(raw, 'quantity', int, minimum=0 if sign else None)
+        if quantity is None:
+            raise RowError('quantity is required')
+        row['movement'] = movement
+        row['delta'] = quantity * sign if sign else quantity
+        return row
+
+    raise RowError(f'unknown kind {kind!r}')
+
+
+def _run_batch(query, params):
+    """Run one batch statement, retrying transient failures such as deadlocks."""
+    for attempt in range(MAX_BATCH_RETRIES + 1):
+        try:
+            results, _ = db.cypher_query(query, params)
+            return results
+        except TransientError:
+            if attempt == MAX_BATCH_RETRIES:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def _match_endpoint(var, label, uid_field, key_property, key_field):
+    """Cypher fragment binding ``var`` to the node addressed by a row's uid or natural key."""
+    return f"""
+    OPTIONAL MATCH ({var}_by_uid:{label} {{uid: row.{uid_field}}})
+    OPTIONAL MATCH ({var}_by_key:{label} {{{key_property}: row.{key_field}}})
+    WITH *, coalesce({var}_by_uid, {var}_by_key) AS {var}
+    """
+
+
+MATCH_SUPPLIER = _match_endpoint('supplier', 'Supplier', 'supplier_uid', 'name', 'supplier')
+MATCH_PRODUCT = _match_endpoint('product', 'Product', 'product_uid', 'sku', 'sku')
+MATCH_STORE = _match_endpoint('store', 'Store', 'store_uid', 'name', 'store')
+
+
+def _missing_endpoints(rows, matches):
+    """
+    Explain why relationship rows were not applied.
+
+    ``matches`` maps a variable name to its endpoint fragment. Only called for
+    rows that failed, so the extra round trip is off the happy path.
+    """
+    if not rows:
+        return []
+    fragments = ''.join(matches.values())
+    checks = ', '.join(f'{var} IS NOT NULL AS {var}_found' for var in matches)
+    query = f"""
+    UNWIND $rows AS row
+    {fragments}
+    RETURN row.index, {checks}
+    """
+    rejects = []
+    for index, *found in _run_batch(query, {'rows': rows}):
+        missing = [var for var, ok in zip(matches, found) if not ok]
+        reason = f"unknown {' and '.join(missing)}" if missing else 'not applied'
+        rejects.append((index, reason))
+    return rejects
+
+
+def _split_results(rows, applied, matches):
+    failed = [row for row in rows if row['index'] not in applied]
+    return applied, _missing_endpoints(failed, matches)
+
+
+def upsert_nodes(kind, rows):
+    """
+    Create or update Supplier, Product or Store nodes by their natural key.
+
+    Returns:
+        (applied, rejects): applied maps each written row index to a dict of
+        result fields, rejects is a list of (index, reason).
+    """
+    model, key, _ = NODE_KINDS[kind]
+    query = f"""
+    UNWIND $rows AS row
+    MERGE (n:{model.__label__} {{{key}: row.key}})
+    ON CREATE SET n += $defaults, n.uid = row.uid, n.created_at = $now
+    SET n += row.props, n.updated_at = $now
+    RETURN row.index
+    """
+    results = _run_batch(query, {'rows': rows, 'defaults': CREATE_DEFAULTS[kind], 'now': epoch_now()})
+    cache.invalidate_node_label(model.__label__)
+    return {row[0]: {} for row in results}, []
+
+
+def upsert_supplies(rows):
+    """
+    Create or update SUPPLIES relationships, one per supplier/product pair.
+
+    Changes of unit_price or lead_time_days are appended to the pair's price
+    history (see suppliers.price_history). Each row runs in its own subquery,
+    so a batch holding the same pair twice records both changes.
+
+    Returns:
+        (applied, rejects) as returned by upsert_nodes().
+    """
+    # Lock endpoints in a consistent order to avoid deadlocks between batches
+    rows = sorted(rows, key=lambda row: (row['supplier_uid'] or row['supplier'], row['product_uid'] or row['sku']))
+    query = f"""
+    UNWIND $rows AS row
+    {MATCH_SUPPLIER}
+    {MATCH_PRODUCT}
+    WITH row, supplier, product
+    WHERE supplier IS NOT NULL AND product IS NOT NULL
+    CALL {{
+        WITH row, supplier, product
+        MERGE (supplier)-[rel:SUPPLIES]->(product)
+        ON CREATE SET rel.since = $now,
+            supplier.supply_count = coalesce(supplier.supply_count, 0) + 1,
+            supplier.counts_updated_at = $now,
+            product.supplier_count = coalesce(product.supplier_count, 0) + 1,
+            product.counts_updated_at = $now
+        SET rel._lock = true
+        WITH row, supplier, product, rel, rel.unit_price AS old_price, rel.lead_time_days AS old_lead_time
+        SET rel += row.props, rel.last_updated = $now
+        {price_history.RECORD_PRICE_CHANGE}
+        {MARK_PRODUCT_RISK_DIRTY}
+        REMOVE rel._lock
+    }}
+    RETURN row.index
+    """
+    now = epoch_now()
+    results = _run_batch(query, {'rows': rows, 'now': now, **price_history.chunk_params(now)})
+    cache.invalidate_relationships('SUPPLIES')
+    return _split_results(rows, {row[0]: {} for row in results}, {
+        'supplier': MATCH_SUPPLIER,
+        'product': MATCH_PRODUCT,
+    })
+
+
+def upsert_stock(rows):
+    """
+    Set stock levels (AVAILABLE_AT relationships), one per product/store pair.
+
+    Each row runs in its own subquery, so the store total stays exact when a
+    batch sets the same pair more than once.
+
+    Returns:
+        (applied, rejects) as returned by upsert_nodes().
+    """
+    rows = sorted(rows, key=lambda row: (row['store_uid'] or row['store'], row['product_uid'] or row['sku']))
+    query = f"""
+    UNWIND $rows AS row
+    {MATCH_PRODUCT}
+    {MATCH_STORE}
+    WITH row, product, store
+    WHERE product IS NOT NULL AND store IS NOT NULL
+    CALL {{
+        WITH row, product, store
+        SET store._lock = true
+        MERGE (product)-[rel:AVAILABLE_AT]->(store)
+        ON CREATE SET store.sku_count = coalesce(store.sku_count, 0) + 1
+        SET rel._lock = true
+        WITH row, product, store, rel, coalesce(rel.quantity, 0) AS old_quantity, $set_movement AS movement
+        SET rel.quantity = row.quantity,
+            rel.aisle = coalesce(row.aisle, rel.aisle),
+            rel.last_updated = $now
+        SET rel.low_stock = {LOW_STOCK_EXPRESSION}
+        {ADD_STORE_QUANTITY.format(change='row.quantity - old_quantity')}
+        {stock_ledger.RECORD_STOCK_CHANGE}
+        {MARK_PRODUCT_RISK_DIRTY}
+        REMOVE rel._lock, store._lock
+    }}
+    RETURN row.index
+    """
+    now = epoch_now()
+    results = _run_batch(query, {
+        'rows': rows,
+        'now': now,
+        'set_movement': stock_ledger.SET_MOVEMENT,
+        'low_stock_threshold': settings.SUPPLIERS_LOW_STOCK_THRESHOLD,
+        **stock_ledger.chunk_params(now)
+    })
+    cache.invalidate_relationships('AVAILABLE_AT')
+    return _split_results(rows, {row[0]: {} for row in results}, {
+        'product': MATCH_PRODUCT,
+        'store': MATCH_STORE,
+    })
+
+
+def apply_stock_movements(rows, allow_negative=False):
+    """
+    Apply stock deltas (receive, sell, adjust) to AVAILABLE_AT relationships.
+
+    The arithmetic happens inside Cypher while holding the relationship's
+    write lock, so concurrent movements on the same product/store pair never
+    lose updates. Each row runs in its own subquery, so several movements on
+    the same pair within one batch are applied in order. Unless
+    ``allow_negative`` is set, a movement that would take the level below zero
+    is rejected and leaves the level unchanged; a rejected movement on a pair
+    that is not stocked yet does not create it.
+
+    Returns:
+        (applied, rejects) where applied maps row index to {'quantity': new level}.
+    """
+    rows = sorted(rows, key=lambda row: (row['store_uid'] or row['store'], row['product_uid'] or row['sku'], row['index']))
+    query = f"""
+    UNWIND $rows AS row
+    {MATCH_PRODUCT}
+    {MATCH_STORE}
+    WITH row, product, store
+    WHERE product IS NOT NULL AND store IS NOT NULL
+    CALL {{
+        WITH row, product, store
+        OPTIONAL MATCH (product)-[existing:AVAILABLE_AT]->(store)
+        // A pair that is not stocked yet is at zero: reject before MERGE would create it
+        WITH row, product, store, existing IS NOT NULL OR row.delta >= 0 OR $allow_negative AS valid
+        CALL {{
+            WITH row, valid
+            WITH row WHERE NOT valid
+            RETURN false AS accepted, 0 AS quantity
+          UNION
+            WITH row, product, store, valid
+            WITH row, product, store WHERE valid
+            SET store._lock = true
+            MERGE (product)-[rel:AVAILABLE_AT]->(store)
+            ON CREATE SET rel.quantity = 0, rel.last_updated = $now,
+                store.sku_count = coalesce(store.sku_count, 0) + 1
+            SET rel._lock = true
+            WITH row, product, store, rel, coalesce(rel.quantity, 0) AS old_quantity, row.movement AS movement
+            WITH row, product, store, rel, old_quantity, movement, old_quantity + row.delta AS new_quantity
+            // Checked again under the lock: the level may have changed since the match above
+            WITH row, product, store, rel, old_quantity, movement, new_quantity,
+                 (new_quantity >= 0 OR $allow_negative) AS accepted
+            SET rel.quantity = CASE WHEN accepted THEN new_quantity ELSE rel.quantity END,
+                rel.aisle = CASE WHEN accepted THEN coalesce(row.aisle, rel.aisle) ELSE rel.aisle END,
+                rel.last_updated = CASE WHEN accepted THEN $now ELSE rel.last_updated END
+            SET rel.low_stock = {LOW_STOCK_EXPRESSION}
+            {ADD_STORE_QUANTITY.format(change='CASE WHEN accepted THEN row.delta ELSE 0 END')}
+            {stock_ledger.RECORD_STOCK_CHANGE}
+            {MARK_PRODUCT_RISK_DIRTY}
+            REMOVE rel._lock, store._lock
+            RETURN accepted, rel.quantity AS quantity
+        }}
+        RETURN accepted, quantity
+    }}
+    RETURN row.index, accepted, quantity
+    """
+    now = epoch_now()
+    results = _run_batch(query, {
+        'rows': rows,
+        'now': now,
+        'allow_negative': allow_negative,
+        'low_stock_threshold': settings.SUPPLIERS_LOW_STOCK_THRESHOLD,
+        **stock_ledger.chunk_params(now)
+    })
+    cache.invalidate_relationships('AVAILABLE_AT')
+
+    applied = {}
+    rejects = []
+    for index, accepted, quantity in results:
+        if accepted:
+            applied[index] = {'quantity': quantity}
+        else:
+            rejects.append((index, f'insufficient stock (on hand: {quantity})'))
+    seen = set(applied).union(index for index, _ in rejects)
+    _, missing = _split_results(rows, seen, {
+        'product': MATCH_PRODUCT,
+        'store': MATCH_STORE,
+    })
+    return applied, rejects + missing
+
+
+def upsert(kind, rows):
+    """Dispatch a batch of cleaned rows to the upsert function for ``kind``."""
+    if kind in NODE_KINDS:
+        return upsert_nodes(kind, rows)
+    if kind == 'supplies':
+        return upsert_supplies(rows)
+    return upsert_stock(rows)
@@ -0,0 +1,301 @@
+"""
+Read-through cache for Supplier, Product and Store lookups, list pages and the dashboard.
+
+Entries live in Django's cache framework (see CACHES in settings), expire
+after SUPPLIERS_CACHE_TIMEOUT seconds and are invalidated explicitly by every
+write path. Invalidation is generation based: each node label and relationship
+type has a counter that is part of every key depending on it, and writers bump
+the counters they touch. Stale entries are never read again and simply expire.
+
+Nodes are cached as (model, element_id, deflated properties) rather than as
+pickled neomodel objects, so entries stay small and survive code reloads.
+The async views share the same entries through the ``a``-prefixed
+counterparts, which take the coroutine loading the value on a miss.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import dashboard_stats as fetch_dashboard_stats
+from .pagination import KeysetPage, get_page_size, list_options, paginate as fetch_page
+
+
+KEY_PREFIX = 'suppliers'
+
+# Namespaces with their own generation counter
+NODE_LABELS = ('Supplier', 'Product', 'Store')
+REL_TYPES = ('SUPPLIES', 'AVAILABLE_AT')
+
+# Relationship types attached to each label: removed along with its nodes
+# (DETACH DELETE) and counted on them
+DETACHED_RELS = {
+    'Supplier': ('SUPPLIES',),
+    'Product': ('SUPPLIES', 'AVAILABLE_AT'),
+    'Store': ('AVAILABLE_AT',),
+}
+
+# Labels holding counters of each relationship type (Supplier.supply_count,
+# Product.supplier_count, Store.sku_count and Store.total_quantity), which
+# change whenever relationships of that type are written or deleted
+COUNTED_BY = {
+    'SUPPLIES': ('Supplier', 'Product'),
+    'AVAILABLE_AT': ('Store',),
+}
+
+
+class CacheMetrics:
+    """Thread-safe hit, miss and invalidation counters, kept per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._invalidations = defaultdict(int)
+
+    def record(self, kind, hit):
+        with self._lock:
+            self._counts[kind]['hits' if hit else 'misses'] += 1
+
+    def record_invalidation(self, namespace):
+        with self._lock:
+            self._invalidations[namespace] += 1
+
+    def snapshot(self):
+        """Return the counters as a JSON-serializable dict."""
+        with self._lock:
+            lookups = {}
+            for kind, counts in sorted(self._counts.items()):
+                total = counts['hits'] + counts['misses']
+                lookups[kind] = {
+                    **counts,
+                    'hit_ratio': round(counts['hits'] / total, 4) if total else None
+                }
+            return {'lookups': lookups, 'invalidations': dict(self._invalidations)}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._invalidations.clear()
+
+
+metrics = CacheMetrics()
+
+
+def get_cache():
+    return caches[settings.SUPPLIERS_CACHE_ALIAS]
+
+
+def _generation_key(namespace):
+    return f'{KEY_PREFIX}:gen:{namespace}'
+
+
+def _generations(*namespaces):
+    """
+    Return the current generation of each namespace as a string like "3.17".
+
+    A missing counter (first use, or evicted) starts at the current time in
+    milliseconds so it never repeats a generation that is still cached.
+    """
+    cache = get_cache()
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            values[key] = cache.get(key)
+    return '.'.join(str(values[key]) for key in keys)
+
+
+def invalidate(*namespaces):
+    """Invalidate every cached entry that depends on the given labels or relationship types."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Counter missing: any fresh value is newer than the keys in use
+            cache.add(key, int(time.time() * 1000), timeout=None)
+        metrics.record_invalidation(namespace)
+
+
+def invalidate_all():
+    """Invalidate everything, e.g. after a bulk import touching unknown labels."""
+    invalidate(*NODE_LABELS, *REL_TYPES)
+
+
+def invalidate_relationships(rel_type):
+    """Invalidate a relationship type after a write, with the labels counting it."""
+    invalidate(rel_type, *COUNTED_BY[rel_type])
+
+
+def invalidate_node_label(label, detached=False):
+    """
+    Invalidate a label after a node write; ``detached`` also covers its deleted
+    relationships and the counters they were part of on the other nodes.
+    """
+    namespaces = [label]
+    if detached:
+        for rel_type in DETACHED_RELS[label]:
+            namespaces += [rel_type, *COUNTED_BY[rel_type]]
+    invalidate(*dict.fromkeys(namespaces))
+
+
+def _pack_node(node):
+    return (type(node), node.element_id, type(node).deflate(node.__properties__, skip_empty=True))
+
+
+class _CachedEntity(dict):
+    """Stand-in for a neo4j Node, holding cached properties, for StructuredNode.inflate()."""
+
+    def __init__(self, element_id, properties):
+        super().__init__(properties)
+        self.element_id = element_id
+
+
+def _unpack_node(entry):
+    model, element_id, properties = entry
+    return model.inflate(_CachedEntity(element_id, properties))
+
+
+def _read_through(kind, key, load, pack, unpack):
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        metrics.record(kind, hit=True)
+        return unpack(entry)
+    metrics.record(kind, hit=False)
+    value = load()
+    cache.set(key, pack(value), settings.SUPPLIERS_CACHE_TIMEOUT)
+    return value
+
+
+async def _agenerations(*namespaces):
+    """Async equivalent of _generations()."""
+    cache = get_cache()
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    values = await cache.aget_many(keys)
+    for key in keys:
+        if key not in values:
+            await cache.aadd(key, int(time.time() * 1000), timeout=None)
+            values[key] = await cache.aget(key)
+    return '.'.join(str(values[key]) for key in keys)
+
+
+async def _aread_through(kind, key, load, pack, unpack):
+    """Async equivalent of _read_through(); ``load`` is a coroutine function."""
+    cache = get_cache()
+    entry = await cache.aget(key)
+    if entry is not None:
+        metrics.record(kind, hit=True)
+        return unpack(entry)
+    metrics.record(kind, hit=False)
+    value = await load()
+    await cache.aset(key, pack(value), settings.SUPPLIERS_CACHE_TIMEOUT)
+    return value
+
+
+def _node_key(model, uid, generation):
+    return f'{KEY_PREFIX}:node:{model.__label__}:{generation}:{uid}'
+
+
+def get_node(model, uid, fresh=False):
+    """
+    Return the ``model`` node with ``uid``, from the cache when possible.
+
+    Raises model.DoesNotExist like ``model.nodes.get(uid=uid)``. With
+    ``fresh`` the node is always read from Neo4j (and the cache refilled),
+    which edit views use before saving.
+    """
+    key = _node_key(model, uid, _generations(model.__label__))
+    if fresh:
+        node = model.nodes.get(uid=uid)
+        get_cache().set(key, _pack_node(node), settings.SUPPLIERS_CACHE_TIMEOUT)
+        return node
+    return _read_through('node', key, lambda: model.nodes.get(uid=uid), _pack_node, _unpack_node)
+
+
+async def aget_node(model, uid, load):
+    """Async equivalent of get_node(); ``load`` fetches the node and raises model.DoesNotExist."""
+    key = _node_key(model, uid, await _agenerations(model.__label__))
+    return await _aread_through('node', key, load, _pack_node, _unpack_node)
+
+
+def _page_namespaces(model):
+    # Pages show relationship counters, so they also depend on the
+    # relationship types attached to the label
+    return (model.__label__, *DETACHED_RELS[model.__label__])
+
+
+def _page_key(request, model, generation):
+    after = request.GET.get('after', '')
+    before = request.GET.get('before', '')
+    sort, list_filter = list_options(request, model)
+    return (
+        f'{KEY_PREFIX}:page:{model.__label__}:{generation}:{get_page_size(request)}:'
+        f'{sort}:{list_filter or ""}:{after}:{before}'
+    )
+
+
+def _pack_page(page):
+    return ([_pack_node(node) for node in page.items], page.limit, page.next_cursor, page.prev_cursor)
+
+
+def _unpack_page(entry):
+    items, limit, next_cursor, prev_cursor = entry
+    return KeysetPage([_unpack_node(item) for item in items], limit, next_cursor, prev_cursor)
+
+
+def paginate(request, model):
+    """Cached equivalent of pagination.paginate()."""
+    key = _page_key(request, model, _generations(*_page_namespaces(model)))
+    return _read_through('page', key, lambda: fetch_page(request, model), _pack_page, _unpack_page)
+
+
+async def apaginate(request, model, load):
+    """Async equivalent of paginate(); ``load`` fetches the page."""
+    key = _page_key(request, model, await _agenerations(*_page_namespaces(model)))
+    return await _aread_through('page', key, load, _pack_page, _unpack_page)
+
+
+# The dashboard depends on every label and on AVAILABLE_AT, so any catalog or
+# stock write refreshes it
+DASHBOARD_NAMESPACES = (*NODE_LABELS, 'AVAILABLE_AT')
+
+
+def _dashboard_key(low_stock_after, generation):
+    return f'{KEY_PREFIX}:dashboard:{generation}:{low_stock_after or ""}'
+
+
+def _pack_dashboard(stats):
+    items = [
+        {**item, 'product': _pack_node(item['product']), 'store': _pack_node(item['store'])}
+        for item in stats['low_stock_items']
+    ]
+    return {**stats, 'low_stock_items': items}
+
+
+def _unpack_dashboard(entry):
+    items = [
+        {**item, 'product': _unpack_node(item['product']), 'store': _unpack_node(item['store'])}
+        for item in entry['low_stock_items']
+    ]
+    return {**entry, 'low_stock_items': items}
+
+
+def dashboard_stats(low_stock_after=None):
+    """Cached equivalent of models.dashboard_stats()."""
+    key = _dashboard_key(low_stock_after, _generations(*DASHBOARD_NAMESPACES))
+    return _read_through(
+        'dashboard', key, lambda: fetch_dashboard_stats(low_stock_after=low_stock_after),
+        _pack_dashboard, _unpack_dashboard
+    )
+
+
+async def adashboard_stats(low_stock_after, load):
+    """Async equivalent of dashboard_stats(); ``load`` fetches the statistics."""
+    key = _dashboard_key(low_stock_after, await _agenerations(*DASHBOARD_NAMESPACES))
+    return await _aread_through('dashboard', key, load, _pack_dashboard, _unpack_dashboard)
@@ -0,0 +1,115 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the list and detail views.
+
+Validators come from the cheap version queries on SupplyChainNode
+(list_version and detail_version), which read a handful of properties and
+never inflate nodes. When the client's copy is current the view is not called
+at all and a 304 is returned.
+"""
+
+import asyncio
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .graph import async_cypher_query
+
+
+def _validators(version):
+    """Build (etag, last_modified) from a version tuple of epoch floats and counts."""
+    # The low stock threshold changes how stock levels render without touching any timestamp
+    digest = hashlib.md5(repr((version, settings.SUPPLIERS_LOW_STOCK_THRESHOLD)).encode()).hexdigest()
+    timestamps = [value for value in version if isinstance(value, float)]
+    last_modified = int(max(timestamps)) if timestamps else None
+    return 'W/' + quote_etag(digest), last_modified
+
+
+def _unconditional(request):
+    """Whether the view must run regardless of the client's validators."""
+    return request.method not in ('GET', 'HEAD') or len(messages.get_messages(request))
+
+
+def _add_validators(response, etag, last_modified):
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        # Let browsers keep the page but revalidate it on every visit
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_view(version_func):
+    """
+    Answer conditional GETs from ``version_func(*args, **kwargs)``.
+
+    ``version_func`` receives the view's URL arguments and returns a tuple
+    that changes whenever the rendered page would, or None to let the view
+    run unconditionally (e.g. so it can raise Http404). Requests with flash
+    messages waiting to be shown always render the page. Async views take
+    an async ``version_func``.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if _unconditional(request):
+                    return await view(request, *args, **kwargs)
+
+                version = await version_func(*args, **kwargs)
+                if version is None:
+                    return await view(request, *args, **kwargs)
+
+                etag, last_modified = _validators(version)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _add_validators(response, etag, last_modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _unconditional(request):
+                return view(request, *args, **kwargs)
+
+            version = version_func(*args, **kwargs)
+            if version is None:
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = _validators(version)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _add_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def list_version(model):
+    """Version function for a paginated listing of ``model``."""
+    return lambda: model.list_version()
+
+
+def detail_version(model):
+    """Version function for the detail page of the ``model`` node addressed by ``uid``."""
+    return lambda uid: model.detail_version(uid)
+
+
+def async_list_version(model):
+    """Async version function for a paginated listing of ``model`` (async views)."""
+    async def version():
+        results, _ = await async_cypher_query(*model.list_version_query())
+        return tuple(results[0])
+    return version
+
+
+def async_detail_version(model):
+    """Async version function for the detail page of the ``model`` node addressed by ``uid``."""
+    async def version(uid):
+        results, _ = await async_cypher_query(*model.detail_version_query(uid))
+        return tuple(results[0]) if results else None
+    return version
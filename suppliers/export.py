@@ -0,0 +1,190 @@
+"""
+Streaming export of the supply graph to CSV, JSON lines and Parquet.
+
+Records are pulled from Neo4j with graph.stream_records() and encoded as they
+arrive, so exporting millions of relationships never materializes the full
+result. The ``a``-prefixed generators do the same on the async driver, for
+responses served under ASGI. Column names match the import_supply_chain command, so an export can
+be re-imported as-is.
+"""
+
+import csv
+import json
+from datetime import datetime, timezone
+
+from .graph import astream_records, stream_records, DEFAULT_FETCH_SIZE
+
+
+# Dataset name -> (Cypher query, ordered column names)
+DATASETS = {
+    'suppliers': ("""
+        MATCH (n:Supplier)
+        RETURN n.uid AS uid, n.name AS name, n.contact_person AS contact_person,
+               n.email AS email, n.phone AS phone, n.address AS address,
+               n.country AS country, n.created_at AS created_at, n.updated_at AS updated_at
+        """, ['uid', 'name', 'contact_person', 'email', 'phone', 'address', 'country',
+              'created_at', 'updated_at']),
+    'products': ("""
+        MATCH (n:Product)
+        RETURN n.uid AS uid, n.sku AS sku, n.name AS name, n.description AS description,
+               n.category AS category, n.unit_of_measure AS unit_of_measure,
+               n.created_at AS created_at, n.updated_at AS updated_at
+        """, ['uid', 'sku', 'name', 'description', 'category', 'unit_of_measure',
+              'created_at', 'updated_at']),
+    'stores': ("""
+        MATCH (n:Store)
+        RETURN n.uid AS uid, n.name AS name, n.location AS location,
+               n.store_type AS store_type, n.created_at AS created_at, n.updated_at AS updated_at
+        """, ['uid', 'name', 'location', 'store_type', 'created_at', 'updated_at']),
+    'supplies': ("""
+        MATCH (s:Supplier)-[rel:SUPPLIES]->(p:Product)
+        RETURN s.uid AS supplier_uid, s.name AS supplier, p.uid AS product_uid, p.sku AS sku,
+               rel.unit_price AS unit_price, rel.lead_time_days AS lead_time_days,
+               rel.since AS since
+        """, ['supplier_uid', 'supplier', 'product_uid', 'sku', 'unit_price', 'lead_time_days',
+              'since']),
+    'stock': ("""
+        MATCH (p:Product)-[rel:AVAILABLE_AT]->(st:Store)
+        RETURN p.uid AS product_uid, p.sku AS sku, st.uid AS store_uid, st.name AS store,
+               rel.quantity AS quantity, rel.aisle AS aisle, rel.last_updated AS last_updated
+        """, ['product_uid', 'sku', 'store_uid', 'store', 'quantity', 'aisle', 'last_updated']),
+}
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+# neomodel stores DateTimeProperty values as epoch seconds; exports use ISO 8601
+DATETIME_COLUMNS = {'created_at', 'updated_at', 'since', 'last_updated'}
+
+# Non-string columns, used to type Parquet output
+NUMERIC_COLUMNS = {'unit_price': 'float', 'lead_time_days': 'int', 'quantity': 'int'}
+
+# Encoded rows grouped into one chunk when streaming text formats
+ROWS_PER_CHUNK = 500
+
+
+def iso_datetime(value):
+    """Convert a stored epoch timestamp to an ISO 8601 string."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(float(value), tz=timezone.utc).isoformat()
+
+
+def _row(record):
+    row = record.data()
+    for column in DATETIME_COLUMNS.intersection(row):
+        row[column] = iso_datetime(row[column])
+    return row
+
+
+def iter_rows(dataset, fetch_size=DEFAULT_FETCH_SIZE):
+    """Yield the rows of ``dataset`` as dicts, converting timestamps to ISO strings."""
+    query, _ = DATASETS[dataset]
+    for record in stream_records(query, fetch_size=fetch_size):
+        yield _row(record)
+
+
+async def aiter_rows(dataset, fetch_size=DEFAULT_FETCH_SIZE):
+    """Async equivalent of iter_rows()."""
+    query, _ = DATASETS[dataset]
+    async for record in astream_records(query, fetch_size=fetch_size):
+        yield _row(record)
+
+
+def chunked(lines):
+    """Join encoded lines into chunks of ROWS_PER_CHUNK."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+async def achunked(lines):
+    """Async equivalent of chunked(), for an async iterable of lines."""
+    chunk = []
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_writer(dataset):
+    """Return (header line, function encoding one row) for ``dataset``."""
+    _, columns = DATASETS[dataset]
+    writer = csv.DictWriter(Echo(), fieldnames=columns)
+    return writer.writerow(dict(zip(columns, columns))), writer.writerow
+
+
+def _jsonl_line(row):
+    return json.dumps(row) + '\n'
+
+
+def csv_chunks(dataset, fetch_size=DEFAULT_FETCH_SIZE):
+    """Yield ``dataset`` as CSV text, a header followed by chunks of rows."""
+    header, encode = _csv_writer(dataset)
+    yield header
+    yield from chunked(encode(row) for row in iter_rows(dataset, fetch_size))
+
+
+async def acsv_chunks(dataset, fetch_size=DEFAULT_FETCH_SIZE):
+    """Async equivalent of csv_chunks()."""
+    header, encode = _csv_writer(dataset)
+    yield header
+    async for chunk in achunked(encode(row) async for row in aiter_rows(dataset, fetch_size)):
+        yield chunk
+
+
+def jsonl_chunks(dataset, fetch_size=DEFAULT_FETCH_SIZE):
+    """Yield ``dataset`` as JSON lines text in chunks of rows."""
+    yield from chunked(_jsonl_line(row) for row in iter_rows(dataset, fetch_size))
+
+
+async def ajsonl_chunks(dataset, fetch_size=DEFAULT_FETCH_SIZE):
+    """Async equivalent of jsonl_chunks()."""
+    async for chunk in achunked(_jsonl_line(row) async for row in aiter_rows(dataset, fetch_size)):
+        yield chunk
+
+
+def write_parquet(dataset, path, fetch_size=DEFAULT_FETCH_SIZE, row_group_size=50000):
+    """
+    Write ``dataset`` to a Parquet file one row group at a time.
+
+    Requires pyarrow. Returns the number of rows written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Parquet export requires pyarrow (pip install pyarrow)')
+
+    _, columns = DATASETS[dataset]
+    types = {'float': pa.float64(), 'int': pa.int64()}
+    schema = pa.schema([
+        (column, types.get(NUMERIC_COLUMNS.get(column), pa.string())) for column in columns
+    ])
+
+    count = 0
+    buffer = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in iter_rows(dataset, fetch_size):
+            buffer.append(row)
+            count += 1
+            if len(buffer) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+                buffer.clear()
+        if buffer:
+            writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+    return count
@@ -3,7 +3,50 @@ Django forms for Suppliers and Products.
 """
 
 from django import forms
-from .models import Supplier, Product, Store
+from django.urls import reverse_lazy
+from .models import Supplier, Product, Store, fetch_by_uid
+from .sourcing import MAX_ALTERNATIVES
+
+
+class TypeaheadSelect(forms.Select):
+    """
+    Select widget filled on demand from a JSON typeahead endpoint.
+    Only the currently selected option is rendered server-side.
+    """
+    
+    def __init__(self, kind, placeholder, attrs=None):
+        attrs = {
+            'class': 'form-select',
+            'data-typeahead-url': reverse_lazy('typeahead', kwargs={'kind': kind}),
+            **(attrs or {})
+        }
+        super().__init__(attrs=attrs, choices=[('', placeholder)])
+
+
+class TypeaheadFormMixin:
+    """
+    Validates typeahead uid fields with a single existence query.
+    
+    ``typeahead_fields`` maps a form field name to (model class, cleaned_data key);
+    the resolved node is stored under that key for use by the view.
+    """
+    typeahead_fields = {}
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        names = [name for name in self.typeahead_fields if cleaned_data.get(name)]
+        if not names:
+            return cleaned_data
+        
+        nodes = fetch_by_uid(*[(self.typeahead_fields[name][0], cleaned_data[name]) for name in names])
+        for name, node in zip(names, nodes):
+            model, key = self.typeahead_fields[name]
+            if node is None:
+                self.add_error(name, f'{model.__name__} not found')
+            else:
+                cleaned_data[key] = node
+                self.fields[name].widget.choices = [(node.uid, node.typeahead_label())]
+        return cleaned_data
 
 
 class SupplierForm(forms.Form):
@@ -102,17 +145,31 @@ class ProductForm(forms.Form):
             'placeholder': 'e.g., pieces, kg, liters'
         })
     )
+    reorder_level = forms.IntegerField(
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Store default'
+        }),
+        label='Reorder Level'
+    )
 
 
-class LinkSupplierProductForm(forms.Form):
+class LinkSupplierProductForm(TypeaheadFormMixin, forms.Form):
     """Form for linking a Supplier to a Product."""
     
+    typeahead_fields = {
+        'supplier_uid': (Supplier, 'supplier'),
+        'product_uid': (Product, 'product'),
+    }
+    
     supplier_uid = forms.CharField(
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        widget=TypeaheadSelect('suppliers', '--- Select Supplier ---'),
         label='Supplier'
     )
     product_uid = forms.CharField(
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        widget=TypeaheadSelect('products', '--- Select Product ---'),
         label='Product'
     )
     unit_price = forms.FloatField(
@@ -133,19 +190,6 @@ class LinkSupplierProductForm(forms.Form):
         }),
         label='Lead Time (days)'
     )
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Populate supplier choices
-        suppliers = Supplier.nodes.all()
-        supplier_choices = [(s.uid, s.name) for s in suppliers]
-        self.fields['supplier_uid'].widget.choices = [('', '--- Select Supplier ---')] + supplier_choices
-        
-        # Populate product choices
-        products = Product.nodes.all()
-        product_choices = [(p.uid, f"{p.name} ({p.sku})") for p in products]
-        self.fields['product_uid'].widget.choices = [('', '--- Select Product ---')] + product_choices
 
 
 class StoreForm(forms.Form):
@@ -178,17 +222,31 @@ class StoreForm(forms.Form):
         widget=forms.Select(attrs={'class': 'form-select'}),
         label='Store Type'
     )
+    low_stock_threshold = forms.IntegerField(
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'System default'
+        }),
+        label='Low Stock Threshold'
+    )
 
 
-class StockAssignmentForm(forms.Form):
+class StockAssignmentForm(TypeaheadFormMixin, forms.Form):
     """Form for assigning a Product to a Store (creating AVAILABLE_AT relationship)."""
     
+    typeahead_fields = {
+        'product_uid': (Product, 'product'),
+        'store_uid': (Store, 'store'),
+    }
+    
     product_uid = forms.CharField(
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        widget=TypeaheadSelect('products', '--- Select Product ---'),
         label='Product'
     )
     store_uid = forms.CharField(
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        widget=TypeaheadSelect('stores', '--- Select Store ---'),
         label='Store'
     )
     quantity = forms.IntegerField(
@@ -208,16 +266,61 @@ class StockAssignmentForm(forms.Form):
         }),
         label='Aisle/Location'
     )
+
+
+class SourcingForm(forms.Form):
+    """Form for ranking the suppliers of a list of products."""
     
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Populate product choices
-        products = Product.nodes.all()
-        product_choices = [(p.uid, f"{p.name} ({p.sku})") for p in products]
-        self.fields['product_uid'].widget.choices = [('', '--- Select Product ---')] + product_choices
-        
-        # Populate store choices
-        stores = Store.nodes.all()
-        store_choices = [(s.uid, f"{s.name} - {s.location}") for s in stores]
-        self.fields['store_uid'].widget.choices = [('', '--- Select Store ---')] + store_choices
+    skus = forms.CharField(
+        widget=forms.Textarea(attrs={
+            'class': 'form-control',
+            'rows': 6,
+            'placeholder': 'One SKU per line (or comma separated)'
+        }),
+        label='SKUs'
+    )
+    strategy = forms.ChoiceField(
+        choices=[
+            ('price', 'Lowest price'),
+            ('lead_time', 'Shortest lead time'),
+            ('score', 'Weighted score'),
+        ],
+        initial='price',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    price_weight = forms.FloatField(
+        required=False,
+        min_value=0,
+        initial=0.5,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'}),
+        label='Price Weight'
+    )
+    lead_time_weight = forms.FloatField(
+        required=False,
+        min_value=0,
+        initial=0.5,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'}),
+        label='Lead Time Weight'
+    )
+    countries = forms.CharField(
+        max_length=500,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'All countries (or e.g. Germany, France)'
+        })
+    )
+    alternatives = forms.IntegerField(
+        min_value=0,
+        max_value=MAX_ALTERNATIVES,
+        initial=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    
+    def clean_skus(self):
+        skus = [sku.strip() for sku in self.cleaned_data['skus'].replace(',', '\n').splitlines()]
+        return [sku for sku in skus if sku]
+    
+    def clean_countries(self):
+        countries = [country.strip() for country in self.cleaned_data['countries'].split(',')]
+        return [country for country in countries if country]
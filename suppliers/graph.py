@@ -0,0 +1,137 @@
+"""
+Low-level access to the Neo4j driver managed by neomodel.
+
+neomodel's cypher_query() materializes the full result list, which is fine for
+page-sized queries. The helpers here talk to the driver directly for the
+cases where results must be consumed incrementally, and provide an async
+driver for the ASGI views and streamed ASGI responses.
+"""
+
+import asyncio
+import time
+import weakref
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from neo4j import READ_ACCESS, AsyncGraphDatabase, RoutingControl
+from neomodel import db, config as neomodel_config
+
+from .instrumentation import instrument_pool, record_query
+
+
+# Records pulled from the server per network round trip when streaming
+DEFAULT_FETCH_SIZE = 1000
+
+
+def get_driver():
+    """Return the driver used by neomodel, connecting on first use."""
+    if db.driver is None:
+        db.set_connection(url=neomodel_config.DATABASE_URL)
+    instrument_pool(db.driver)
+    return db.driver
+
+
+def stream_records(query, params=None, fetch_size=DEFAULT_FETCH_SIZE):
+    """
+    Run a read query and yield its records one at a time.
+
+    The driver pulls ``fetch_size`` records per round trip, so memory use is
+    bounded by the fetch size rather than by the size of the result.
+    """
+    session = get_driver().session(
+        database=neomodel_config.DATABASE_NAME,
+        default_access_mode=READ_ACCESS,
+        fetch_size=fetch_size
+    )
+    started = time.perf_counter()
+    with session:
+        result = session.run(query, params or {})
+        for record in result:
+            yield record
+    record_query(query, (time.perf_counter() - started) * 1000)
+
+
+def run_in_transactions(query, params=None):
+    """
+    Run a ``CALL { ... } IN TRANSACTIONS`` write query and return its counters.
+
+    Such queries commit their own batches, so they must run in an auto-commit
+    transaction rather than in neomodel's managed one.
+    """
+    started = time.perf_counter()
+    with get_driver().session(database=neomodel_config.DATABASE_NAME) as session:
+        summary = session.run(query, params or {}).consume()
+    record_query(query, (time.perf_counter() - started) * 1000)
+    return summary.counters
+
+
+def explain(query, params=None):
+    """Return the planner's execution plan for ``query`` (as a dict) without running it."""
+    with get_driver().session(database=neomodel_config.DATABASE_NAME) as session:
+        return session.run('EXPLAIN ' + query, params or {}).consume().plan
+
+
+# One async driver per event loop: a driver's connections belong to the loop
+# that opened them. Under an ASGI server that is a single driver per worker.
+_async_drivers = weakref.WeakKeyDictionary()
+
+
+def get_async_driver():
+    """Return the async driver for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    driver = _async_drivers.get(loop)
+    if driver is None:
+        driver = AsyncGraphDatabase.driver(
+            settings.NEO4J_BOLT_URL,
+            auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+            connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            connection_timeout=settings.NEO4J_CONNECTION_TIMEOUT,
+            max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+            keep_alive=settings.NEO4J_KEEP_ALIVE
+        )
+        _async_drivers[loop] = driver
+    return driver
+
+
+async def astream_records(query, params=None, fetch_size=DEFAULT_FETCH_SIZE):
+    """Async equivalent of stream_records(), on the async driver of the running event loop."""
+    session = get_async_driver().session(
+        database=neomodel_config.DATABASE_NAME,
+        default_access_mode=READ_ACCESS,
+        fetch_size=fetch_size
+    )
+    started = time.perf_counter()
+    async with session:
+        result = await session.run(query, params or {})
+        async for record in result:
+            yield record
+    record_query(query, (time.perf_counter() - started) * 1000)
+
+
+def is_asgi(request):
+    """
+    Whether ``request`` is served by the ASGI handler.
+
+    Streamed responses must then iterate asynchronously: the ASGI handler
+    collects a sync iterator in full before sending anything.
+    """
+    return isinstance(request, ASGIRequest)
+
+
+async def async_cypher_query(query, params=None):
+    """
+    Async counterpart of neomodel's db.cypher_query() for read queries.
+
+    Returns (results, columns) with each result row as a list, so the same
+    inflate helpers work on either path.
+    """
+    started = time.perf_counter()
+    records, _, keys = await get_async_driver().execute_query(
+        query,
+        params or {},
+        database_=neomodel_config.DATABASE_NAME,
+        routing_=RoutingControl.READ
+    )
+    record_query(query, (time.perf_counter() - started) * 1000)
+    return [list(record.values()) for record in records], keys
@@ -0,0 +1,211 @@
+"""
+Registry of the Neo4j indexes and constraints the app's queries rely on.
+
+neomodel only creates what the model properties declare. This module lists
+the full set (including relationship property indexes) together with the
+key queries that must be served by them. Both are used by the
+ensure_indexes management command.
+"""
+
+from collections import namedtuple
+
+from .models import Supplier, Product, Store
+
+
+class SchemaItem(namedtuple('SchemaItem', ['name', 'kind', 'target', 'properties'])):
+    """
+    One index or constraint.
+
+    kind is one of:
+        unique: uniqueness constraint on a node property
+        index: range index on node properties
+        rel_index: range index on relationship properties
+        fulltext: full-text index on node properties
+    """
+    __slots__ = ()
+
+    @property
+    def is_constraint(self):
+        return self.kind == 'unique'
+
+    @property
+    def is_relationship(self):
+        return self.kind == 'rel_index'
+
+    @property
+    def index_type(self):
+        """Index type as reported by SHOW INDEXES."""
+        return 'FULLTEXT' if self.kind == 'fulltext' else 'RANGE'
+
+    def cypher(self):
+        props = ', '.join(f'x.{prop}' for prop in self.properties)
+        if self.kind == 'unique':
+            return (f'CREATE CONSTRAINT {self.name} IF NOT EXISTS '
+                    f'FOR (x:{self.target}) REQUIRE x.{self.properties[0]} IS UNIQUE')
+        if self.kind == 'index':
+            return f'CREATE INDEX {self.name} IF NOT EXISTS FOR (x:{self.target}) ON ({props})'
+        if self.kind == 'rel_index':
+            return f'CREATE INDEX {self.name} IF NOT EXISTS FOR ()-[x:{self.target}]-() ON ({props})'
+        if self.kind == 'fulltext':
+            return f'CREATE FULLTEXT INDEX {self.name} IF NOT EXISTS FOR (x:{self.target}) ON EACH [{props}]'
+        raise ValueError(f'Unknown schema item kind {self.kind!r}')
+
+
+SCHEMA = [
+    # Every detail, edit and delete view looks nodes up by uid
+    SchemaItem('supplier_uid_unique', 'unique', 'Supplier', ('uid',)),
+    SchemaItem('product_uid_unique', 'unique', 'Product', ('uid',)),
+    SchemaItem('store_uid_unique', 'unique', 'Store', ('uid',)),
+
+    # Natural keys: keyset pagination, typeahead and bulk upserts
+    SchemaItem('supplier_name_unique', 'unique', 'Supplier', ('name',)),
+    SchemaItem('product_sku_unique', 'unique', 'Product', ('sku',)),
+    SchemaItem('store_name_unique', 'unique', 'Store', ('name',)),
+    SchemaItem('product_name', 'index', 'Product', ('name',)),
+
+    # Conditional GET version queries (latest updated_at per label)
+    SchemaItem('supplier_updated_at', 'index', 'Supplier', ('updated_at',)),
+    SchemaItem('product_updated_at', 'index', 'Product', ('updated_at',)),
+    SchemaItem('store_updated_at', 'index', 'Store', ('updated_at',)),
+
+    # Filters
+    SchemaItem('product_category', 'index', 'Product', ('category',)),
+    SchemaItem('supplier_country', 'index', 'Supplier', ('country',)),
+
+    # Relationship counters: list sorting and filtering, conditional GET of the lists
+    SchemaItem('supplier_supply_count', 'index', 'Supplier', ('supply_count',)),
+    SchemaItem('product_supplier_count', 'index', 'Product', ('supplier_count',)),
+    SchemaItem('store_sku_count', 'index', 'Store', ('sku_count',)),
+    SchemaItem('store_total_quantity', 'index', 'Store', ('total_quantity',)),
+    SchemaItem('supplier_counts_updated_at', 'index', 'Supplier', ('counts_updated_at',)),
+    SchemaItem('product_counts_updated_at', 'index', 'Product', ('counts_updated_at',)),
+    SchemaItem('store_counts_updated_at', 'index', 'Store', ('counts_updated_at',)),
+
+    # Supply risk: nodes flagged for a refresh
+    SchemaItem('product_risk_dirty', 'index', 'Product', ('risk_dirty',)),
+    SchemaItem('supplier_risk_dirty', 'index', 'Supplier', ('risk_dirty',)),
+
+    # Full-text search (suppliers.search)
+    *[
+        SchemaItem(model.search_index(), 'fulltext', model.__label__, model.search_fields)
+        for model in (Supplier, Product, Store)
+    ],
+
+    # Price history chunks: merged on key, read by pair and period, removed with either node
+    SchemaItem('price_history_key_unique', 'unique', 'PriceHistoryChunk', ('key',)),
+    SchemaItem('price_history_pair_start', 'index', 'PriceHistoryChunk', ('supplier_uid', 'product_uid', 'start')),
+    SchemaItem('price_history_supplier', 'index', 'PriceHistoryChunk', ('supplier_uid',)),
+    SchemaItem('price_history_product', 'index', 'PriceHistoryChunk', ('product_uid',)),
+    SchemaItem('price_history_start', 'index', 'PriceHistoryChunk', ('start',)),
+
+    # Stock ledger chunks and snapshots: merged on key, read by store and
+    # period, removed with the product or store
+    SchemaItem('stock_ledger_key_unique', 'unique', 'StockLedgerChunk', ('key',)),
+    SchemaItem('stock_ledger_store_start', 'index', 'StockLedgerChunk', ('store_uid', 'start')),
+    SchemaItem('stock_ledger_product', 'index', 'StockLedgerChunk', ('product_uid',)),
+    SchemaItem('stock_snapshot_key_unique', 'unique', 'StockSnapshot', ('key',)),
+    SchemaItem('stock_snapshot_store_taken_at', 'index', 'StockSnapshot', ('store_uid', 'taken_at')),
+    SchemaItem('stock_snapshot_taken_at', 'index', 'StockSnapshot', ('taken_at',)),
+
+    # Report rows: replaced by group, read in sort order
+    SchemaItem('report_row_key_unique', 'unique', 'ReportRow', ('key',)),
+    SchemaItem('report_row_group', 'index', 'ReportRow', ('report', 'group')),
+    SchemaItem('report_row_sort', 'index', 'ReportRow', ('report', 'sort_key')),
+    SchemaItem('report_state_unique', 'unique', 'ReportState', ('report',)),
+
+    # Offers changed since a report watermark
+    SchemaItem('supplies_last_updated', 'rel_index', 'SUPPLIES', ('last_updated',)),
+
+    # Low stock lookups on the AVAILABLE_AT relationship
+    SchemaItem('available_at_quantity', 'rel_index', 'AVAILABLE_AT', ('quantity',)),
+    SchemaItem('available_at_low_stock', 'rel_index', 'AVAILABLE_AT', ('low_stock', 'quantity')),
+]
+
+
+# Operators that mean a query reads every node or relationship of a label/type
+SCAN_OPERATORS = {
+    'AllNodesScan',
+    'NodeByLabelScan',
+    'DirectedRelationshipTypeScan',
+    'UndirectedRelationshipTypeScan',
+    'DirectedAllRelationshipsScan',
+    'UndirectedAllRelationshipsScan',
+}
+
+
+def _page_query(model=Product, after=('SKU-0001', 'uid'), sort=None):
+    query, params = model._page_query(after, None, 25, sort=sort)
+    return query, params
+
+
+# (description, query, params) for the hot queries that must be index-backed
+PLAN_CHECKS = [
+    ('Supplier by uid', 'MATCH (n:Supplier {uid: $uid}) RETURN n', {'uid': 'x'}),
+    ('Product by uid', 'MATCH (n:Product {uid: $uid}) RETURN n', {'uid': 'x'}),
+    ('Store by uid', 'MATCH (n:Store {uid: $uid}) RETURN n', {'uid': 'x'}),
+    ('Product by sku', 'MATCH (n:Product {sku: $sku}) RETURN n', {'sku': 'x'}),
+    ('Product typeahead', 'MATCH (n:Product) WHERE n.name STARTS WITH $term RETURN n', {'term': 'x'}),
+    ('Product page', *_page_query()),
+    ('Store page by units in stock', *_page_query(Store, (100, 'uid'), sort='total_quantity')),
+    ('Store stock levels', """
+        MATCH (n:Store {uid: $uid})<-[rel:AVAILABLE_AT]-(other:Product)
+        RETURN other, rel
+        """, {'uid': 'x'}),
+    ('Product list version', """
+        MATCH (n:Product)
+        WHERE n.updated_at IS NOT NULL
+        RETURN n.updated_at ORDER BY n.updated_at DESC LIMIT 1
+        """, {}),
+    ('Products by category', 'MATCH (n:Product) WHERE n.category = $category RETURN n', {'category': 'x'}),
+    ('Suppliers by country', 'MATCH (n:Supplier) WHERE n.country = $country RETURN n', {'country': 'x'}),
+    ('Low stock edges', """
+        MATCH (product:Product)-[rel:AVAILABLE_AT]->(store:Store)
+        WHERE rel.quantity < $threshold
+        RETURN product, store, rel.quantity
+        """, {'threshold': 10}),
+    ('Low stock feed', """
+        MATCH (product:Product)-[rel:AVAILABLE_AT]->(store:Store)
+        WHERE rel.low_stock = true
+        RETURN product, store, rel.quantity
+        ORDER BY rel.quantity
+        LIMIT 100
+        """, {}),
+    ('Single-source products', """
+        MATCH (product:Product)
+        WHERE product.supplier_count = 1 AND product.sku > $after
+        RETURN product ORDER BY product.sku LIMIT 25
+        """, {'after': ''}),
+    ('Product search', """
+        CALL db.index.fulltext.queryNodes('product_search', $query, {limit: 25})
+        YIELD node, score
+        RETURN node, score
+        """, {'query': 'widget*'}),
+    ('Products flagged for a risk refresh', 'MATCH (n:Product) WHERE n.risk_dirty = true RETURN n', {}),
+    ('Latest stock snapshot of a store', """
+        MATCH (snapshot:StockSnapshot {store_uid: $uid})
+        WHERE snapshot.taken_at <= $at
+        RETURN snapshot ORDER BY snapshot.taken_at DESC LIMIT 1
+        """, {'uid': 'x', 'at': 0.0}),
+    ('Stock ledger tail of a store', """
+        MATCH (chunk:StockLedgerChunk {store_uid: $uid})
+        WHERE chunk.start > $since AND chunk.start <= $at
+        RETURN chunk
+        """, {'uid': 'x', 'since': 0.0, 'at': 0.0}),
+    ('Report page', """
+        MATCH (row:ReportRow {report: $report})
+        WHERE row.sort_key > $after
+        RETURN row ORDER BY row.sort_key LIMIT 25
+        """, {'report': 'x', 'after': ''}),
+    ('Offers changed since a report refresh', """
+        MATCH (:Supplier)-[rel:SUPPLIES]->(product:Product)
+        WHERE rel.last_updated > $since
+        RETURN product.category
+        """, {'since': 0.0}),
+]
+
+
+def plan_operators(plan):
+    """Yield the operator names of a driver plan tree, without runtime suffixes."""
+    yield plan['operatorType'].split('@')[0]
+    for child in plan.get('children', []):
+        yield from plan_operators(child)
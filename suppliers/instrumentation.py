@@ -0,0 +1,196 @@
+"""
+Query latency, connection pool and acquisition wait metrics for the health endpoint.
+
+Every query run through neomodel's db.cypher_query(), graph.stream_records()
+or graph.async_cypher_query() is timed into a latency histogram keyed by a
+short fingerprint of the query text. Listeners registered with
+add_query_listener() are called for each query as well.
+
+The Neo4j driver has no public pool metrics, so pool_stats() and
+instrument_pool() read the sync driver's pool internals (``_pool``,
+``connections``, ``in_use``). Both degrade to reporting nothing if those
+internals change in a future driver release.
+"""
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the histogram buckets
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Distinct query fingerprints tracked before the rest are grouped as "other"
+MAX_TRACKED_QUERIES = 200
+
+FINGERPRINT_LENGTH = 80
+
+
+class Histogram:
+    """Thread-safe fixed-bucket latency histogram."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(BUCKETS_MS) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, elapsed_ms):
+        with self._lock:
+            self._counts[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+            self._sum += elapsed_ms
+            self._max = max(self._max, elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            count = sum(self._counts)
+            buckets = {f'le_{bound}': n for bound, n in zip(BUCKETS_MS, self._counts)}
+            buckets['le_inf'] = self._counts[-1]
+            return {
+                'count': count,
+                'sum_ms': round(self._sum, 3),
+                'mean_ms': round(self._sum / count, 3) if count else None,
+                'max_ms': round(self._max, 3),
+                'buckets': buckets,
+            }
+
+
+class QueryMetrics:
+    """Latency histograms per query fingerprint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, query, elapsed_ms):
+        key = fingerprint(query)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                if len(self._histograms) >= MAX_TRACKED_QUERIES:
+                    key = 'other'
+                histogram = self._histograms.setdefault(key, Histogram())
+        histogram.observe(elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            histograms = list(self._histograms.items())
+        return {key: histogram.snapshot() for key, histogram in histograms}
+
+
+query_metrics = QueryMetrics()
+acquisition_wait = Histogram()
+
+_query_listeners = []
+
+
+def fingerprint(query):
+    """Collapse whitespace and truncate, so a query is recognizable but bounded."""
+    return re.sub(r'\s+', ' ', query).strip()[:FINGERPRINT_LENGTH]
+
+
+def add_query_listener(listener):
+    """Call ``listener(query, elapsed_ms)`` after every instrumented query."""
+    _query_listeners.append(listener)
+
+
+def record_query(query, elapsed_ms):
+    query_metrics.observe(query, elapsed_ms)
+    for listener in _query_listeners:
+        listener(query, elapsed_ms)
+
+
+def instrument_database(database):
+    """Time every ``database.cypher_query()`` call (neomodel's db object). Idempotent."""
+    original = database.cypher_query
+    if getattr(original, '_instrumented', False):
+        return
+
+    @wraps(original)
+    def cypher_query(query, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(query, *args, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - started) * 1000)
+
+    cypher_query._instrumented = True
+    database.cypher_query = cypher_query
+
+
+def instrument_pool(driver):
+    """Time connection acquisition on the sync driver's pool. Idempotent."""
+    pool = getattr(driver, '_pool', None)
+    original = getattr(pool, 'acquire', None)
+    if original is None or getattr(original, '_instrumented', False):
+        return
+
+    @wraps(original)
+    def acquire(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            acquisition_wait.observe((time.perf_counter() - started) * 1000)
+
+    acquire._instrumented = True
+    pool.acquire = acquire
+
+
+def pool_stats(driver):
+    """
+    Return in-use and idle connection counts of the sync driver's pool, or
+    None if the driver does not expose them.
+    """
+    pool = getattr(driver, '_pool', None)
+    connections = getattr(pool, 'connections', None)
+    if connections is None:
+        return None
+    addresses = {}
+    with pool.lock:
+        for address, pooled in connections.items():
+            in_use = sum(1 for connection in pooled if connection.in_use)
+            addresses[str(address)] = {'in_use': in_use, 'idle': len(pooled) - in_use}
+    return {
+        'max_size': pool.pool_config.max_connection_pool_size,
+        'in_use': sum(counts['in_use'] for counts in addresses.values()),
+        'idle': sum(counts['idle'] for counts in addresses.values()),
+        'addresses': addresses,
+    }
+
+
+def warm_up_pool(connections=None):
+    """
+    Open ``connections`` (default NEO4J_POOL_WARMUP) pooled connections up front.
+
+    Each connection is acquired by its own open transaction, so the pool has
+    to create them side by side; they go back to the pool idle. Failures are
+    logged rather than raised so the app can still start while Neo4j is down.
+    """
+    from .graph import get_driver
+
+    connections = settings.NEO4J_POOL_WARMUP if connections is None else connections
+    if connections <= 0:
+        return
+    sessions, transactions = [], []
+    try:
+        driver = get_driver()
+        for _ in range(connections):
+            session = driver.session()
+            sessions.append(session)
+            transactions.append(session.begin_transaction())
+        logger.info('Warmed up %d Neo4j connections', connections)
+    except Exception as e:
+        logger.warning('Neo4j connection pool warm-up failed: %s', e)
+    finally:
+        for transaction in transactions:
+            transaction.close()
+        for session in sessions:
+            session.close()
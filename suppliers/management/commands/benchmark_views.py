@@ -0,0 +1,60 @@
+"""
+Measure latency and query counts of every suppliers URL against the current graph.
+
+Usage:
+    python manage.py benchmark_views
+    python manage.py benchmark_views --repeat 10 --output bench/results.json
+    python manage.py benchmark_views --url supplier_list --url dashboard
+
+Seed a graph first (seed_graph). Results are written as JSON, keyed by git
+commit, so runs can be compared across commits. The command fails when any
+view exceeds its query or time budget (see suppliers/benchmark.py).
+"""
+
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from suppliers import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every suppliers URL and fail on views over their query or time budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Timed requests per URL (default: 3)')
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='Only benchmark this URL name (repeatable)'
+        )
+        parser.add_argument(
+            '--output', default='benchmark_results.json',
+            help='Where to write the JSON results (default: benchmark_results.json)'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        report = benchmark.run_benchmark(repeat=options['repeat'], only=options['urls'])
+
+        for result in report['results']:
+            line = (
+                f"{result['url']:<40} {result['queries']:>3} queries "
+                f"median {result['median_ms']:>9.1f}ms  p95 {result['p95_ms']:>9.1f}ms"
+            )
+            if result['failures']:
+                self.stdout.write(self.style.ERROR(f"{line}  FAIL: {'; '.join(result['failures'])}"))
+            else:
+                self.stdout.write(line)
+
+        directory = os.path.dirname(options['output'])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if report['failed']:
+            raise CommandError(f"{report['failed']} of {len(report['results'])} URLs exceeded their budget")
+        self.stdout.write(self.style.SUCCESS(f"All {len(report['results'])} URLs within budget"))
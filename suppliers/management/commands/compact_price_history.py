@@ -0,0 +1,32 @@
+"""
+Downsample and expire supplier price history (see suppliers/price_history.py).
+
+Usage:
+    python manage.py compact_price_history
+    python manage.py compact_price_history --batch-size 5000
+
+Observations older than SUPPLIERS_PRICE_HISTORY_RAW_DAYS are reduced to the
+last one per SUPPLIERS_PRICE_HISTORY_BUCKET_HOURS, and history older than
+SUPPLIERS_PRICE_HISTORY_RETENTION_DAYS is deleted. Run it daily.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from suppliers import price_history
+
+
+class Command(BaseCommand):
+    help = 'Downsample old price history observations and delete expired ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_BULK_BATCH_SIZE,
+            help='Price history chunks updated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        downsampled, deleted = price_history.compact(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Downsampled {downsampled} price history chunks and deleted {deleted} expired ones'
+        ))
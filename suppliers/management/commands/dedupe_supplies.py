@@ -0,0 +1,57 @@
+"""
+Merge parallel SUPPLIES relationships between the same supplier and product.
+
+Usage:
+    python manage.py dedupe_supplies
+    python manage.py dedupe_supplies --batch-size 5000
+
+Linking used to add a new relationship every time a pair was linked again;
+links are now merged on the pair. Run this once after upgrading. For each
+duplicated pair the most recently updated relationship is kept (by ``since``
+when ``last_updated`` is missing, then by element id so that reruns agree),
+with the earliest ``since`` of the group, and the counters of both nodes are
+reduced by the number of relationships removed.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from suppliers import cache, graph
+from suppliers.models import epoch_now
+
+
+class Command(BaseCommand):
+    help = 'Remove duplicate SUPPLIES relationships, keeping the most recently updated one per pair.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_BULK_BATCH_SIZE,
+            help='Supplier/product pairs cleaned up per transaction'
+        )
+
+    def handle(self, *args, **options):
+        query = """
+        MATCH (supplier:Supplier)-[rel:SUPPLIES]->(product:Product)
+        WITH supplier, product, count(rel) AS edges
+        WHERE edges > 1
+        CALL {
+            WITH supplier, product
+            MATCH (supplier)-[rel:SUPPLIES]->(product)
+            WITH supplier, product, rel ORDER BY coalesce(rel.last_updated, rel.since) DESC, elementId(rel)
+            WITH supplier, product, collect(rel) AS rels, min(rel.since) AS since
+            WITH supplier, product, rels[0] AS kept, rels[1..] AS duplicates, since
+            SET kept.since = since
+            FOREACH (duplicate IN duplicates | DELETE duplicate)
+            SET supplier.supply_count = coalesce(supplier.supply_count, 0) - size(duplicates),
+                supplier.counts_updated_at = $now,
+                product.supplier_count = coalesce(product.supplier_count, 0) - size(duplicates),
+                product.counts_updated_at = $now,
+                product.risk_dirty = true
+        } IN TRANSACTIONS OF $batch_size ROWS
+        """
+        counters = graph.run_in_transactions(query, {'batch_size': options['batch_size'], 'now': epoch_now()})
+        cache.invalidate('Supplier', 'Product', 'SUPPLIES')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {counters.relationships_deleted} duplicate SUPPLIES relationships'
+        ))
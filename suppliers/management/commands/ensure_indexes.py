@@ -0,0 +1,85 @@
+"""
+Create, verify and report the indexes and constraints the app relies on.
+
+Usage:
+    python manage.py ensure_indexes             # create missing, then report
+    python manage.py ensure_indexes --check     # report only, fail if any are missing
+    python manage.py ensure_indexes --explain   # also fail if a hot query scans a label
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from neomodel import db
+
+from suppliers import graph
+from suppliers.indexes import SCHEMA, PLAN_CHECKS, SCAN_OPERATORS, plan_operators
+
+
+class Command(BaseCommand):
+    help = 'Create and verify the Neo4j indexes and constraints used by the supplier views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Do not create anything; exit with an error if anything is missing'
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Run the key queries through EXPLAIN and fail on label or type scans'
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            for item in SCHEMA:
+                db.cypher_query(item.cypher())
+
+        missing = self._report()
+        problems = []
+        if missing:
+            problems.append(f"{len(missing)} indexes or constraints missing or not online: {', '.join(missing)}")
+        if options['explain']:
+            scans = self._explain()
+            if scans:
+                problems.append(f"{len(scans)} key queries fall back to scans: {', '.join(scans)}")
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('All indexes and constraints are in place.'))
+
+    def _report(self):
+        """Print the state of every expected schema item; return the names of missing ones."""
+        indexes, _ = db.cypher_query(
+            'SHOW INDEXES YIELD labelsOrTypes, properties, state, type '
+            "WHERE type IN ['RANGE', 'FULLTEXT'] RETURN type, labelsOrTypes, properties, state"
+        )
+        constraints, _ = db.cypher_query(
+            'SHOW CONSTRAINTS YIELD labelsOrTypes, properties, type '
+            "WHERE type IN ['UNIQUENESS', 'NODE_PROPERTY_UNIQUENESS'] RETURN labelsOrTypes, properties"
+        )
+        index_state = {(kind, labels[0], tuple(props)): state for kind, labels, props, state in indexes}
+        unique = {(labels[0], tuple(props)) for labels, props in constraints}
+
+        missing = []
+        for item in SCHEMA:
+            key = (item.target, tuple(item.properties))
+            if item.is_constraint:
+                state = 'ONLINE' if key in unique else 'MISSING'
+            else:
+                state = index_state.get((item.index_type, *key), 'MISSING')
+            style = self.style.SUCCESS if state == 'ONLINE' else self.style.ERROR
+            self.stdout.write(f"{item.name:<28} {item.kind:<10} {item.target}({', '.join(item.properties)}) " + style(state))
+            if state != 'ONLINE':
+                missing.append(item.name)
+        return missing
+
+    def _explain(self):
+        """EXPLAIN every plan check; return the descriptions of queries that scan."""
+        scans = []
+        for description, query, params in PLAN_CHECKS:
+            operators = set(plan_operators(graph.explain(query, params)))
+            offending = operators & SCAN_OPERATORS
+            if offending:
+                scans.append(description)
+                self.stdout.write(f"{description:<28} " + self.style.ERROR(f"scan: {', '.join(sorted(offending))}"))
+            else:
+                self.stdout.write(f"{description:<28} " + self.style.SUCCESS('index-backed'))
+        return scans
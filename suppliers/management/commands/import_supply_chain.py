@@ -0,0 +1,181 @@
+"""
+Bulk import of suppliers, products, stores, SUPPLIES and AVAILABLE_AT data.
+
+Usage:
+    python manage.py import_supply_chain products catalog.csv
+    python manage.py import_supply_chain stock levels.jsonl --batch-size 5000
+    python manage.py import_supply_chain supplies prices.csv --supplier "Acme Ltd"
+
+Input is streamed row by row and written in batched UNWIND ... MERGE
+transactions. Rows that fail validation or reference unknown nodes are
+written to a rejects file (JSON lines) instead of aborting the import.
+Importing supplies again updates the existing SUPPLIES relationships.
+"""
+
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from neomodel import db
+
+from suppliers import bulk
+
+
+# Expected columns per kind, shown in --help
+COLUMNS = {
+    'suppliers': 'name, contact_person, email, phone, address, country',
+    'products': 'sku, name, description, category, unit_of_measure',
+    'stores': 'name, location, store_type',
+    'supplies': 'supplier|supplier_uid, sku|product_uid, unit_price, lead_time_days',
+    'stock': 'sku|product_uid, store|store_uid, quantity, aisle',
+}
+
+
+def read_csv(stream):
+    """Yield (line number, row) pairs from a CSV stream with a header row."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """Yield (line number, row) pairs from a JSON lines stream, skipping blank lines."""
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as e:
+            yield line_num, bulk.RowError(f'invalid JSON: {e}')
+
+
+def with_supplier(rows, supplier_uid):
+    """Fill in ``supplier_uid`` on rows that name no supplier."""
+    for line_num, raw in rows:
+        if isinstance(raw, dict) and not raw.get('supplier') and not raw.get('supplier_uid'):
+            raw = {**raw, 'supplier_uid': supplier_uid}
+        yield line_num, raw
+
+
+class Command(BaseCommand):
+    help = 'Stream CSV or JSONL data into Neo4j using batched, idempotent upserts.\n' + '\n'.join(
+        f'  {kind}: {columns}' for kind, columns in COLUMNS.items()
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=bulk.KINDS, help='Type of records in the input file')
+        parser.add_argument('path', help="Input file, or '-' for standard input")
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Input format (default: guessed from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows written per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Where to write rejected rows (default: <path>.rejects.jsonl)'
+        )
+        parser.add_argument(
+            '--supplier',
+            help='Supplier name or uid for supplies rows that name none (e.g. one price list)'
+        )
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        input_format = options['format']
+        if input_format is None:
+            if path.endswith('.csv'):
+                input_format = 'csv'
+            elif path.endswith(('.jsonl', '.ndjson', '.json')):
+                input_format = 'jsonl'
+            else:
+                raise CommandError('Cannot guess the input format, pass --format')
+        supplier_uid = None
+        if options['supplier']:
+            if kind != 'supplies':
+                raise CommandError('--supplier only applies to supplies')
+            results, _ = db.cypher_query(
+                "MATCH (n:Supplier) WHERE n.uid = $key OR n.name = $key RETURN n.uid LIMIT 1",
+                {'key': options['supplier']}
+            )
+            if not results:
+                raise CommandError(f"Unknown supplier {options['supplier']!r}")
+            supplier_uid = results[0][0]
+        rejects_path = options['rejects'] or (
+            'rejects.jsonl' if path == '-' else f'{path}.rejects.jsonl'
+        )
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+        reader = read_csv if input_format == 'csv' else read_jsonl
+        with stream, open(rejects_path, 'w', encoding='utf-8') as rejects_file:
+            rows = reader(stream)
+            if supplier_uid:
+                rows = with_supplier(rows, supplier_uid)
+            totals = self._import(kind, rows, batch_size, rejects_file)
+
+        total, applied, rejected, elapsed = totals
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {applied:,} of {total:,} {kind} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f'{rejected:,} rows rejected, see {rejects_path}'))
+
+    def _import(self, kind, rows, batch_size, rejects_file):
+        started = time.monotonic()
+        total = applied = rejected = 0
+        batch = []
+        raw_rows = {}
+
+        def reject(line_num, raw, reason):
+            nonlocal rejected
+            rejected += 1
+            rejects_file.write(json.dumps({'line': line_num, 'reason': reason, 'row': raw}, default=str) + '\n')
+
+        def flush():
+            nonlocal applied
+            if not batch:
+                return
+            done, failed = bulk.upsert(kind, batch)
+            applied += len(done)
+            for line_num, reason in failed:
+                reject(line_num, raw_rows[line_num], reason)
+            batch.clear()
+            raw_rows.clear()
+
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'{total:,} rows read, {applied:,} applied, {rejected:,} rejected '
+                f'({total / elapsed:,.0f} rows/s)'
+            )
+
+        for line_num, raw in rows:
+            total += 1
+            if isinstance(raw, bulk.RowError):
+                reject(line_num, None, str(raw))
+                continue
+            try:
+                batch.append(bulk.clean_row(kind, raw, line_num))
+            except bulk.RowError as e:
+                reject(line_num, raw, str(e))
+                continue
+            raw_rows[line_num] = raw
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        return total, applied, rejected, time.monotonic() - started
@@ -0,0 +1,49 @@
+"""
+Recompute the low_stock flag on every AVAILABLE_AT relationship.
+
+Usage:
+    python manage.py refresh_low_stock
+    python manage.py refresh_low_stock --batch-size 5000
+
+Stock writes, reorder level and store threshold edits keep the flag up to
+date on their own. Run this once after upgrading and whenever
+SUPPLIERS_LOW_STOCK_THRESHOLD changes.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from neomodel import db
+
+from suppliers import cache, graph
+from suppliers.models import LOW_STOCK_EXPRESSION
+
+
+class Command(BaseCommand):
+    help = 'Recompute the low stock flag of every product/store stock level.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_BULK_BATCH_SIZE,
+            help='Relationships updated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        query = f"""
+        MATCH (product:Product)-[rel:AVAILABLE_AT]->(store:Store)
+        CALL {{
+            WITH product, store, rel
+            SET rel.low_stock = {LOW_STOCK_EXPRESSION}
+        }} IN TRANSACTIONS OF $batch_size ROWS
+        """
+        graph.run_in_transactions(query, {
+            'batch_size': options['batch_size'],
+            'low_stock_threshold': settings.SUPPLIERS_LOW_STOCK_THRESHOLD
+        })
+        cache.invalidate('AVAILABLE_AT')
+
+        results, _ = db.cypher_query(
+            "MATCH (:Product)-[rel:AVAILABLE_AT]->(:Store) WHERE rel.low_stock = true RETURN count(rel)"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Low stock flags refreshed; {results[0][0]} stock levels are below their reorder level'
+        ))
@@ -0,0 +1,35 @@
+"""
+Recompute the precomputed reports (see suppliers/reports.py).
+
+Usage:
+    python manage.py refresh_reports                             # groups changed since the last refresh
+    python manage.py refresh_reports --full                      # every group
+    python manage.py refresh_reports --report stock_by_category --batch-size 50
+
+Scheduled by run_scheduler; the report views never compute anything.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from suppliers import reports
+
+
+class Command(BaseCommand):
+    help = 'Refresh the precomputed report rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--report', action='append', choices=list(reports.REPORTS),
+            help='Report to refresh (repeatable; default: all)'
+        )
+        parser.add_argument('--full', action='store_true', help='Recompute every group, not only changed ones')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_REPORT_BATCH_SIZE,
+            help='Groups recomputed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        for name in options['report'] or reports.REPORTS:
+            groups, rows = reports.refresh(name, full=options['full'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{name}: recomputed {groups} groups ({rows} rows)'))
@@ -0,0 +1,41 @@
+"""
+Recompute the precomputed supply risk figures (see suppliers/risk.py).
+
+Usage:
+    python manage.py refresh_supply_risk          # flagged products and suppliers only
+    python manage.py refresh_supply_risk --all    # the whole network
+    python manage.py refresh_supply_risk --batch-size 5000
+
+Writes only flag what they touch and the risk reports never refresh;
+run_scheduler runs this every few minutes. Run it after large imports, and
+with --all once after upgrading.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from suppliers import risk
+
+
+class Command(BaseCommand):
+    help = 'Recompute supplier blast radius figures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute every product and supplier')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_RISK_REFRESH_LIMIT,
+            help='Products and suppliers refreshed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['all']:
+            products, suppliers = risk.refresh_all(batch_size)
+        else:
+            products, suppliers = risk.refresh_pending(batch_size)
+
+        summary = risk.summary()
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {products} products and {suppliers} suppliers; '
+            f"{summary['single_source']} of {summary['products']} products are single-source"
+        ))
@@ -0,0 +1,50 @@
+"""
+Recompute the relationship counters kept on Supplier, Product and Store nodes.
+
+Usage:
+    python manage.py repair_counters
+    python manage.py repair_counters --batch-size 5000
+
+Relationship writes and deletes keep the counters exact on their own (see
+SupplyChainNode.counters). Run this once after upgrading, and after writing
+relationships directly in Neo4j. Only nodes whose counters drifted are written.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from suppliers import cache, graph
+from suppliers.models import Supplier, Product, Store, epoch_now
+
+
+class Command(BaseCommand):
+    help = 'Recompute supply, supplier, stocked product and stock quantity counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_BULK_BATCH_SIZE,
+            help='Nodes updated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Supplier, Product, Store):
+            counters = model.counters
+            values = ', '.join(f'{expression} AS {counter}' for counter, expression in counters.items())
+            drifted = ' OR '.join(f'n.{counter} IS NULL OR n.{counter} <> {counter}' for counter in counters)
+            assignments = ', '.join(f'n.{counter} = {counter}' for counter in counters)
+            query = f"""
+            MATCH (n:{model.__label__})
+            CALL {{
+                WITH n
+                WITH n, {values}
+                WHERE {drifted}
+                SET {assignments}, n.counts_updated_at = $now
+            }} IN TRANSACTIONS OF $batch_size ROWS
+            """
+            written = graph.run_in_transactions(query, {'batch_size': options['batch_size'], 'now': epoch_now()})
+            # Every repaired node gets each counter plus counts_updated_at
+            repaired = written.properties_set // (len(counters) + 1)
+            self.stdout.write(f'{model.__label__}: {repaired} nodes repaired')
+        cache.invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS('Counters are up to date'))
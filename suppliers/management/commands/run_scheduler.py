@@ -0,0 +1,64 @@
+"""
+Background worker running the jobs of SUPPLIERS_SCHEDULE (see suppliers/scheduler.py).
+
+Usage:
+    python manage.py run_scheduler                  # run until interrupted
+    python manage.py run_scheduler --list           # show the schedule
+    python manage.py run_scheduler --run reports    # run one job now and exit
+
+Wakes up at the start of every minute and runs the jobs due, one after the
+other. Minutes that pass while jobs run are skipped, not made up. Run a
+single worker per database: jobs are not locked against other workers.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from suppliers import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run scheduled background jobs (report refreshes, snapshots, compaction).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='List the scheduled jobs and exit')
+        parser.add_argument('--run', metavar='JOB', help='Run one job immediately and exit')
+
+    def handle(self, *args, **options):
+        try:
+            jobs = scheduler.load_jobs()
+        except scheduler.ScheduleError as e:
+            raise CommandError(str(e))
+
+        if options['list']:
+            for job in jobs:
+                self.stdout.write(f"{job.name:<20} {str(job.schedule):<16} {' '.join((job.command, *job.args))}")
+            return
+
+        if options['run']:
+            job = next((job for job in jobs if job.name == options['run']), None)
+            if job is None:
+                raise CommandError(f"Unknown job {options['run']!r}; choose from {', '.join(job.name for job in jobs)}")
+            if not job.run(self.stdout):
+                raise CommandError(f'Job {job.name} failed')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Scheduler started with {len(jobs)} jobs'))
+        minute = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+        try:
+            while True:
+                time.sleep(max(0.0, (minute - datetime.now()).total_seconds()))
+                for job in scheduler.due_jobs(jobs, minute):
+                    self.stdout.write(f'{minute:%Y-%m-%d %H:%M} running {job.name}')
+                    job.run(self.stdout)
+                following = minute + timedelta(minutes=1)
+                current = datetime.now().replace(second=0, microsecond=0)
+                if current >= following:
+                    skipped = int((current - minute).total_seconds() // 60)
+                    self.stderr.write(f'Jobs overran; skipping {skipped} minute(s)')
+                    following = current + timedelta(minutes=1)
+                minute = following
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler stopped')
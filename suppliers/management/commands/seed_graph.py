@@ -0,0 +1,57 @@
+"""
+Seed a synthetic supply chain graph for benchmarks.
+
+Usage:
+    python manage.py seed_graph                 # small: 1k products
+    python manage.py seed_graph --size medium   # 50k products
+    python manage.py seed_graph --size 200000 --seed 7
+    python manage.py seed_graph --clear         # remove seeded nodes only
+
+Seeded nodes are named "Bench ..." (SKUs "BENCH-..."); real data is never
+touched. Run ensure_indexes first so the upserts can merge on indexed keys.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from suppliers import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Write a synthetic graph of suppliers, products and stores, or remove it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', default='small',
+            help=f"One of {', '.join(benchmark.SIZES)} or a number of products (default: small)"
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--batch-size', type=int, help='Rows written per transaction')
+        parser.add_argument('--clear', action='store_true', help='Delete the seeded nodes instead')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['clear']:
+            deleted = benchmark.clear_seeded(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} seeded nodes'))
+            return
+
+        try:
+            products, stores, suppliers = benchmark.graph_size(options['size'])
+        except ValueError:
+            raise CommandError(f"--size must be one of {', '.join(benchmark.SIZES)} or a number")
+        self.stdout.write(f'Seeding {products} products, {stores} stores and {suppliers} suppliers...')
+
+        def progress(kind, written):
+            self.stdout.write(f'  {kind}: {written}', ending='\r')
+            self.stdout.flush()
+
+        written = benchmark.seed_graph(
+            options['size'], seed=options['seed'], batch_size=options['batch_size'], progress=progress
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {kind}' for kind, count in written.items()) + f' written in {elapsed:.1f}s'
+        ))
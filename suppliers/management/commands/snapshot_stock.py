@@ -0,0 +1,38 @@
+"""
+Snapshot store stock levels for point-in-time inventory (see suppliers/stock_ledger.py).
+
+Usage:
+    python manage.py snapshot_stock
+    python manage.py snapshot_stock --force --batch-size 500
+
+Snapshots every store whose latest snapshot is older than
+SUPPLIERS_STOCK_SNAPSHOT_HOURS and deletes snapshots older than
+SUPPLIERS_STOCK_SNAPSHOT_RETENTION_DAYS. Run it at least as often as
+SUPPLIERS_STOCK_SNAPSHOT_HOURS so that inventory lookups only read a short
+tail of the stock ledger.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from suppliers import stock_ledger
+
+
+class Command(BaseCommand):
+    help = 'Snapshot the stock levels of stores and delete expired snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Snapshot every store, even those with a recent snapshot'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUPPLIERS_BULK_BATCH_SIZE,
+            help='Stores snapshotted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        taken, deleted = stock_ledger.take_snapshots(options['batch_size'], force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Took {taken} stock snapshots and deleted {deleted} expired ones'
+        ))
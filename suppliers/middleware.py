@@ -0,0 +1,160 @@
+"""
+Per-request Cypher query profiler.
+
+QueryProfilerMiddleware collects every query the request runs (through the
+instrumentation listeners, so neomodel node and relationship operations are
+included) and then:
+
+    - adds a Server-Timing header with the query count and database time
+      (except to streamed responses, whose queries run after the headers),
+    - logs a warning when the request exceeds SUPPLIERS_QUERY_BUDGET queries
+      or SUPPLIERS_QUERY_TIME_BUDGET_MS of database time,
+    - with SUPPLIERS_QUERY_PANEL, appends a debug panel listing the slowest
+      and repeated statements to HTML pages.
+
+It is only installed with SUPPLIERS_QUERY_PROFILER (default: DEBUG).
+"""
+
+import contextvars
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.loader import render_to_string
+
+from .instrumentation import add_query_listener, fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+# Statements shown in the slowest list of logs and the debug panel
+SLOWEST_SHOWN = 5
+
+# A statement run this many times in one request is reported as repeated (likely N+1)
+REPEATED_THRESHOLD = 3
+
+# Profiles being recorded in the current context; nested profiles all see a query
+_active_profiles = contextvars.ContextVar('suppliers_query_profiles', default=())
+
+
+class QueryProfile:
+    """The queries run while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+
+    def add(self, query, elapsed_ms):
+        self.queries.append((query, elapsed_ms))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_ms(self):
+        return sum(elapsed for _, elapsed in self.queries)
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def slowest(self, limit=SLOWEST_SHOWN):
+        return sorted(self.queries, key=lambda item: item[1], reverse=True)[:limit]
+
+    def repeated(self, threshold=REPEATED_THRESHOLD):
+        """Return [(query, times run)] for statements run at least ``threshold`` times."""
+        counts = Counter(query for query, _ in self.queries)
+        return [(query, count) for query, count in counts.most_common() if count >= threshold]
+
+    def over_budget(self):
+        return (self.count > settings.SUPPLIERS_QUERY_BUDGET
+                or self.total_ms > settings.SUPPLIERS_QUERY_TIME_BUDGET_MS)
+
+
+def _record(query, elapsed_ms):
+    for profile in _active_profiles.get():
+        profile.add(query, elapsed_ms)
+
+
+add_query_listener(_record)
+
+
+@contextmanager
+def profile_queries():
+    """Record the queries run inside the block into the QueryProfile it yields."""
+    profile = QueryProfile()
+    token = _active_profiles.set(_active_profiles.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+
+class QueryProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SUPPLIERS_QUERY_PROFILER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with profile_queries() as profile:
+            response = self.get_response(request)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        with profile_queries() as profile:
+            response = await self.get_response(request)
+        return self._finish(request, response, profile)
+
+    def _finish(self, request, response, profile):
+        if not response.streaming:
+            response['Server-Timing'] = (
+                f'neo4j;dur={profile.total_ms:.1f};desc="{profile.count} queries", '
+                f'total;dur={profile.elapsed_ms:.1f}'
+            )
+        if profile.over_budget():
+            self._log_over_budget(request, profile)
+        if settings.SUPPLIERS_QUERY_PANEL:
+            self._append_panel(response, profile)
+        return response
+
+    def _log_over_budget(self, request, profile):
+        slowest = '; '.join(f'{elapsed:.1f}ms {fingerprint(query)}' for query, elapsed in profile.slowest())
+        repeated = '; '.join(f'{count}x {fingerprint(query)}' for query, count in profile.repeated())
+        logger.warning(
+            'Query budget exceeded: %s %s ran %d queries in %.1fms (budget %d queries, %.0fms). '
+            'Slowest: %s. Repeated: %s',
+            request.method, request.path, profile.count, profile.total_ms,
+            settings.SUPPLIERS_QUERY_BUDGET, settings.SUPPLIERS_QUERY_TIME_BUDGET_MS,
+            slowest, repeated or 'none'
+        )
+
+    def _append_panel(self, response, profile):
+        if (response.streaming or response.status_code != 200
+                or not response.get('Content-Type', '').startswith('text/html')):
+            return
+        content = response.content.decode(response.charset)
+        position = content.rfind('</body>')
+        if position == -1:
+            return
+        panel = render_to_string('suppliers/_query_profile.html', {
+            'profile': profile,
+            'slowest': profile.slowest(),
+            'repeated': profile.repeated(),
+            'over_budget': profile.over_budget(),
+        })
+        response.content = content[:position] + panel + content[position:]
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
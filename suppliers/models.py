@@ -5,9 +5,15 @@ Models:
     - Supplier: Represents a supplier in the supply chain
     - Product: Represents a product
     - SUPPLIES: Relationship between Supplier and Product
+    - PriceHistoryChunk: Price and lead time observations of one SUPPLIES pair
+    - StockLedgerChunk: Stock movements of one AVAILABLE_AT pair
+    - StockSnapshot: Stock levels of one store at one point in time
+    - ReportRow: One precomputed row of a report
+    - ReportState: Refresh watermark of a report
 """
 
 from neomodel import (
+    db,
     StructuredNode,
     StringProperty,
     EmailProperty,
@@ -17,10 +23,316 @@ from neomodel import (
     StructuredRel,
     FloatProperty,
     IntegerProperty,
+    ArrayProperty,
+    BooleanProperty,
     UniqueIdProperty
 )
 from datetime import datetime
 
+from django.conf import settings
+
+from .pagination import KeysetPage, encode_cursor, decode_cursor
+
+
+# Maximum number of low stock rows returned to the dashboard in one page
+DASHBOARD_LOW_STOCK_LIMIT = 100
+
+# Cypher expression deciding whether an AVAILABLE_AT edge is low on stock.
+# Expects ``product``, ``store`` and ``rel`` to be bound and a
+# $low_stock_threshold parameter holding the global default. The per-product
+# reorder level wins over the per-store threshold.
+LOW_STOCK_EXPRESSION = (
+    "rel.quantity < coalesce(product.reorder_level, store.low_stock_threshold, $low_stock_threshold)"
+)
+
+# Cypher clause flagging ``product`` for a supply risk refresh after one of its
+# SUPPLIES or AVAILABLE_AT edges changed. Always writes, so the product lock
+# orders it against a refresh clearing the flag: skipping the write when the
+# flag looked set could let a concurrent refresh clear it over this change.
+MARK_PRODUCT_RISK_DIRTY = "SET product.risk_dirty = true"
+
+
+def _refresh_low_stock(variable, uid):
+    """Recompute the low stock flag on the AVAILABLE_AT edges of one product or store."""
+    query = f"""
+    MATCH (product:Product)-[rel:AVAILABLE_AT]->(store:Store)
+    WHERE {variable}.uid = $uid
+    SET rel.low_stock = {LOW_STOCK_EXPRESSION}
+    """
+    db.cypher_query(query, {
+        'uid': uid,
+        'low_stock_threshold': settings.SUPPLIERS_LOW_STOCK_THRESHOLD
+    })
+
+
+def epoch_now():
+    """Current time encoded the same way neomodel stores DateTimeProperty values."""
+    return DateTimeProperty().deflate(datetime.now())
+
+
+# History nodes refer to a node by uid instead of a relationship, so they are
+# deleted along with it: label -> ((history label, uid property), ...)
+HISTORY_NODES = {
+    'Supplier': (('PriceHistoryChunk', 'supplier_uid'),),
+    'Product': (('PriceHistoryChunk', 'product_uid'), ('StockLedgerChunk', 'product_uid')),
+    'Store': (('StockLedgerChunk', 'store_uid'), ('StockSnapshot', 'store_uid')),
+}
+
+
+def delete_history(label, node=None):
+    """Cypher deleting the history nodes of the ``label`` node bound to ``node``, or else of the one with uid $uid."""
+    imports, uid = (f'WITH {node} ', f'{node}.uid') if node else ('', '$uid')
+    return '\n'.join(
+        f'CALL {{ {imports}MATCH (history:{history} {{{prop}: {uid}}}) DELETE history }}'
+        for history, prop in HISTORY_NODES[label]
+    )
+
+
+def _before_detach(node, query):
+    """
+    Run ``query`` before ``node`` is deleted, to release what its
+    relationships are counted in: the neighbours' counters and their supply
+    risk flags (see suppliers.risk). The node's history is deleted first.
+    Delete views run it in the same transaction as the delete.
+    """
+    query = delete_history(node.__label__) + '\n' + query
+    db.cypher_query(query, {'uid': node.uid, 'now': epoch_now()})
+
+
+class SupplyChainNode(StructuredNode):
+    """
+    Abstract base class for all supply chain nodes.
+    Provides server-side aggregation helpers so callers never have to
+    pull whole node sets over Bolt just to count them.
+    """
+    __abstract_node__ = True
+
+    # Indexed property used (with uid as tie-breaker) to order paginated listings
+    ordering_key = 'name'
+    
+    # Indexed properties matched by prefix in typeahead lookups
+    typeahead_fields = ('name',)
+
+    # Properties covered by the label's full-text index (see suppliers.search)
+    search_fields = ()
+
+    # Relationship counters kept on the node: property -> Cypher expression
+    # recomputing it for ``n`` from scratch (used by repair_counters). Writes
+    # adjust them in the statement that adds or removes the relationship.
+    counters = {}
+
+    # ?sort= value -> (property, descending, label) for listings; the first is the default
+    sort_orders = {'name': ('name', False, 'Name')}
+
+    # ?filter= value -> (Cypher condition on ``n``, label) for listings
+    list_filters = {}
+
+    @classmethod
+    def search_index(cls):
+        """Name of the label's full-text index."""
+        return f'{cls.__label__.lower()}_search'
+
+    @classmethod
+    def count(cls):
+        """Return the number of nodes with this label (counted in Neo4j)."""
+        query = f"MATCH (n:{cls.__label__}) RETURN count(n)"
+        results, _ = db.cypher_query(query)
+        return results[0][0]
+
+    @classmethod
+    def page(cls, after=None, before=None, limit=25, sort=None, list_filter=None):
+        """
+        Fetch one page of nodes ordered by (sort key, uid) using keyset pagination.
+
+        Args:
+            after: (key, uid) of the last node of the previous page
+            before: (key, uid) of the first node of the following page
+            limit: Maximum number of nodes to return
+            sort: Key of sort_orders (default: ordering_key)
+            list_filter: Key of list_filters (default: no filter)
+
+        Returns:
+            KeysetPage
+        """
+        query, params = cls._page_query(after, before, limit, sort=sort, list_filter=list_filter)
+        results, _ = db.cypher_query(query, params)
+        return cls._page_from_results(results, after, before, limit, sort=sort)
+
+    @classmethod
+    def sort_order(cls, sort):
+        """Return the (property, descending) of ``sort``, falling back to the default order."""
+        prop, descending, _ = cls.sort_orders.get(sort) or next(iter(cls.sort_orders.values()))
+        return prop, descending
+
+    @classmethod
+    def search_prefix(cls, term, limit=10):
+        """
+        Return up to ``limit`` nodes whose typeahead fields start with ``term``.
+        Each branch is an index-backed range seek, so cost does not grow with the catalog.
+        """
+        branches = '\n            UNION\n'.join(f"""
+            MATCH (n:{cls.__label__})
+            WHERE n.{field} STARTS WITH $term
+            RETURN n
+            ORDER BY n.{field}
+            LIMIT $limit""" for field in cls.typeahead_fields)
+        query = f"""
+        CALL {{{branches}
+        }}
+        RETURN n
+        ORDER BY n.{cls.ordering_key}
+        LIMIT $limit
+        """
+        results, _ = db.cypher_query(query, {'term': term, 'limit': limit})
+        return [cls.inflate(row[0]) for row in results]
+
+    @classmethod
+    def list_version(cls):
+        """
+        Return (count, latest updated_at, latest counts_updated_at) for this
+        label without inflating nodes.
+
+        Any create, edit or delete changes the first two and any relationship
+        write changes the counters of its endpoints, so together they validate
+        every page of the listing. The latest timestamps are read from the end
+        of their indexes.
+        """
+        results, _ = db.cypher_query(*cls.list_version_query())
+        return tuple(results[0])
+
+    @classmethod
+    def list_version_query(cls):
+        """Return (query, params) for list_version(); the single result row is the version."""
+        latest = '\n'.join(f"""
+        CALL {{
+            MATCH (n:{cls.__label__})
+            WHERE n.{prop} IS NOT NULL
+            WITH n ORDER BY n.{prop} DESC LIMIT 1
+            RETURN collect(n.{prop}) AS {prop}
+        }}""" for prop in ('updated_at', 'counts_updated_at'))
+        query = f"""
+        CALL {{ MATCH (n:{cls.__label__}) RETURN count(n) AS total }}
+        {latest}
+        RETURN total, updated_at[0], counts_updated_at[0]
+        """
+        return query, {}
+
+    @classmethod
+    def detail_version(cls, uid):
+        """
+        Return (updated_at, risk_refreshed_at, relationship count, latest
+        relationship update, latest neighbour update) for the node with
+        ``uid``, or None if it does not exist.
+
+        Covers everything a detail page shows: the node, its relationships
+        (SUPPLIES and AVAILABLE_AT set last_updated on every write) and the
+        names of the nodes at the other end. The supply risk refresh rewrites
+        the Supplier.risk_* figures without touching updated_at, so it is
+        versioned by risk_refreshed_at (null on other labels).
+        """
+        results, _ = db.cypher_query(*cls.detail_version_query(uid))
+        return tuple(results[0]) if results else None
+
+    @classmethod
+    def detail_version_query(cls, uid):
+        """Return (query, params) for detail_version(); no rows when the node does not exist."""
+        query = f"""
+        MATCH (n:{cls.__label__} {{uid: $uid}})
+        OPTIONAL MATCH (n)-[rel]-(other)
+        RETURN n.updated_at, n.risk_refreshed_at, count(rel), max(rel.last_updated), max(other.updated_at)
+        """
+        return query, {'uid': uid}
+
+    def typeahead_label(self):
+        """Human readable label shown in typeahead suggestions."""
+        return str(self)
+
+    # Hooks every concrete node overrides (see Supplier, Product and Store);
+    # the detail views and related_query() depend on them
+
+    @classmethod
+    def detail_related(cls):
+        """
+        Return (pattern, other model, rel model) for the relationships listed on
+        the detail page. ``pattern`` binds ``rel`` and ``other`` and matches the
+        node by ``$uid``.
+        """
+        raise NotImplementedError(f'{cls.__name__} must define detail_related()')
+
+    @classmethod
+    def detail_rows(cls, related):
+        """Turn (other_node, rel) pairs into the rows rendered on the detail page."""
+        raise NotImplementedError(f'{cls.__name__} must define detail_rows()')
+
+    @classmethod
+    def related_query(cls):
+        """Cypher returning (other, rel) rows for detail_related(), ordered for display."""
+        pattern, other_cls, _ = cls.detail_related()
+        return f"""
+        MATCH {pattern}
+        RETURN other, rel
+        ORDER BY other.{other_cls.ordering_key}
+        """
+
+    @classmethod
+    def inflate_related(cls, results):
+        """Inflate the rows of related_query() into (other_node, rel) tuples."""
+        _, other_cls, rel_cls = cls.detail_related()
+        return [(other_cls.inflate(other), rel_cls.inflate(rel)) for other, rel in results]
+
+    def _fetch_related(self):
+        """Fetch the detail page's related nodes together with their relationship properties in one query."""
+        results, _ = db.cypher_query(self.related_query(), {'uid': self.uid})
+        return self.detail_rows(self.inflate_related(results))
+
+    @classmethod
+    def _page_query(cls, after, before, limit, projection='n', sort=None, list_filter=None):
+        key, descending = cls.sort_order(sort)
+        params = {'limit': limit + 1}
+        conditions = []
+        if list_filter in cls.list_filters:
+            conditions.append(cls.list_filters[list_filter][0])
+        # Comparison and direction moving forward through the listing
+        ahead, order = ('<', 'DESC') if descending else ('>', 'ASC')
+        if before is not None:
+            ahead, order = ('>', 'ASC') if descending else ('<', 'DESC')
+            params['key'], params['uid'] = before
+        elif after is not None:
+            params['key'], params['uid'] = after
+        if before is not None or after is not None:
+            conditions.append(f"n.{key} {ahead}= $key AND (n.{key} {ahead} $key OR n.uid {ahead} $uid)")
+        where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+        query = f"""
+        MATCH (n:{cls.__label__})
+        {where}
+        RETURN {projection}
+        ORDER BY n.{key} {order}, n.uid {order}
+        LIMIT $limit
+        """
+        return query, params
+
+    @classmethod
+    def _page_from_results(cls, results, after, before, limit, sort=None):
+        items = [cls.inflate(row[0]) for row in results[:limit]]
+        has_more = len(results) > limit
+        if before is not None:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, after is not None
+
+        key, _ = cls.sort_order(sort)
+
+        def cursor(node):
+            return encode_cursor(getattr(node, key), node.uid)
+
+        return KeysetPage(
+            items,
+            limit,
+            next_cursor=cursor(items[-1]) if items and has_next else None,
+            prev_cursor=cursor(items[0]) if items and has_previous else None
+        )
+
 
 class SuppliesRel(StructuredRel):
     """
@@ -30,9 +342,10 @@ class SuppliesRel(StructuredRel):
     since = DateTimeProperty(default=datetime.now)
     unit_price = FloatProperty()
     lead_time_days = IntegerProperty()
+    last_updated = DateTimeProperty(default=datetime.now)
 
 
-class Supplier(StructuredNode):
+class Supplier(SupplyChainNode):
     """
     Supplier node in Neo4j.
     
@@ -44,9 +357,21 @@ class Supplier(StructuredNode):
         phone: Phone number
         address: Physical address
         country: Country of operation
+        supply_count: Number of products supplied (SUPPLIES relationships)
         created_at: Timestamp of creation
         updated_at: Timestamp of last update
     """
+    search_fields = ('name', 'contact_person', 'country')
+    counters = {'supply_count': 'size([(n)-[:SUPPLIES]->(:Product) | 1])'}
+    sort_orders = {
+        'name': ('name', False, 'Name'),
+        'supply_count': ('supply_count', True, 'Products supplied'),
+    }
+    list_filters = {
+        'active': ('n.supply_count > 0', 'Supplying'),
+        'idle': ('n.supply_count = 0', 'No products'),
+    }
+
     uid = UniqueIdProperty()
     name = StringProperty(unique_index=True, required=True)
     contact_person = StringProperty()
@@ -54,8 +379,21 @@ class Supplier(StructuredNode):
     phone = StringProperty()
     address = StringProperty()
     country = StringProperty()
+    supply_count = IntegerProperty(default=0, index=True)
     created_at = DateTimeProperty(default=datetime.now)
-    updated_at = DateTimeProperty(default=datetime.now)
+    updated_at = DateTimeProperty(default=datetime.now, index=True)
+    counts_updated_at = DateTimeProperty(index=True)
+    
+    # Blast radius if this supplier fails, precomputed by suppliers.risk.
+    # The sole_* figures only count products with no other supplier.
+    risk_products = IntegerProperty(default=0)
+    risk_sole_products = IntegerProperty(default=0)
+    risk_stores = IntegerProperty(default=0)
+    risk_sole_stores = IntegerProperty(default=0)
+    risk_quantity = IntegerProperty(default=0)
+    risk_sole_quantity = IntegerProperty(default=0)
+    risk_refreshed_at = DateTimeProperty()
+    risk_dirty = BooleanProperty(default=False, index=True)
     
     # Relationships
     supplies = RelationshipTo('Product', 'SUPPLIES', model=SuppliesRel)
@@ -63,6 +401,35 @@ class Supplier(StructuredNode):
     def __str__(self):
         return self.name
     
+    def pre_delete(self):
+        # Products left with one supplier become single-source
+        _before_detach(self, """
+        MATCH (:Supplier {uid: $uid})-[:SUPPLIES]->(product:Product)
+        SET product._lock = true
+        SET product.supplier_count = coalesce(product.supplier_count, 0) - 1,
+            product.counts_updated_at = $now,
+            product.risk_dirty = true
+        REMOVE product._lock
+        """)
+    
+    @classmethod
+    def detail_related(cls):
+        return '(n:Supplier {uid: $uid})-[rel:SUPPLIES]->(other:Product)', Product, SuppliesRel
+
+    @classmethod
+    def detail_rows(cls, related):
+        return [{
+            'product': product,
+            'rel': rel,
+            'unit_price': rel.unit_price,
+            'lead_time_days': rel.lead_time_days,
+            'since': rel.since
+        } for product, rel in related]
+
+    def supply_terms(self):
+        """Products supplied by this supplier with their SUPPLIES properties (single query)."""
+        return self._fetch_related()
+    
     class Meta:
         app_label = 'suppliers'
 
@@ -75,9 +442,11 @@ class AvailableAtRel(StructuredRel):
     quantity = IntegerProperty(default=0)
     aisle = StringProperty()
     last_updated = DateTimeProperty(default=datetime.now)
+    # Maintained by every stock write, see LOW_STOCK_EXPRESSION
+    low_stock = BooleanProperty(default=False)
 
 
-class Product(StructuredNode):
+class Product(SupplyChainNode):
     """
     Product node in Neo4j.
     
@@ -88,17 +457,39 @@ class Product(StructuredNode):
         description: Product description
         category: Product category
         unit_of_measure: Unit of measurement (kg, pieces, liters, etc.)
+        reorder_level: Stock level below which the product is low at any store
+        supplier_count: Number of suppliers (SUPPLIES relationships)
         created_at: Timestamp of creation
         updated_at: Timestamp of last update
     """
+    ordering_key = 'sku'
+    typeahead_fields = ('name', 'sku')
+    search_fields = ('name', 'description', 'sku', 'category')
+    counters = {'supplier_count': 'size([(:Supplier)-[:SUPPLIES]->(n) | 1])'}
+    sort_orders = {
+        'sku': ('sku', False, 'SKU'),
+        'supplier_count': ('supplier_count', True, 'Suppliers'),
+    }
+    list_filters = {
+        'unsourced': ('n.supplier_count = 0', 'No supplier'),
+        'single_source': ('n.supplier_count = 1', 'Single-source'),
+        'multi_source': ('n.supplier_count > 1', 'Several suppliers'),
+    }
+
     uid = UniqueIdProperty()
-    name = StringProperty(required=True)
+    name = StringProperty(required=True, index=True)
     sku = StringProperty(unique_index=True, required=True)
     description = StringProperty()
     category = StringProperty()
     unit_of_measure = StringProperty(default='pieces')
+    reorder_level = IntegerProperty()
+    supplier_count = IntegerProperty(default=0, index=True)
     created_at = DateTimeProperty(default=datetime.now)
-    updated_at = DateTimeProperty(default=datetime.now)
+    updated_at = DateTimeProperty(default=datetime.now, index=True)
+    counts_updated_at = DateTimeProperty(index=True)
+    
+    # Set whenever SUPPLIES or AVAILABLE_AT edges of the product change, see suppliers.risk
+    risk_dirty = BooleanProperty(default=False, index=True)
     
     # Relationships
     supplied_by = RelationshipFrom('Supplier', 'SUPPLIES', model=SuppliesRel)
@@ -107,11 +498,56 @@ class Product(StructuredNode):
     def __str__(self):
         return f"{self.name} ({self.sku})"
     
+    def pre_delete(self):
+        _before_detach(self, """
+        MATCH (product:Product {uid: $uid})
+        CALL {
+            WITH product
+            MATCH (supplier:Supplier)-[:SUPPLIES]->(product)
+            SET supplier._lock = true
+            SET supplier.supply_count = coalesce(supplier.supply_count, 0) - 1,
+                supplier.counts_updated_at = $now,
+                supplier.risk_dirty = true
+            REMOVE supplier._lock
+        }
+        CALL {
+            WITH product
+            MATCH (product)-[stock:AVAILABLE_AT]->(store:Store)
+            SET store._lock = true
+            SET store.sku_count = coalesce(store.sku_count, 0) - 1,
+                store.total_quantity = coalesce(store.total_quantity, 0) - coalesce(stock.quantity, 0),
+                store.counts_updated_at = $now
+            REMOVE store._lock
+        }
+        """)
+    
+    def refresh_low_stock(self):
+        """Recompute low stock flags at every store after reorder_level changes."""
+        _refresh_low_stock('product', self.uid)
+    
+    @classmethod
+    def detail_related(cls):
+        return '(n:Product {uid: $uid})<-[rel:SUPPLIES]-(other:Supplier)', Supplier, SuppliesRel
+
+    @classmethod
+    def detail_rows(cls, related):
+        return [{
+            'supplier': supplier,
+            'rel': rel,
+            'unit_price': rel.unit_price,
+            'lead_time_days': rel.lead_time_days,
+            'since': rel.since
+        } for supplier, rel in related]
+
+    def supplier_terms(self):
+        """Suppliers of this product with their SUPPLIES properties (single query)."""
+        return self._fetch_related()
+    
     class Meta:
         app_label = 'suppliers'
 
 
-class Store(StructuredNode):
+class Store(SupplyChainNode):
     """
     Store node in Neo4j.
     
@@ -120,15 +556,40 @@ class Store(StructuredNode):
         name: Store name
         location: Store address/location
         store_type: Type of store (Retail, Warehouse, Distribution Center, etc.)
+        low_stock_threshold: Default low stock level for products at this store
+        sku_count: Number of products stocked (AVAILABLE_AT relationships)
+        total_quantity: Units in stock over all products
         created_at: Timestamp of creation
         updated_at: Timestamp of last update
     """
+    search_fields = ('name', 'location')
+    counters = {
+        'sku_count': 'size([(:Product)-[:AVAILABLE_AT]->(n) | 1])',
+        'total_quantity': (
+            'reduce(total = 0, quantity IN [(:Product)-[stock:AVAILABLE_AT]->(n) | '
+            'coalesce(stock.quantity, 0)] | total + quantity)'
+        ),
+    }
+    sort_orders = {
+        'name': ('name', False, 'Name'),
+        'sku_count': ('sku_count', True, 'Products stocked'),
+        'total_quantity': ('total_quantity', True, 'Units in stock'),
+    }
+    list_filters = {
+        'stocked': ('n.sku_count > 0', 'Stocked'),
+        'empty': ('n.sku_count = 0', 'Empty'),
+    }
+
     uid = UniqueIdProperty()
     name = StringProperty(unique_index=True, required=True)
     location = StringProperty()
     store_type = StringProperty(default='Retail')
+    low_stock_threshold = IntegerProperty()
+    sku_count = IntegerProperty(default=0, index=True)
+    total_quantity = IntegerProperty(default=0, index=True)
     created_at = DateTimeProperty(default=datetime.now)
-    updated_at = DateTimeProperty(default=datetime.now)
+    updated_at = DateTimeProperty(default=datetime.now, index=True)
+    counts_updated_at = DateTimeProperty(index=True)
     
     # Relationships
     has_products = RelationshipFrom('Product', 'AVAILABLE_AT', model=AvailableAtRel)
@@ -136,5 +597,319 @@ class Store(StructuredNode):
     def __str__(self):
         return f"{self.name} ({self.location})"
     
+    def typeahead_label(self):
+        return f"{self.name} - {self.location}" if self.location else self.name
+    
+    def pre_delete(self):
+        _before_detach(self, """
+        MATCH (product:Product)-[:AVAILABLE_AT]->(:Store {uid: $uid})
+        SET product.risk_dirty = true
+        """)
+    
+    def refresh_low_stock(self):
+        """Recompute low stock flags of every product here after low_stock_threshold changes."""
+        _refresh_low_stock('store', self.uid)
+    
+    @classmethod
+    def detail_related(cls):
+        return '(n:Store {uid: $uid})<-[rel:AVAILABLE_AT]-(other:Product)', Product, AvailableAtRel
+
+    @classmethod
+    def detail_rows(cls, related):
+        return [{
+            'product': product,
+            'rel': rel,
+            'quantity': rel.quantity,
+            'aisle': rel.aisle,
+            'last_updated': rel.last_updated,
+            'low_stock': rel.low_stock
+        } for product, rel in related]
+
+    def stocked_products(self):
+        """Products available at this store with their AVAILABLE_AT properties (single query)."""
+        return self._fetch_related()
+    
+    class Meta:
+        app_label = 'suppliers'
+
+
+class PriceHistoryChunk(StructuredNode):
+    """
+    Price and lead time observations of one supplier/product pair over one
+    period (see suppliers.price_history).
+
+    Observations are kept in parallel arrays rather than one node per change,
+    so the history costs one node per pair and period. Chunks are found by
+    (supplier_uid, product_uid, start) instead of being attached to the
+    supplier and product, which keeps their relationship counts unchanged.
+
+    Properties:
+        key: "<supplier_uid>:<product_uid>:<start>", merged on by writes
+        supplier_uid: uid of the supplier
+        product_uid: uid of the product
+        start: Start of the period (epoch seconds)
+        times: Observation times (epoch seconds), ascending
+        unit_prices: Unit price at each time (NaN when unknown)
+        lead_times: Lead time in days at each time (NaN when unknown)
+        resolution: Seconds per observation after downsampling (0 = raw)
+    """
+    key = StringProperty(unique_index=True, required=True)
+    supplier_uid = StringProperty(required=True, index=True)
+    product_uid = StringProperty(required=True, index=True)
+    start = FloatProperty(required=True)
+    times = ArrayProperty(FloatProperty(), default=list)
+    unit_prices = ArrayProperty(FloatProperty(), default=list)
+    lead_times = ArrayProperty(FloatProperty(), default=list)
+    resolution = IntegerProperty(default=0)
+    
     class Meta:
         app_label = 'suppliers'
+
+
+class StockLedgerChunk(StructuredNode):
+    """
+    Append-only stock movements of one product/store pair over one period
+    (see suppliers.stock_ledger).
+
+    Like PriceHistoryChunk, entries are parallel arrays on one node per pair
+    and period, found by uid rather than attached to the product and store.
+
+    Properties:
+        key: "<product_uid>:<store_uid>:<start>", merged on by writes
+        product_uid: uid of the product
+        store_uid: uid of the store
+        start: Start of the period (epoch seconds)
+        times: Movement times (epoch seconds), ascending
+        movements: Kind of each movement: set, receive, sell or adjust
+        deltas: Quantity change of each movement
+        quantities: Quantity after each movement
+    """
+    key = StringProperty(unique_index=True, required=True)
+    product_uid = StringProperty(required=True, index=True)
+    store_uid = StringProperty(required=True)
+    start = FloatProperty(required=True)
+    times = ArrayProperty(FloatProperty(), default=list)
+    movements = ArrayProperty(StringProperty(), default=list)
+    deltas = ArrayProperty(IntegerProperty(), default=list)
+    quantities = ArrayProperty(IntegerProperty(), default=list)
+    
+    class Meta:
+        app_label = 'suppliers'
+
+
+class StockSnapshot(StructuredNode):
+    """
+    Stock levels of every product at one store at one point in time, so that
+    past inventory is one snapshot plus the ledger entries after it.
+
+    Properties:
+        key: "<store_uid>:<taken_at>"
+        store_uid: uid of the store
+        taken_at: Time of the snapshot (epoch seconds)
+        product_uids: Products stocked at that time
+        quantities: Their quantities, in the same order
+    """
+    key = StringProperty(unique_index=True, required=True)
+    store_uid = StringProperty(required=True)
+    taken_at = FloatProperty(required=True)
+    product_uids = ArrayProperty(StringProperty(), default=list)
+    quantities = ArrayProperty(IntegerProperty(), default=list)
+    
+    class Meta:
+        app_label = 'suppliers'
+
+
+class ReportRow(StructuredNode):
+    """
+    One precomputed row of a report (see suppliers.reports).
+
+    Rows are replaced a group at a time: every row of a report belongs to one
+    group (a store uid, a country or a category) and a refresh of the group
+    deletes and recreates all of them. The figures of a row are set as
+    additional properties by the report's query and read as a map.
+
+    Properties:
+        key: "<report>:<group>:<sub-group>"
+        report: Name of the report
+        group: Unit of recomputation
+        sort_key: Order of the row within the report
+        refreshed_at: When the row was computed (epoch seconds)
+    """
+    key = StringProperty(unique_index=True, required=True)
+    report = StringProperty(required=True)
+    group = StringProperty(required=True)
+    sort_key = StringProperty(required=True)
+    refreshed_at = FloatProperty(required=True)
+    
+    class Meta:
+        app_label = 'suppliers'
+
+
+class ReportState(StructuredNode):
+    """
+    Refresh state of one report.
+
+    Properties:
+        report: Name of the report
+        watermark: Start of the last refresh (epoch seconds); the next one
+            recomputes the groups changed since
+        refreshed_at: End of the last refresh
+        full_refreshed_at: End of the last full refresh
+        groups: Groups recomputed by the last refresh
+    """
+    report = StringProperty(unique_index=True, required=True)
+    watermark = FloatProperty()
+    refreshed_at = FloatProperty()
+    full_refreshed_at = FloatProperty()
+    groups = IntegerProperty(default=0)
+    
+    class Meta:
+        app_label = 'suppliers'
+
+
+def fetch_by_uid(*lookups):
+    """
+    Fetch several nodes, possibly of different labels, by uid in one round trip.
+
+    Args:
+        lookups: (model_class, uid) pairs
+
+    Returns:
+        List of inflated nodes in the same order, with None for missing uids.
+    """
+    matches = []
+    params = {}
+    for i, (model, uid) in enumerate(lookups):
+        matches.append(f"OPTIONAL MATCH (n{i}:{model.__label__} {{uid: $uid{i}}})")
+        params[f'uid{i}'] = uid
+    columns = ', '.join(f'n{i}' for i in range(len(lookups)))
+    query = '\n'.join(matches) + f'\nRETURN {columns}'
+    results, _ = db.cypher_query(query, params)
+    row = results[0] if results else [None] * len(lookups)
+    return [
+        model.inflate(node) if node is not None else None
+        for (model, _), node in zip(lookups, row)
+    ]
+
+
+def _low_stock_feed_query(after):
+    """Cypher for one page of flagged low stock edges ordered by (quantity, product, store)."""
+    where = 'WHERE rel.low_stock = true'
+    if after is not None:
+        where += """
+        AND rel.quantity >= $after_quantity
+        AND (rel.quantity > $after_quantity OR product.uid + ':' + store.uid > $after_tie)"""
+    return f"""
+        MATCH (product:Product)-[rel:AVAILABLE_AT]->(store:Store)
+        {where}
+        WITH product, store, rel
+        ORDER BY rel.quantity ASC, product.uid ASC, store.uid ASC
+        LIMIT $limit
+    """
+
+
+def _low_stock_feed_params(after, limit):
+    params = {
+        'limit': limit + 1,
+        'low_stock_threshold': settings.SUPPLIERS_LOW_STOCK_THRESHOLD,
+    }
+    if after is not None:
+        params['after_quantity'], params['after_tie'] = after
+    return params
+
+
+def low_stock_items(rows, limit):
+    """Inflate feed rows and build the cursor of the following page."""
+    items = []
+    for product, store, quantity, aisle, threshold in rows[:limit]:
+        items.append({
+            'product': Product.inflate(product),
+            'store': Store.inflate(store),
+            'quantity': quantity,
+            'aisle': aisle if aisle else 'N/A',
+            'threshold': threshold
+        })
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last['quantity'], f"{last['product'].uid}:{last['store'].uid}")
+    return items, next_cursor
+
+
+LOW_STOCK_COLUMNS = """
+    [product, store, rel.quantity, rel.aisle,
+     coalesce(product.reorder_level, store.low_stock_threshold, $low_stock_threshold)]
+"""
+
+
+def low_stock_feed(after=None, limit=DASHBOARD_LOW_STOCK_LIMIT):
+    """
+    Return one page of the maintained low stock set.
+
+    Reads only edges flagged ``low_stock`` through the
+    (low_stock, quantity) relationship index, so the cost depends on the
+    number of flagged items rather than on the size of the network.
+
+    Args:
+        after: Cursor string returned as ``next_cursor`` by the previous page
+
+    Returns:
+        (items, next_cursor)
+    """
+    results, _ = db.cypher_query(*low_stock_feed_query(decode_cursor(after), limit))
+    return low_stock_items([row[0] for row in results], limit)
+
+
+def low_stock_feed_query(after, limit):
+    """
+    Return (query, params) for one page of the low stock feed.
+
+    Each result row holds a single list, to be passed to low_stock_items().
+    """
+    return _low_stock_feed_query(after) + f"RETURN {LOW_STOCK_COLUMNS}", _low_stock_feed_params(after, limit)
+
+
+# Dashboard figure -> Cypher returning it (the RETURN expression is aliased by the caller)
+DASHBOARD_COUNTS = {
+    'total_suppliers': "MATCH (n:Supplier) RETURN count(n)",
+    'total_products': "MATCH (n:Product) RETURN count(n)",
+    'total_stores': "MATCH (n:Store) RETURN count(n)",
+    'low_stock_count': "MATCH (:Product)-[rel:AVAILABLE_AT]->(:Store) WHERE rel.low_stock = true RETURN count(rel)",
+}
+
+
+def dashboard_stats(low_stock_after=None, low_stock_limit=DASHBOARD_LOW_STOCK_LIMIT):
+    """
+    Fetch everything the analytics dashboard needs in a single Cypher round trip.
+
+    Label counts are served from Neo4j's count store and the low stock figures
+    come from the maintained low stock flag, so the cost stays flat as the
+    catalog grows. ``low_stock_count`` is the full count; ``low_stock_items``
+    is one page of the feed starting after ``low_stock_after``.
+
+    Returns:
+        dict with total_suppliers, total_products, total_stores,
+        low_stock_count, low_stock_items and low_stock_next_cursor.
+    """
+    after = decode_cursor(low_stock_after)
+    counts = '\n    '.join(f"CALL {{ {query} AS {name} }}" for name, query in DASHBOARD_COUNTS.items())
+    query = f"""
+    {counts}
+    CALL {{
+        {_low_stock_feed_query(after)}
+        RETURN collect({LOW_STOCK_COLUMNS}) AS low_stock
+    }}
+    RETURN total_suppliers, total_products, total_stores, low_stock_count, low_stock
+    """
+    results, _ = db.cypher_query(query, _low_stock_feed_params(after, low_stock_limit))
+    total_suppliers, total_products, total_stores, low_stock_count, low_stock = results[0]
+    items, next_cursor = low_stock_items(low_stock, low_stock_limit)
+
+    return {
+        'total_suppliers': total_suppliers,
+        'total_products': total_products,
+        'total_stores': total_stores,
+        'low_stock_count': low_stock_count,
+        'low_stock_items': items,
+        'low_stock_next_cursor': next_cursor,
+    }
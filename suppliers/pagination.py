@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination for Neo4j node listings.
+
+Pages are addressed by an opaque cursor holding the ordering key and uid of
+the boundary node, so fetching a deep page costs the same index seek as
+fetching the first one (no SKIP over preceding rows).
+"""
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+
+
+# Page sizes offered in the listing templates (capped by SUPPLIERS_MAX_PAGE_SIZE)
+PAGE_SIZE_CHOICES = (10, 25, 50, 100)
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated listing.
+
+    Attributes:
+        items: Inflated nodes on this page (in ascending order)
+        limit: Page size used for the query
+        next_cursor: Cursor for the following page, or None
+        prev_cursor: Cursor for the preceding page, or None
+    """
+
+    def __init__(self, items, limit, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def size_choices(self):
+        return [size for size in PAGE_SIZE_CHOICES if size <= settings.SUPPLIERS_MAX_PAGE_SIZE]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(key, uid):
+    """Encode an ordering key and uid into a URL-safe cursor string."""
+    raw = json.dumps([key, uid], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns a (key, uid) tuple, or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key, uid = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(uid, str):
+        return None
+    return key, uid
+
+
+def get_page_size(request):
+    """Read the requested page size from ?limit=, clamped to the configured maximum."""
+    default = settings.SUPPLIERS_PAGE_SIZE
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, settings.SUPPLIERS_MAX_PAGE_SIZE))
+
+
+def list_options(request, model):
+    """
+    Read the listing order (?sort=) and filter (?filter=) of ``model``.
+
+    Returns (sort, list_filter); unknown values fall back to the default
+    order and to no filter.
+    """
+    sort = request.GET.get('sort')
+    if sort not in model.sort_orders:
+        sort = next(iter(model.sort_orders))
+    list_filter = request.GET.get('filter')
+    if list_filter not in model.list_filters:
+        list_filter = None
+    return sort, list_filter
+
+
+def paginate(request, model):
+    """Fetch the page of ``model`` nodes addressed by the request's cursor, sort and filter parameters."""
+    sort, list_filter = list_options(request, model)
+    return model.page(
+        after=decode_cursor(request.GET.get('after')),
+        before=decode_cursor(request.GET.get('before')),
+        limit=get_page_size(request),
+        sort=sort,
+        list_filter=list_filter
+    )
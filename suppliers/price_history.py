@@ -0,0 +1,242 @@
+"""
+Supplier price history: append-only price and lead time observations per
+supplier/product pair.
+
+Every SUPPLIES write that changes unit_price or lead_time_days appends one
+observation (see RECORD_PRICE_CHANGE, used by bulk.upsert_supplies) to the
+pair's PriceHistoryChunk for the current period of
+SUPPLIERS_PRICE_HISTORY_CHUNK_DAYS. A chunk holds parallel arrays, so the
+history grows by one node per pair and period, not by one node per change.
+
+Reads select the chunks overlapping a window through the chunk indexes and
+unwind only those. compact() keeps the history small over time:
+observations older than SUPPLIERS_PRICE_HISTORY_RAW_DAYS are downsampled to
+the last one per SUPPLIERS_PRICE_HISTORY_BUCKET_HOURS, and chunks older than
+SUPPLIERS_PRICE_HISTORY_RETENTION_DAYS are deleted.
+"""
+
+from datetime import datetime
+
+from django.conf import settings
+from django.utils.dateparse import parse_date, parse_datetime
+from neomodel import db, DateTimeProperty
+
+from . import graph
+from .models import epoch_now
+
+
+DAY = 24 * 60 * 60
+
+# Cypher appending the pair's current terms to its chunk when they changed.
+# Expects ``supplier``, ``product``, ``rel``, ``old_price``, ``old_lead_time``,
+# $now and the parameters of chunk_params() to be bound. Unknown values are
+# stored as NaN, since property arrays cannot hold nulls.
+RECORD_PRICE_CHANGE = """
+    FOREACH (_ IN CASE
+        WHEN coalesce(rel.unit_price, -1.0) <> coalesce(old_price, -1.0)
+          OR coalesce(rel.lead_time_days, -1) <> coalesce(old_lead_time, -1)
+        THEN [1] ELSE [] END |
+        MERGE (chunk:PriceHistoryChunk {key: supplier.uid + ':' + product.uid + ':' + $chunk_key})
+        ON CREATE SET chunk.supplier_uid = supplier.uid,
+            chunk.product_uid = product.uid,
+            chunk.start = $chunk_start,
+            chunk.resolution = 0,
+            chunk.times = [$now],
+            chunk.unit_prices = [coalesce(toFloat(rel.unit_price), $unknown)],
+            chunk.lead_times = [coalesce(toFloat(rel.lead_time_days), $unknown)]
+        ON MATCH SET chunk.times = chunk.times + $now,
+            chunk.unit_prices = chunk.unit_prices + coalesce(toFloat(rel.unit_price), $unknown),
+            chunk.lead_times = chunk.lead_times + coalesce(toFloat(rel.lead_time_days), $unknown)
+    )
+"""
+
+# Observations of the chunks bound to ``chunk`` that fall in [$start, $end),
+# as ``time``, ``unit_price`` and ``lead_time`` with unknown values as null
+WINDOW_OBSERVATIONS = """
+    WHERE chunk.start > $start - $chunk_seconds AND chunk.start < $end
+    WITH chunk ORDER BY chunk.start
+    UNWIND range(0, size(chunk.times) - 1) AS i
+    WITH chunk, chunk.times[i] AS time, chunk.unit_prices[i] AS unit_price, chunk.lead_times[i] AS lead_time
+    WHERE time >= $start AND time < $end
+    WITH chunk, time,
+         CASE WHEN isNaN(unit_price) THEN null ELSE unit_price END AS unit_price,
+         CASE WHEN isNaN(lead_time) THEN null ELSE lead_time END AS lead_time
+"""
+
+
+def chunk_seconds():
+    return settings.SUPPLIERS_PRICE_HISTORY_CHUNK_DAYS * DAY
+
+
+def chunk_params(now):
+    """Parameters of RECORD_PRICE_CHANGE for writes at epoch time ``now``."""
+    start = int(now - now % chunk_seconds())
+    return {'chunk_start': float(start), 'chunk_key': str(start), 'unknown': float('nan')}
+
+
+def parse_time(value):
+    """
+    Parse an ISO 8601 date or datetime into the stored epoch encoding.
+
+    Raises:
+        ValueError: if ``value`` is neither.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'{value!r} is not an ISO 8601 date or datetime')
+        moment = datetime(date.year, date.month, date.day)
+    return DateTimeProperty().deflate(moment)
+
+
+def default_window(start=None, end=None):
+    """Fill in a missing window bound: ``end`` defaults to now, ``start`` to 90 days before ``end``."""
+    end = end if end is not None else epoch_now()
+    start = start if start is not None else end - 90 * DAY
+    return start, end
+
+
+def observations(supplier_uid, product_uid, start=None, end=None):
+    """
+    Return the observations of one pair in [start, end), oldest first.
+
+    Returns:
+        List of dicts with ``time`` (epoch seconds), ``unit_price`` and
+        ``lead_time_days`` (None when unknown).
+    """
+    start, end = default_window(start, end)
+    results, _ = db.cypher_query(f"""
+    MATCH (chunk:PriceHistoryChunk {{supplier_uid: $supplier_uid, product_uid: $product_uid}})
+    {WINDOW_OBSERVATIONS}
+    RETURN time, unit_price, lead_time
+    ORDER BY time
+    """, {
+        'supplier_uid': supplier_uid,
+        'product_uid': product_uid,
+        'start': start,
+        'end': end,
+        'chunk_seconds': chunk_seconds(),
+    })
+    return [{
+        'time': time,
+        'unit_price': unit_price,
+        'lead_time_days': int(lead_time) if lead_time is not None else None,
+    } for time, unit_price, lead_time in results]
+
+
+def price_summary(product_uid, start=None, end=None, supplier_uid=None):
+    """
+    Aggregate the price history of a product per supplier over [start, end).
+
+    Args:
+        product_uid: Product whose offers are summarised
+        start, end: Window bounds in epoch seconds (see default_window)
+        supplier_uid: Only summarise this supplier
+
+    Returns:
+        List of dicts, one per supplier with observations in the window,
+        ordered by last unit price: ``supplier_uid``, ``supplier`` (name, or
+        None once deleted), ``observations``, ``min_price``, ``avg_price``,
+        ``max_price``, ``last_price``, ``min_lead_time``, ``avg_lead_time``,
+        ``last_lead_time`` and ``last_observed``. Averages are over
+        observations, not weighted by how long each value held. None if the
+        product does not exist.
+    """
+    start, end = default_window(start, end)
+    results, _ = db.cypher_query(f"""
+    MATCH (:Product {{uid: $product_uid}})
+    CALL {{
+        MATCH (chunk:PriceHistoryChunk {{product_uid: $product_uid}})
+        WHERE $supplier_uid IS NULL OR chunk.supplier_uid = $supplier_uid
+        WITH chunk
+        {WINDOW_OBSERVATIONS}
+        WITH chunk.supplier_uid AS supplier_uid, time, unit_price, lead_time
+        ORDER BY time
+        WITH supplier_uid,
+             count(*) AS observations,
+             min(unit_price) AS min_price, avg(unit_price) AS avg_price, max(unit_price) AS max_price,
+             collect(unit_price) AS prices,
+             min(lead_time) AS min_lead_time, avg(lead_time) AS avg_lead_time,
+             collect(lead_time) AS lead_times,
+             max(time) AS last_observed
+        OPTIONAL MATCH (supplier:Supplier {{uid: supplier_uid}})
+        WITH supplier_uid, supplier.name AS supplier, observations,
+             min_price, avg_price, max_price, prices[-1] AS last_price,
+             min_lead_time, avg_lead_time, lead_times[-1] AS last_lead_time, last_observed
+        ORDER BY last_price, supplier
+        RETURN collect([
+            supplier_uid, supplier, observations,
+            min_price, avg_price, max_price, last_price,
+            min_lead_time, avg_lead_time, last_lead_time, last_observed
+        ]) AS summaries
+    }}
+    RETURN summaries
+    """, {
+        'product_uid': product_uid,
+        'supplier_uid': supplier_uid,
+        'start': start,
+        'end': end,
+        'chunk_seconds': chunk_seconds(),
+    })
+    columns = (
+        'supplier_uid', 'supplier', 'observations',
+        'min_price', 'avg_price', 'max_price', 'last_price',
+        'min_lead_time', 'avg_lead_time', 'last_lead_time', 'last_observed',
+    )
+    if not results:
+        return None
+    summaries = [dict(zip(columns, row)) for row in results[0][0]]
+    for summary in summaries:
+        for column in ('min_lead_time', 'last_lead_time'):
+            if summary[column] is not None:
+                summary[column] = int(summary[column])
+    return summaries
+
+
+def compact(batch_size=None):
+    """
+    Downsample old observations and delete chunks past retention.
+
+    Chunks that ended more than SUPPLIERS_PRICE_HISTORY_RAW_DAYS ago keep only
+    the last observation of each SUPPLIERS_PRICE_HISTORY_BUCKET_HOURS bucket;
+    chunks that ended more than SUPPLIERS_PRICE_HISTORY_RETENTION_DAYS ago
+    are deleted. Both run in batches of ``batch_size`` chunks (default
+    SUPPLIERS_BULK_BATCH_SIZE).
+
+    Returns:
+        (chunks downsampled, chunks deleted)
+    """
+    batch_size = batch_size or settings.SUPPLIERS_BULK_BATCH_SIZE
+    now = epoch_now()
+    bucket = settings.SUPPLIERS_PRICE_HISTORY_BUCKET_HOURS * 60 * 60
+    downsample = """
+    MATCH (chunk:PriceHistoryChunk)
+    WHERE chunk.start < $raw_before AND chunk.resolution < $bucket
+    CALL {
+        WITH chunk
+        WITH chunk, [i IN range(0, size(chunk.times) - 1)
+                     WHERE i = size(chunk.times) - 1
+                        OR toInteger(chunk.times[i] / $bucket) <> toInteger(chunk.times[i + 1] / $bucket)] AS kept
+        SET chunk.times = [i IN kept | chunk.times[i]],
+            chunk.unit_prices = [i IN kept | chunk.unit_prices[i]],
+            chunk.lead_times = [i IN kept | chunk.lead_times[i]],
+            chunk.resolution = $bucket
+    } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    expire = """
+    MATCH (chunk:PriceHistoryChunk)
+    WHERE chunk.start < $retain_after
+    CALL { WITH chunk DELETE chunk } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    # A chunk is only touched once its whole period is past the limit
+    span = chunk_seconds()
+    raw_before = now - settings.SUPPLIERS_PRICE_HISTORY_RAW_DAYS * DAY - span
+    retain_after = now - settings.SUPPLIERS_PRICE_HISTORY_RETENTION_DAYS * DAY - span
+    deleted = graph.run_in_transactions(expire, {
+        'retain_after': retain_after, 'batch_size': batch_size
+    }).nodes_deleted
+    downsampled = graph.run_in_transactions(downsample, {
+        'raw_before': raw_before, 'bucket': bucket, 'batch_size': batch_size
+    }).properties_set // 4
+    return downsampled, deleted
@@ -0,0 +1,345 @@
+"""
+Precomputed reports: aggregates that would need full traversals on request.
+
+Each report is stored as ReportRow nodes and refreshed in the background by
+refresh() (the refresh_reports command, scheduled by run_scheduler). Views
+only read the stored rows.
+
+Rows are recomputed a group at a time (a store, a country or a category).
+An incremental refresh asks the report which groups changed since the
+watermark of the previous refresh, using the updated_at, counts_updated_at
+and last_updated timestamps every write already maintains:
+
+    stock_by_category     stores whose own properties, stock levels or
+                          stocked products changed
+    coverage_by_country   countries of suppliers whose properties, offers or
+                          products' supplier counts changed
+    lead_time_by_category categories of products whose properties, offers or
+                          supplier counts changed
+
+Deletes leave no timestamp behind, so each report also recomputes the
+groups whose stored member count no longer matches the graph (an indexed
+count per group). A delete and an insert in the same group between two
+refreshes cancel out; the scheduled full refresh recomputes every group.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from neomodel import db
+
+from . import graph
+from .models import epoch_now
+from .pagination import encode_cursor, decode_cursor
+
+
+# Writes stamp their changes with the web servers' clocks and the commit
+# happens after the stamp, so changes are looked up this many seconds before
+# the watermark. Recomputing a group twice is harmless.
+WATERMARK_OVERLAP = 60
+
+
+class Report(namedtuple('Report', [
+        'title', 'description', 'columns', 'group_url', 'changed', 'all_groups', 'rows'])):
+    """
+    Definition of one report.
+
+    Fields:
+        title, description: Shown by the report views
+        columns: (row property, heading) pairs in display order
+        group_url: URL name of the group's detail page (given the group), or None
+        changed: Cypher returning ``group`` for every group changed since $since
+        all_groups: Cypher returning ``group`` for every group
+        rows: Cypher computing the rows of the bound ``group``: ``sub`` (unique
+            within the group), ``sort_key`` and ``figures`` (a map of the
+            row properties)
+    """
+    __slots__ = ()
+
+
+REPORTS = {
+    'stock_by_category': Report(
+        title='Stock by Category and Store',
+        description='Products stocked, units on hand and low stock items per category at each store.',
+        columns=(
+            ('store', 'Store'), ('category', 'Category'),
+            ('skus', 'Products'), ('quantity', 'Units in Stock'), ('low_stock', 'Low Stock'),
+        ),
+        group_url='store_detail',
+        changed="""
+        MATCH (store:Store) WHERE store.updated_at > $since RETURN store.uid AS group
+        UNION
+        MATCH (store:Store) WHERE store.counts_updated_at > $since RETURN store.uid AS group
+        UNION
+        MATCH (product:Product)-[:AVAILABLE_AT]->(store:Store)
+        WHERE product.updated_at > $since
+        RETURN store.uid AS group
+        UNION
+        MATCH (row:ReportRow {report: $report})
+        WHERE NOT EXISTS { MATCH (:Store {uid: row.group}) }
+        RETURN row.group AS group
+        """,
+        all_groups='MATCH (store:Store) RETURN store.uid AS group',
+        rows="""
+        MATCH (store:Store {uid: group})<-[stock:AVAILABLE_AT]-(product:Product)
+        WITH store, coalesce(product.category, '') AS category, stock
+        WITH store, category,
+             count(stock) AS skus,
+             sum(stock.quantity) AS quantity,
+             count(CASE WHEN stock.low_stock THEN 1 END) AS low_stock
+        RETURN category AS sub,
+               store.name + ' / ' + category AS sort_key,
+               {
+                   store: store.name,
+                   category: CASE WHEN category = '' THEN null ELSE category END,
+                   skus: skus,
+                   quantity: quantity,
+                   low_stock: low_stock
+               } AS figures
+        """,
+    ),
+    'coverage_by_country': Report(
+        title='Supplier Coverage by Country',
+        description=(
+            'Suppliers, products supplied and offers per supplier country; sole products have '
+            'no supplier outside the country.'
+        ),
+        columns=(
+            ('country', 'Country'), ('suppliers', 'Suppliers'), ('active_suppliers', 'Supplying'),
+            ('products', 'Products'), ('sole_products', 'Sole Products'), ('offers', 'Offers'),
+            ('avg_lead_time', 'Avg Lead Time (days)'), ('avg_unit_price', 'Avg Unit Price'),
+        ),
+        group_url=None,
+        changed="""
+        MATCH (supplier:Supplier) WHERE supplier.updated_at > $since RETURN supplier.country AS group
+        UNION
+        MATCH (supplier:Supplier) WHERE supplier.counts_updated_at > $since RETURN supplier.country AS group
+        UNION
+        MATCH (supplier:Supplier)-[rel:SUPPLIES]->(:Product)
+        WHERE rel.last_updated > $since
+        RETURN supplier.country AS group
+        UNION
+        MATCH (supplier:Supplier)-[:SUPPLIES]->(product:Product)
+        WHERE product.counts_updated_at > $since
+        RETURN supplier.country AS group
+        UNION
+        MATCH (row:ReportRow {report: $report})
+        WHERE row.suppliers <> COUNT { MATCH (:Supplier {country: row.group}) }
+        RETURN row.group AS group
+        """,
+        all_groups='MATCH (supplier:Supplier) RETURN DISTINCT supplier.country AS group',
+        rows="""
+        MATCH (supplier:Supplier {country: group})
+        OPTIONAL MATCH (supplier)-[rel:SUPPLIES]->(product:Product)
+        WITH group,
+             count(DISTINCT supplier) AS suppliers,
+             count(DISTINCT CASE WHEN rel IS NOT NULL THEN supplier END) AS active_suppliers,
+             count(rel) AS offers,
+             avg(rel.lead_time_days) AS avg_lead_time,
+             avg(rel.unit_price) AS avg_unit_price,
+             collect(DISTINCT product) AS supplied
+        WHERE suppliers > 0
+        RETURN '' AS sub, group AS sort_key, {
+            country: group,
+            suppliers: suppliers,
+            active_suppliers: active_suppliers,
+            products: size(supplied),
+            sole_products: size([product IN supplied WHERE NOT EXISTS {
+                MATCH (other:Supplier)-[:SUPPLIES]->(product)
+                WHERE other.country IS NULL OR other.country <> group
+            }]),
+            offers: offers,
+            avg_lead_time: avg_lead_time,
+            avg_unit_price: avg_unit_price
+        } AS figures
+        """,
+    ),
+    'lead_time_by_category': Report(
+        title='Lead Time by Category',
+        description='Lead times and unit prices of the supplier offers for each product category.',
+        columns=(
+            ('category', 'Category'), ('products', 'Products'), ('sourced_products', 'Sourced'),
+            ('offers', 'Offers'), ('min_lead_time', 'Min Lead Time'), ('avg_lead_time', 'Avg Lead Time'),
+            ('max_lead_time', 'Max Lead Time'), ('avg_unit_price', 'Avg Unit Price'),
+        ),
+        group_url=None,
+        changed="""
+        MATCH (product:Product) WHERE product.updated_at > $since RETURN product.category AS group
+        UNION
+        MATCH (product:Product) WHERE product.counts_updated_at > $since RETURN product.category AS group
+        UNION
+        MATCH (:Supplier)-[rel:SUPPLIES]->(product:Product)
+        WHERE rel.last_updated > $since
+        RETURN product.category AS group
+        UNION
+        MATCH (row:ReportRow {report: $report})
+        WHERE row.products <> COUNT { MATCH (:Product {category: row.group}) }
+        RETURN row.group AS group
+        """,
+        all_groups='MATCH (product:Product) RETURN DISTINCT product.category AS group',
+        rows="""
+        MATCH (product:Product {category: group})
+        OPTIONAL MATCH (:Supplier)-[rel:SUPPLIES]->(product)
+        WITH group,
+             count(DISTINCT product) AS products,
+             count(DISTINCT CASE WHEN rel IS NOT NULL THEN product END) AS sourced_products,
+             count(rel) AS offers,
+             min(rel.lead_time_days) AS min_lead_time,
+             avg(rel.lead_time_days) AS avg_lead_time,
+             max(rel.lead_time_days) AS max_lead_time,
+             avg(rel.unit_price) AS avg_unit_price
+        WHERE products > 0
+        RETURN '' AS sub, group AS sort_key, {
+            category: group,
+            products: products,
+            sourced_products: sourced_products,
+            offers: offers,
+            min_lead_time: min_lead_time,
+            avg_lead_time: avg_lead_time,
+            max_lead_time: max_lead_time,
+            avg_unit_price: avg_unit_price
+        } AS figures
+        """,
+    ),
+}
+
+
+class ReportError(ValueError):
+    """Raised for an unknown report name."""
+
+
+def get_report(name):
+    try:
+        return REPORTS[name]
+    except KeyError:
+        raise ReportError(f"Unknown report {name!r}; choose from {', '.join(REPORTS)}")
+
+
+def _groups(query, params):
+    # Products without a category and suppliers without a country are not grouped
+    results, _ = db.cypher_query(f'CALL {{ {query} }} WITH group WHERE group IS NOT NULL RETURN DISTINCT group', params)
+    return [row[0] for row in results]
+
+
+def _recompute(name, report, groups, now):
+    """Replace the rows of ``groups``; return the number of rows written."""
+    results, _ = db.cypher_query(f"""
+    UNWIND $groups AS group
+    CALL {{ WITH group MATCH (row:ReportRow {{report: $report, group: group}}) DELETE row }}
+    CALL {{
+        WITH group
+        {report.rows}
+    }}
+    CREATE (row:ReportRow {{
+        key: $report + ':' + group + ':' + sub,
+        report: $report,
+        group: group,
+        sort_key: sort_key,
+        refreshed_at: $now
+    }})
+    SET row += figures
+    RETURN count(row)
+    """, {'report': name, 'groups': groups, 'now': now})
+    return results[0][0]
+
+
+def refresh(name, full=False, batch_size=None):
+    """
+    Recompute the rows of report ``name`` changed since its last refresh.
+
+    The first refresh of a report, and every refresh with ``full``,
+    recomputes every group and then deletes the rows of groups that no
+    longer exist. Groups are recomputed ``batch_size`` per statement
+    (default SUPPLIERS_REPORT_BATCH_SIZE), so readers see each batch as
+    soon as it commits and never an empty report.
+
+    Returns:
+        (groups recomputed, rows written)
+
+    Raises:
+        ReportError: if ``name`` is not a report.
+    """
+    report = get_report(name)
+    batch_size = batch_size or settings.SUPPLIERS_REPORT_BATCH_SIZE
+    started = epoch_now()
+    results, _ = db.cypher_query(
+        'MATCH (state:ReportState {report: $report}) RETURN state.watermark', {'report': name}
+    )
+    watermark = results[0][0] if results else None
+    full = full or watermark is None
+    if full:
+        groups = _groups(report.all_groups, {})
+    else:
+        groups = _groups(report.changed, {'report': name, 'since': watermark - WATERMARK_OVERLAP})
+
+    rows = 0
+    for start in range(0, len(groups), batch_size):
+        rows += _recompute(name, report, groups[start:start + batch_size], started)
+    if full:
+        query = """
+        MATCH (row:ReportRow {report: $report})
+        WHERE row.refreshed_at < $started
+        CALL { WITH row DELETE row } IN TRANSACTIONS OF $batch_size ROWS
+        """
+        graph.run_in_transactions(query, {'report': name, 'started': started, 'batch_size': batch_size})
+
+    db.cypher_query(f"""
+    MERGE (state:ReportState {{report: $report}})
+    SET state.watermark = $started,
+        state.refreshed_at = $now,
+        state.groups = $groups
+        {', state.full_refreshed_at = $now' if full else ''}
+    """, {'report': name, 'started': started, 'now': epoch_now(), 'groups': len(groups)})
+    return len(groups), rows
+
+
+def report_states():
+    """Return {report name: state dict} for the reports refreshed at least once."""
+    results, _ = db.cypher_query('MATCH (state:ReportState) RETURN state.report, state {.*}')
+    return {name: state for name, state in results if name in REPORTS}
+
+
+def _figure(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def report_page(name, after=None, limit=25, group=None):
+    """
+    Return one page of the stored rows of report ``name``, ordered by sort key.
+
+    Args:
+        after: Cursor returned as ``next_cursor`` by the previous page
+        group: Only return the rows of this group
+
+    Returns:
+        (state, rows, next_cursor): ``state`` is the ReportState as a dict
+        (None before the first refresh); each row is a dict of its
+        properties, with averages rounded to two decimals.
+
+    Raises:
+        ReportError: if ``name`` is not a report.
+    """
+    get_report(name)
+    params = {'report': name, 'group': group, 'limit': limit + 1}
+    where = '($group IS NULL OR row.group = $group)'
+    cursor = decode_cursor(after)
+    if cursor is not None:
+        where += ' AND (row.sort_key > $after_sort OR (row.sort_key = $after_sort AND row.key > $after_key))'
+        params['after_sort'], params['after_key'] = cursor
+    results, _ = db.cypher_query(f"""
+    OPTIONAL MATCH (state:ReportState {{report: $report}})
+    CALL {{
+        MATCH (row:ReportRow {{report: $report}})
+        WHERE {where}
+        WITH row ORDER BY row.sort_key, row.key LIMIT $limit
+        RETURN collect(row {{.*}}) AS rows
+    }}
+    RETURN state {{.*}}, rows
+    """, params)
+    state, rows = results[0]
+    rows = [{key: _figure(value) for key, value in row.items()} for row in rows]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['sort_key'], rows[-1]['key'])
+    return state, rows, next_cursor
@@ -0,0 +1,249 @@
+"""
+Supply risk analytics: single-source products and supplier blast radius.
+
+The network-wide figures are kept on the nodes:
+
+    Product.supplier_count        number of suppliers (1 = single-source),
+                                  maintained by every SUPPLIES write
+    Supplier.risk_*               products, stores and stocked quantity that
+                                  depend on the supplier, in total and for
+                                  products it is the only supplier of
+
+Writes never recompute the blast radius. SUPPLIES and AVAILABLE_AT writes set
+Product.risk_dirty (see MARK_PRODUCT_RISK_DIRTY) and deletes flag the
+products or suppliers they affect. refresh_supply_risk() then flags every
+supplier of the flagged products and recomputes those suppliers in
+set-based statements. Reads never refresh: the refresh_supply_risk command
+runs on the run_scheduler worker (and should be run after large imports),
+and the reports show how many nodes are still flagged.
+"""
+
+from django.conf import settings
+from neomodel import db
+
+from . import graph
+from .models import Supplier, Product, Store, epoch_now
+from .pagination import encode_cursor, decode_cursor
+
+
+# Supplier properties holding its precomputed blast radius
+RISK_FIGURES = (
+    'risk_products', 'risk_sole_products',
+    'risk_stores', 'risk_sole_stores',
+    'risk_quantity', 'risk_sole_quantity',
+)
+
+# Order of the supplier ranking: sort key -> Supplier property
+RANKINGS = {
+    'sole_quantity': 'risk_sole_quantity',
+    'sole_products': 'risk_sole_products',
+    'quantity': 'risk_quantity',
+    'stores': 'risk_stores',
+}
+
+REFRESH_QUERY = """
+CALL {
+    MATCH (product:Product) WHERE product.risk_dirty = true
+    WITH product LIMIT $limit
+    OPTIONAL MATCH (supplier:Supplier)-[:SUPPLIES]->(product)
+    WITH product, collect(supplier) AS suppliers
+    SET product.risk_dirty = false
+    FOREACH (supplier IN suppliers | SET supplier.risk_dirty = true)
+    RETURN count(product) AS products
+}
+CALL {
+    MATCH (supplier:Supplier) WHERE supplier.risk_dirty = true
+    WITH supplier LIMIT $limit
+    CALL {
+        WITH supplier
+        OPTIONAL MATCH (supplier)-[:SUPPLIES]->(product:Product)
+        OPTIONAL MATCH (product)-[stock:AVAILABLE_AT]->(store:Store)
+        WITH product, store, stock, product.supplier_count = 1 AS sole
+        RETURN count(DISTINCT product) AS risk_products,
+               count(DISTINCT CASE WHEN sole THEN product END) AS risk_sole_products,
+               count(DISTINCT store) AS risk_stores,
+               count(DISTINCT CASE WHEN sole THEN store END) AS risk_sole_stores,
+               coalesce(sum(stock.quantity), 0) AS risk_quantity,
+               coalesce(sum(CASE WHEN sole THEN stock.quantity END), 0) AS risk_sole_quantity
+    }
+    SET supplier.risk_products = risk_products,
+        supplier.risk_sole_products = risk_sole_products,
+        supplier.risk_stores = risk_stores,
+        supplier.risk_sole_stores = risk_sole_stores,
+        supplier.risk_quantity = risk_quantity,
+        supplier.risk_sole_quantity = risk_sole_quantity,
+        supplier.risk_refreshed_at = $now,
+        supplier.risk_dirty = false
+    RETURN count(supplier) AS suppliers
+}
+CALL { MATCH (n:Product) WHERE n.risk_dirty = true RETURN count(n) AS pending_products }
+CALL { MATCH (n:Supplier) WHERE n.risk_dirty = true RETURN count(n) AS pending_suppliers }
+RETURN products, suppliers, pending_products + pending_suppliers
+"""
+
+
+def refresh_supply_risk(limit=None):
+    """
+    Recompute the risk figures of flagged products and suppliers.
+
+    Each step handles up to ``limit`` products and ``limit`` suppliers in one
+    statement (default SUPPLIERS_RISK_REFRESH_LIMIT).
+
+    Returns:
+        (products refreshed, suppliers refreshed, nodes still flagged)
+    """
+    limit = limit or settings.SUPPLIERS_RISK_REFRESH_LIMIT
+    results, _ = db.cypher_query(REFRESH_QUERY, {'limit': limit, 'now': epoch_now()})
+    return tuple(results[0])
+
+
+def refresh_pending(batch_size=None):
+    """
+    Run refresh steps until nothing is flagged.
+
+    Returns:
+        (products refreshed, suppliers refreshed)
+    """
+    total_products = total_suppliers = 0
+    pending = True
+    while pending:
+        products, suppliers, pending = refresh_supply_risk(batch_size)
+        total_products += products
+        total_suppliers += suppliers
+    return total_products, total_suppliers
+
+
+def refresh_all(batch_size=None):
+    """
+    Flag every product and recompute the whole network in batches.
+
+    Returns:
+        (products refreshed, suppliers refreshed)
+    """
+    batch_size = batch_size or settings.SUPPLIERS_RISK_REFRESH_LIMIT
+    query = """
+    MATCH (product:Product)
+    CALL { WITH product SET product.risk_dirty = true } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    graph.run_in_transactions(query, {'batch_size': batch_size})
+    return refresh_pending(batch_size)
+
+
+def summary():
+    """
+    Network-wide counts of products, single-source products and products
+    without a supplier, and of products and suppliers flagged for a refresh.
+    """
+    results, _ = db.cypher_query("""
+    CALL { MATCH (n:Product) RETURN count(n) AS products }
+    CALL { MATCH (n:Product) WHERE n.supplier_count = 1 RETURN count(n) AS single_source }
+    CALL { MATCH (n:Product) WHERE n.supplier_count = 0 RETURN count(n) AS unsourced }
+    CALL { MATCH (n:Product) WHERE n.risk_dirty = true RETURN count(n) AS pending_products }
+    CALL { MATCH (n:Supplier) WHERE n.risk_dirty = true RETURN count(n) AS pending_suppliers }
+    RETURN products, single_source, unsourced, pending_products + pending_suppliers
+    """)
+    products, single_source, unsourced, pending = results[0]
+    return {'products': products, 'single_source': single_source, 'unsourced': unsourced, 'pending': pending}
+
+
+def single_source_products(after=None, limit=25):
+    """
+    Return one page of products with exactly one supplier, ordered by SKU.
+
+    Args:
+        after: Cursor returned as ``next_cursor`` by the previous page
+
+    Returns:
+        (items, next_cursor); each item holds ``product``, ``supplier``,
+        ``stores`` (number of stores stocking it) and ``quantity`` (total stock).
+    """
+    params = {'limit': limit + 1}
+    where = 'WHERE product.supplier_count = 1'
+    cursor = decode_cursor(after)
+    if cursor is not None:
+        where += ' AND product.sku > $after'
+        params['after'] = cursor[0]
+    query = f"""
+    MATCH (product:Product)
+    {where}
+    WITH product ORDER BY product.sku LIMIT $limit
+    CALL {{
+        WITH product
+        OPTIONAL MATCH (supplier:Supplier)-[:SUPPLIES]->(product)
+        RETURN supplier LIMIT 1
+    }}
+    CALL {{
+        WITH product
+        OPTIONAL MATCH (product)-[stock:AVAILABLE_AT]->(:Store)
+        RETURN count(stock) AS stores, coalesce(sum(stock.quantity), 0) AS quantity
+    }}
+    RETURN product, supplier, stores, quantity
+    ORDER BY product.sku
+    """
+    results, _ = db.cypher_query(query, params)
+    items = [{
+        'product': Product.inflate(product),
+        'supplier': Supplier.inflate(supplier) if supplier is not None else None,
+        'stores': stores,
+        'quantity': quantity,
+    } for product, supplier, stores, quantity in results[:limit]]
+    next_cursor = None
+    if len(results) > limit:
+        last = items[-1]['product']
+        next_cursor = encode_cursor(last.sku, last.uid)
+    return items, next_cursor
+
+
+def supplier_ranking(order='sole_quantity', limit=25):
+    """Return the ``limit`` suppliers with the largest precomputed blast radius by ``order`` (see RANKINGS)."""
+    key = RANKINGS[order]
+    results, _ = db.cypher_query(f"""
+    MATCH (n:Supplier)
+    WHERE n.{key} > 0
+    RETURN n
+    ORDER BY n.{key} DESC, n.name
+    LIMIT $limit
+    """, {'limit': limit})
+    return [Supplier.inflate(row[0]) for row in results]
+
+
+def blast_radius(uid):
+    """
+    Return the stores affected if the supplier ``uid`` fails, or None if it does not exist.
+
+    Traverses only the supplier's own neighbourhood. Each store row holds the
+    number of the supplier's products it stocks and their quantity, in total
+    and for products without another supplier (which it would lose entirely).
+
+    Returns:
+        dict with ``supplier`` and ``stores`` (ordered by at-risk quantity).
+    """
+    results, _ = db.cypher_query("""
+    MATCH (supplier:Supplier {uid: $uid})
+    OPTIONAL MATCH (supplier)-[:SUPPLIES]->(product:Product)-[stock:AVAILABLE_AT]->(store:Store)
+    WITH supplier, store, product, stock,
+         NOT EXISTS {
+             MATCH (other:Supplier)-[:SUPPLIES]->(product) WHERE other <> supplier
+         } AS sole
+    WITH supplier, store,
+         count(product) AS products,
+         sum(stock.quantity) AS quantity,
+         count(CASE WHEN sole THEN product END) AS sole_products,
+         sum(CASE WHEN sole THEN stock.quantity ELSE 0 END) AS sole_quantity
+    ORDER BY sole_quantity DESC, quantity DESC, store.name
+    RETURN supplier, collect(CASE WHEN store IS NOT NULL THEN
+        [store, products, quantity, sole_products, sole_quantity] END) AS stores
+    """, {'uid': uid})
+    if not results:
+        return None
+    supplier, stores = results[0]
+    return {
+        'supplier': Supplier.inflate(supplier),
+        'stores': [{
+            'store': Store.inflate(store),
+            'products': products,
+            'quantity': quantity,
+            'sole_products': sole_products,
+            'sole_quantity': sole_quantity,
+        } for store, products, quantity, sole_products, sole_quantity in stores],
+    }
@@ -0,0 +1,153 @@
+"""
+Cron-like schedule of the background jobs run by the run_scheduler worker.
+
+Jobs are management commands listed in SUPPLIERS_SCHEDULE as
+(name, cron expression, command, arguments). Expressions have the five
+standard fields, in server local time:
+
+    minute (0-59) hour (0-23) day of month (1-31) month (1-12) day of week (0-7, 0 and 7 = Sunday)
+
+Each field is ``*`` or a comma-separated list of values and ranges
+(``a-b``), optionally stepped (``*/15``, ``0-30/10``). As in cron, when both
+day fields are restricted a day matching either one is due.
+"""
+
+import logging
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.management import call_command
+
+
+logger = logging.getLogger(__name__)
+
+# (name, lowest, highest) of the fields of a cron expression
+FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+)
+
+
+class ScheduleError(ValueError):
+    """Raised for an invalid cron expression or schedule entry."""
+
+
+def _parse_field(text, name, lowest, highest):
+    """Return the set of values matched by one cron field."""
+    values = set()
+    for item in text.split(','):
+        span, _, step = item.partition('/')
+        try:
+            step = int(step) if step else 1
+            if span == '*':
+                start, end = lowest, highest
+            elif '-' in span:
+                start, end = (int(bound) for bound in span.split('-', 1))
+            else:
+                start = end = int(span)
+                if step > 1:
+                    end = highest
+        except ValueError:
+            raise ScheduleError(f'Invalid {name} field {text!r}')
+        if step < 1:
+            raise ScheduleError(f'Invalid step in {name} field {text!r}')
+        if not lowest <= start <= end <= highest:
+            raise ScheduleError(f'{name} field {text!r} is outside {lowest}-{highest}')
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """A parsed cron expression."""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(FIELDS):
+            raise ScheduleError(f'{expression!r} must have {len(FIELDS)} fields')
+        self.expression = expression
+        parsed = {
+            name: _parse_field(text, name, lowest, highest)
+            for text, (name, lowest, highest) in zip(fields, FIELDS)
+        }
+        self.minutes = parsed['minute']
+        self.hours = parsed['hour']
+        self.days = parsed['day']
+        self.months = parsed['month']
+        # cron counts Sunday as 0 or 7
+        self.weekdays = {weekday % 7 for weekday in parsed['weekday']}
+        # As in Vixie cron, a field starting with * (including */n) leaves the
+        # other day field alone instead of matching either one
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        # datetime counts Monday as 0, cron counts Sunday as 0
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def matches(self, moment):
+        """Whether the job is due in the minute of ``moment``."""
+        return (
+            moment.minute in self.minutes
+            and moment.hour in self.hours
+            and moment.month in self.months
+            and self._day_matches(moment)
+        )
+
+    def __str__(self):
+        return self.expression
+
+
+class Job(namedtuple('Job', ['name', 'schedule', 'command', 'args'])):
+    """One scheduled management command."""
+    __slots__ = ()
+
+    def run(self, stdout=None):
+        """
+        Run the command; return True on success.
+
+        Failures are logged rather than raised, so one failing job does not
+        stop the worker.
+        """
+        started = time.monotonic()
+        try:
+            call_command(self.command, *self.args, stdout=stdout)
+        except Exception:
+            logger.exception('Scheduled job %s failed', self.name)
+            return False
+        logger.info('Scheduled job %s finished in %.1f s', self.name, time.monotonic() - started)
+        return True
+
+
+def load_jobs(entries=None):
+    """
+    Parse schedule entries (default SUPPLIERS_SCHEDULE) into Jobs.
+
+    Raises:
+        ScheduleError: if an entry is malformed or a name is used twice.
+    """
+    entries = settings.SUPPLIERS_SCHEDULE if entries is None else entries
+    jobs = []
+    for entry in entries:
+        try:
+            name, expression, command, args = entry
+        except (TypeError, ValueError):
+            raise ScheduleError(f'Schedule entries are (name, cron expression, command, args), not {entry!r}')
+        jobs.append(Job(name, CronSchedule(expression), command, tuple(args)))
+    names = [job.name for job in jobs]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ScheduleError(f"Duplicate job names: {', '.join(sorted(duplicates))}")
+    return jobs
+
+
+def due_jobs(jobs, moment):
+    """Jobs due in the minute of ``moment``, in schedule order."""
+    return [job for job in jobs if job.schedule.matches(moment)]
@@ -0,0 +1,121 @@
+"""
+Ranked full-text search across suppliers, products and stores.
+
+Each label has a Neo4j full-text index over its ``search_fields`` (created
+by ensure_indexes). A search runs one query: the indexes of the requested
+kinds are asked for their best hits only, merged by score and paged with
+SKIP/LIMIT. Lucene returns top hits without touching the rest of the index,
+so latency depends on the page depth, not on the size of the catalog; pages
+beyond MAX_RESULTS are not served.
+"""
+
+import re
+
+from neomodel import db
+
+from .models import Supplier, Product, Store
+
+
+# ?type= value -> model searched
+SEARCH_MODELS = {
+    'products': Product,
+    'suppliers': Supplier,
+    'stores': Store,
+}
+
+# Deepest result reachable by paging
+MAX_RESULTS = 1000
+
+# Words are matched exactly (boosted) or as a prefix; at most this many are used
+MAX_TERMS = 8
+
+
+class SearchPage:
+    """One page of ranked search results: (kind, node, score) tuples."""
+
+    def __init__(self, results, page, limit, has_next):
+        self.results = results
+        self.page = page
+        self.limit = limit
+        self.has_next = has_next
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    @property
+    def next_page(self):
+        return self.page + 1
+
+    @property
+    def previous_page(self):
+        return self.page - 1
+
+    @property
+    def start_index(self):
+        return (self.page - 1) * self.limit + 1
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+
+def lucene_query(text):
+    """
+    Turn user input into a Lucene query, or None if it holds no searchable words.
+
+    Input is split into words the way the standard analyzer tokenizes indexed
+    text (so a SKU like "PROD-001" becomes "prod" and "001"). Every word must
+    match, either exactly (ranked higher) or as a prefix. Lucene syntax in
+    the input is never interpreted.
+    """
+    words = re.findall(r'\w+', text.lower())[:MAX_TERMS]
+    if not words:
+        return None
+    return ' AND '.join(f'({word}^2 OR {word}*)' for word in words)
+
+
+def search(text, kinds=None, page=1, limit=25):
+    """
+    Search the full-text indexes of ``kinds`` (default: all SEARCH_MODELS).
+
+    Args:
+        text: User input
+        kinds: Keys of SEARCH_MODELS to search
+        page: 1-based page number
+        limit: Results per page
+
+    Returns:
+        SearchPage, empty when the input has no words or the page is beyond MAX_RESULTS.
+    """
+    kinds = kinds or list(SEARCH_MODELS)
+    page = max(1, page)
+    skip = (page - 1) * limit
+    query = lucene_query(text)
+    if query is None or skip >= MAX_RESULTS:
+        return SearchPage([], page, limit, has_next=False)
+
+    fetch = min(skip + limit + 1, MAX_RESULTS + 1)
+    branches = '\n        UNION ALL\n'.join(f"""
+        CALL db.index.fulltext.queryNodes('{SEARCH_MODELS[kind].search_index()}', $query, {{limit: $fetch}})
+        YIELD node, score
+        RETURN node, score, '{kind}' AS kind""" for kind in kinds)
+    cypher = f"""
+    CALL {{{branches}
+    }}
+    RETURN kind, node, score
+    ORDER BY score DESC
+    SKIP $skip
+    LIMIT $limit
+    """
+    results, _ = db.cypher_query(cypher, {
+        'query': query,
+        'fetch': fetch,
+        'skip': skip,
+        'limit': min(limit + 1, fetch - skip),
+    })
+    hits = [(kind, SEARCH_MODELS[kind].inflate(node), score) for kind, node, score in results[:limit]]
+    has_next = len(results) > limit and skip + limit < MAX_RESULTS
+    return SearchPage(hits, page, limit, has_next)
@@ -0,0 +1,144 @@
+"""
+Supplier sourcing: the best supplier per product by price, lead time or a weighted score.
+
+best_suppliers() ranks the SUPPLIES offers of many products at once. Each
+batch of SUPPLIERS_SOURCING_BATCH_SIZE products is one aggregated Cypher
+query (UNWIND over the batch, ranking per product in a subquery), so the
+cost grows with the number of products, not with the number of calls.
+
+Strategies:
+    price:     lowest unit_price first, then shortest lead time
+    lead_time: shortest lead_time_days first, then lowest price
+    score:     lowest weighted score, where unit_price and lead_time_days
+               are each scaled to 0..1 between the product's best and
+               worst offer (a missing value counts as the worst)
+"""
+
+from django.conf import settings
+from neomodel import db
+
+
+STRATEGIES = ('price', 'lead_time', 'score')
+
+# Default weights of the score strategy
+DEFAULT_WEIGHTS = {'unit_price': 0.5, 'lead_time_days': 0.5}
+
+# Ranked alternatives returned after the best offer, at most
+MAX_ALTERNATIVES = 10
+
+# ORDER BY of the offers of one product per strategy; offers without the
+# compared property sort last and ties go to the supplier name
+STRATEGY_ORDER = {
+    'price': 'offer.unit_price IS NULL, offer.unit_price, offer.lead_time_days IS NULL, offer.lead_time_days',
+    'lead_time': 'offer.lead_time_days IS NULL, offer.lead_time_days, offer.unit_price IS NULL, offer.unit_price',
+    'score': 'score',
+}
+
+# Products are looked up by one of these properties
+KEY_PROPERTIES = ('sku', 'uid')
+
+
+class SourcingError(ValueError):
+    """Raised for invalid sourcing parameters."""
+
+
+def _scaled(value, low, high):
+    """Cypher expression scaling ``value`` to 0 (best, ``low``) .. 1 (worst, ``high``)."""
+    return (
+        f'CASE WHEN {value} IS NULL THEN 1.0 WHEN {high} = {low} THEN 0.0 '
+        f'ELSE toFloat({value} - {low}) / ({high} - {low}) END'
+    )
+
+
+def _sourcing_query(key_property, strategy):
+    return f"""
+    UNWIND $keys AS key
+    MATCH (product:Product {{{key_property}: key}})
+    OPTIONAL MATCH (supplier:Supplier)-[rel:SUPPLIES]->(product)
+    WHERE $countries IS NULL OR supplier.country IN $countries
+    WITH product,
+         collect(CASE WHEN supplier IS NOT NULL THEN {{
+             supplier: supplier {{.uid, .name, .country}},
+             unit_price: rel.unit_price,
+             lead_time_days: rel.lead_time_days
+         }} END) AS offers,
+         min(rel.unit_price) AS min_price, max(rel.unit_price) AS max_price,
+         min(rel.lead_time_days) AS min_lead, max(rel.lead_time_days) AS max_lead
+    CALL {{
+        WITH offers, min_price, max_price, min_lead, max_lead
+        UNWIND offers AS offer
+        WITH offer,
+             $price_weight * {_scaled('offer.unit_price', 'min_price', 'max_price')}
+             + $lead_time_weight * {_scaled('offer.lead_time_days', 'min_lead', 'max_lead')} AS score
+        ORDER BY {STRATEGY_ORDER[strategy]}, offer.supplier.name
+        LIMIT $ranked
+        RETURN collect(offer {{.*, score: score}}) AS ranked
+    }}
+    RETURN product.{key_property}, product {{.uid, .sku, .name}}, ranked
+    """
+
+
+def _weights(weights):
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    unknown = set(weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise SourcingError(f"Unknown weights: {', '.join(sorted(unknown))}")
+    try:
+        weights = {name: float(value) for name, value in weights.items()}
+    except (TypeError, ValueError):
+        raise SourcingError('Weights must be numbers')
+    if any(value < 0 for value in weights.values()) or not any(weights.values()):
+        raise SourcingError('Weights must be non-negative and not all zero')
+    return weights
+
+
+def best_suppliers(keys, key_property='sku', strategy='price', alternatives=0, countries=None, weights=None):
+    """
+    Rank the suppliers of many products.
+
+    Args:
+        keys: Product SKUs (or uids, see ``key_property``); duplicates are ignored
+        key_property: 'sku' or 'uid'
+        strategy: One of STRATEGIES
+        alternatives: Ranked offers returned after the best one (0..MAX_ALTERNATIVES)
+        countries: Only consider suppliers in these countries (default: all)
+        weights: Overrides of DEFAULT_WEIGHTS for the score strategy
+
+    Returns:
+        (results, not_found): one dict per product found, in input order,
+        with ``product`` ({uid, sku, name}), ``best`` (offer or None) and
+        ``alternatives`` (list of offers); each offer holds ``supplier``
+        ({uid, name, country}), ``unit_price``, ``lead_time_days`` and
+        ``score``. ``not_found`` lists the keys matching no product.
+
+    Raises:
+        SourcingError: if a parameter is invalid.
+    """
+    if key_property not in KEY_PROPERTIES:
+        raise SourcingError(f"Products are looked up by {' or '.join(KEY_PROPERTIES)}")
+    if strategy not in STRATEGIES:
+        raise SourcingError(f"strategy must be one of {', '.join(STRATEGIES)}")
+    if not 0 <= alternatives <= MAX_ALTERNATIVES:
+        raise SourcingError(f'alternatives must be between 0 and {MAX_ALTERNATIVES}')
+    weights = _weights(weights)
+
+    keys = list(dict.fromkeys(str(key) for key in keys if key))
+    query = _sourcing_query(key_property, strategy)
+    params = {
+        'countries': list(countries) if countries else None,
+        'price_weight': weights['unit_price'],
+        'lead_time_weight': weights['lead_time_days'],
+        'ranked': alternatives + 1,
+    }
+
+    found = {}
+    batch_size = settings.SUPPLIERS_SOURCING_BATCH_SIZE
+    for start in range(0, len(keys), batch_size):
+        results, _ = db.cypher_query(query, {**params, 'keys': keys[start:start + batch_size]})
+        for key, product, ranked in results:
+            found[key] = {
+                'product': product,
+                'best': ranked[0] if ranked else None,
+                'alternatives': ranked[1:],
+            }
+    return [found[key] for key in keys if key in found], [key for key in keys if key not in found]
@@ -0,0 +1,225 @@
+"""
+Stock ledger: append-only stock movements per product/store pair, with
+periodic inventory snapshots per store.
+
+Every AVAILABLE_AT write that changes a quantity (stock assignment, bulk
+stock imports and stock movements, see bulk.upsert_stock and
+bulk.apply_stock_movements) appends one entry to the pair's
+StockLedgerChunk for the current period of SUPPLIERS_STOCK_LEDGER_CHUNK_HOURS.
+An entry holds the movement kind, the quantity change and the quantity after
+it, in the same statement and under the same lock as the change itself.
+
+take_snapshots() copies the stock levels of each store into a StockSnapshot
+every SUPPLIERS_STOCK_SNAPSHOT_HOURS. inventory_at() then answers "stock at
+store S at time T" from the latest snapshot before T plus the ledger entries
+between the two, instead of replaying the whole ledger. Because entries hold
+absolute quantities, the tail only needs the last entry of each product.
+"""
+
+from django.conf import settings
+from neomodel import db
+
+from . import graph
+from .models import Store, epoch_now
+from .price_history import DAY, default_window
+
+
+HOUR = 60 * 60
+
+# Snapshot times come from the database clock and entry times from the web
+# servers; tails start this many seconds before the snapshot to absorb skew.
+# Re-reading an entry the snapshot already reflects is harmless, since the
+# last entry of a product carries its absolute quantity.
+SNAPSHOT_OVERLAP = 5 * 60
+
+# Movement recorded by writes that set a quantity rather than apply a delta
+SET_MOVEMENT = 'set'
+
+# Cypher appending a ledger entry for ``rel`` when its quantity changed.
+# Expects ``product``, ``store``, ``rel``, ``old_quantity``, ``movement``,
+# $now and the parameters of chunk_params() to be bound.
+RECORD_STOCK_CHANGE = """
+    FOREACH (_ IN CASE WHEN rel.quantity <> old_quantity THEN [1] ELSE [] END |
+        MERGE (entry:StockLedgerChunk {key: product.uid + ':' + store.uid + ':' + $ledger_key})
+        ON CREATE SET entry.product_uid = product.uid,
+            entry.store_uid = store.uid,
+            entry.start = $ledger_start,
+            entry.times = [$now],
+            entry.movements = [movement],
+            entry.deltas = [rel.quantity - old_quantity],
+            entry.quantities = [rel.quantity]
+        ON MATCH SET entry.times = entry.times + $now,
+            entry.movements = entry.movements + movement,
+            entry.deltas = entry.deltas + (rel.quantity - old_quantity),
+            entry.quantities = entry.quantities + rel.quantity
+    )
+"""
+
+
+def chunk_seconds():
+    return settings.SUPPLIERS_STOCK_LEDGER_CHUNK_HOURS * HOUR
+
+
+def chunk_params(now):
+    """Parameters of RECORD_STOCK_CHANGE for writes at epoch time ``now``."""
+    start = int(now - now % chunk_seconds())
+    return {'ledger_start': float(start), 'ledger_key': str(start)}
+
+
+def inventory_at(store_uid, at=None):
+    """
+    Return the stock levels of store ``store_uid`` at epoch time ``at`` (default: now).
+
+    Reads the latest snapshot taken at or before ``at`` and the ledger
+    entries after it. Without such a snapshot the whole ledger up to ``at``
+    is read, and pairs last changed before the ledger existed are missing.
+    Products deleted since are left out.
+
+    Returns:
+        None if the store does not exist, else a dict with ``store``, ``at``,
+        ``snapshot_at`` (None without a snapshot), ``movements`` (tail
+        entries read) and ``items``: dicts with ``product_uid``, ``sku``,
+        ``name`` and ``quantity``, ordered by SKU.
+    """
+    at = at if at is not None else epoch_now()
+    results, _ = db.cypher_query("""
+    MATCH (store:Store {uid: $store_uid})
+    CALL {
+        OPTIONAL MATCH (snapshot:StockSnapshot {store_uid: $store_uid})
+        WHERE snapshot.taken_at <= $at
+        RETURN snapshot ORDER BY snapshot.taken_at DESC LIMIT 1
+    }
+    WITH store, snapshot, coalesce(snapshot.taken_at - $overlap, 0.0) AS since
+    CALL {
+        WITH since
+        MATCH (chunk:StockLedgerChunk {store_uid: $store_uid})
+        WHERE chunk.start > since - $chunk_seconds AND chunk.start <= $at
+        UNWIND range(0, size(chunk.times) - 1) AS i
+        WITH chunk, i
+        WHERE chunk.times[i] > since AND chunk.times[i] <= $at
+        WITH chunk, i ORDER BY chunk.start, i
+        WITH chunk.product_uid AS product_uid, collect(chunk.quantities[i]) AS quantities, count(*) AS entries
+        RETURN collect([product_uid, quantities[-1]]) AS tail, sum(entries) AS movements
+    }
+    RETURN store, snapshot.taken_at, snapshot.product_uids, snapshot.quantities, tail, movements
+    """, {
+        'store_uid': store_uid,
+        'at': at,
+        'overlap': float(SNAPSHOT_OVERLAP),
+        'chunk_seconds': chunk_seconds(),
+    })
+    if not results:
+        return None
+    store, snapshot_at, product_uids, quantities, tail, movements = results[0]
+    levels = dict(zip(product_uids or [], quantities or []))
+    levels.update(tail)
+
+    products, _ = db.cypher_query("""
+    UNWIND $uids AS uid
+    MATCH (product:Product {uid: uid})
+    RETURN product.uid, product.sku, product.name
+    ORDER BY product.sku
+    """, {'uids': list(levels)})
+    return {
+        'store': Store.inflate(store),
+        'at': at,
+        'snapshot_at': snapshot_at,
+        'movements': movements,
+        'items': [{
+            'product_uid': uid,
+            'sku': sku,
+            'name': name,
+            'quantity': levels[uid],
+        } for uid, sku, name in products],
+    }
+
+
+def ledger_entries(store_uid, product_uid=None, start=None, end=None, limit=100):
+    """
+    Return the ledger entries of a store in [start, end), newest first.
+
+    Args:
+        store_uid: Store whose movements are listed
+        product_uid: Only list movements of this product
+        start, end: Window bounds in epoch seconds (see price_history.default_window)
+        limit: Maximum number of entries
+
+    Returns:
+        List of dicts with ``time``, ``product_uid``, ``sku`` (None once the
+        product is deleted), ``movement``, ``delta`` and ``quantity``.
+    """
+    start, end = default_window(start, end)
+    results, _ = db.cypher_query("""
+    MATCH (chunk:StockLedgerChunk {store_uid: $store_uid})
+    WHERE chunk.start > $start - $chunk_seconds AND chunk.start < $end
+      AND ($product_uid IS NULL OR chunk.product_uid = $product_uid)
+    UNWIND range(0, size(chunk.times) - 1) AS i
+    WITH chunk, i
+    WHERE chunk.times[i] >= $start AND chunk.times[i] < $end
+    WITH chunk, i ORDER BY chunk.times[i] DESC, i DESC LIMIT $limit
+    OPTIONAL MATCH (product:Product {uid: chunk.product_uid})
+    RETURN chunk.times[i], chunk.product_uid, product.sku,
+           chunk.movements[i], chunk.deltas[i], chunk.quantities[i]
+    ORDER BY chunk.times[i] DESC, i DESC
+    """, {
+        'store_uid': store_uid,
+        'product_uid': product_uid,
+        'start': start,
+        'end': end,
+        'limit': limit,
+        'chunk_seconds': chunk_seconds(),
+    })
+    columns = ('time', 'product_uid', 'sku', 'movement', 'delta', 'quantity')
+    return [dict(zip(columns, row)) for row in results]
+
+
+def take_snapshots(batch_size=None, force=False):
+    """
+    Snapshot the stock levels of stores and delete expired snapshots.
+
+    Snapshots every store whose latest snapshot is older than
+    SUPPLIERS_STOCK_SNAPSHOT_HOURS (every store with ``force``), in batches
+    of ``batch_size`` stores (default SUPPLIERS_BULK_BATCH_SIZE). Each
+    snapshot is stamped with the database clock when its store is read.
+    Snapshots older than SUPPLIERS_STOCK_SNAPSHOT_RETENTION_DAYS are deleted,
+    except the latest one of each store.
+
+    Returns:
+        (snapshots taken, snapshots deleted)
+    """
+    batch_size = batch_size or settings.SUPPLIERS_BULK_BATCH_SIZE
+    now = epoch_now()
+    snapshot = """
+    MATCH (store:Store)
+    WHERE $force OR NOT EXISTS {
+        MATCH (snapshot:StockSnapshot {store_uid: store.uid}) WHERE snapshot.taken_at > $due_after
+    }
+    CALL {
+        WITH store
+        WITH store, datetime.realtime().epochMillis / 1000.0 AS taken_at,
+             [(product:Product)-[stock:AVAILABLE_AT]->(store) | [product.uid, coalesce(stock.quantity, 0)]] AS levels
+        MERGE (snapshot:StockSnapshot {key: store.uid + ':' + toString(toInteger(taken_at))})
+        SET snapshot.store_uid = store.uid,
+            snapshot.taken_at = taken_at,
+            snapshot.product_uids = [level IN levels | level[0]],
+            snapshot.quantities = [level IN levels | level[1]]
+    } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    expire = """
+    MATCH (snapshot:StockSnapshot)
+    WHERE snapshot.taken_at < $retain_after
+      AND EXISTS {
+          MATCH (newer:StockSnapshot {store_uid: snapshot.store_uid}) WHERE newer.taken_at > snapshot.taken_at
+      }
+    CALL { WITH snapshot DELETE snapshot } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    taken = graph.run_in_transactions(snapshot, {
+        'force': force,
+        'due_after': now - settings.SUPPLIERS_STOCK_SNAPSHOT_HOURS * HOUR,
+        'batch_size': batch_size,
+    }).nodes_created
+    deleted = graph.run_in_transactions(expire, {
+        'retain_after': now - settings.SUPPLIERS_STOCK_SNAPSHOT_RETENTION_DAYS * DAY,
+        'batch_size': batch_size,
+    }).nodes_deleted
+    return taken, deleted
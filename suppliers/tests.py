@@ -1,4 +1,403 @@
-# Placeholder for tests
-from django.test import TestCase
+"""
+Tests for the suppliers app.
 
-# Create your tests here.
+Most tests exercise pure helpers (cursors, row cleaning, cron parsing,
+validators, cache keys) and need no database. The query budget test seeds a
+small synthetic graph (see suppliers/benchmark.py), requests every URL and
+fails when a view runs more queries than its budget; it only runs against
+the disposable database named by NEO4J_TEST_BOLT_URL, and removes the seeded
+nodes afterwards.
+
+Run with: python manage.py test suppliers
+    NEO4J_TEST_BOLT_URL=bolt://localhost:7688 python manage.py test suppliers
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+from unittest import SkipTest, mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from neomodel import db, config as neomodel_config
+
+from . import benchmark, bulk, cache, export, reports
+from .api import cache_stats, cache_stats_reset, json_write
+from .conditional import _validators
+from .middleware import QueryProfilerMiddleware
+from .models import Supplier, Product, Store, epoch_now
+from .pagination import encode_cursor, decode_cursor
+from .scheduler import CronSchedule, ScheduleError
+from .urls import urlpatterns
+
+
+# Products seeded for the budget test; big enough for full pages everywhere
+TEST_GRAPH_SIZE = 300
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'suppliers-tests'}}
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        for key in ('Acme', 42, 3.5, None):
+            self.assertEqual(decode_cursor(encode_cursor(key, 'abc123')), (key, 'abc123'))
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor('??>>~~', 'abc123')
+        self.assertRegex(cursor, r'^[A-Za-z0-9_-]+$')
+
+    def test_missing_or_malformed_cursor(self):
+        for cursor in (None, '', 'not a cursor', encode_cursor('Acme', 'abc')[:-3], 'WzEsMl0'):
+            self.assertIsNone(decode_cursor(cursor), cursor)
+
+
+class CleanRowTests(SimpleTestCase):
+
+    def test_node_row(self):
+        row = bulk.clean_row('products', {'sku': ' SKU-1 ', 'name': 'Bolt', 'category': ''}, 3)
+        self.assertEqual(row['index'], 3)
+        self.assertEqual(row['key'], 'SKU-1')
+        self.assertEqual(row['props'], {'sku': 'SKU-1', 'name': 'Bolt'})
+
+    def test_node_row_requires_fields(self):
+        with self.assertRaisesMessage(bulk.RowError, 'name is required'):
+            bulk.clean_row('products', {'sku': 'SKU-1'}, 0)
+
+    def test_node_row_rejects_invalid_email(self):
+        with self.assertRaisesMessage(bulk.RowError, 'invalid email'):
+            bulk.clean_row('suppliers', {'name': 'Acme', 'email': 'nope'}, 0)
+
+    def test_supplies_row(self):
+        row = bulk.clean_row('supplies', {'supplier': 'Acme', 'sku': 'SKU-1', 'unit_price': '2.5', 'lead_time_days': ''}, 0)
+        self.assertEqual(row['supplier'], 'Acme')
+        self.assertIsNone(row['supplier_uid'])
+        self.assertEqual(row['props'], {'unit_price': 2.5})
+
+    def test_supplies_row_requires_endpoints(self):
+        with self.assertRaisesMessage(bulk.RowError, 'supplier requires supplier_uid or supplier'):
+            bulk.clean_row('supplies', {'sku': 'SKU-1'}, 0)
+
+    def test_negative_numbers_are_rejected(self):
+        with self.assertRaisesMessage(bulk.RowError, 'quantity must be at least 0'):
+            bulk.clean_row('stock', {'sku': 'SKU-1', 'store': 'Main', 'quantity': -1}, 0)
+        with self.assertRaisesMessage(bulk.RowError, 'unit_price must be a number'):
+            bulk.clean_row('supplies', {'supplier': 'Acme', 'sku': 'SKU-1', 'unit_price': 'cheap'}, 0)
+
+    def test_movement_signs(self):
+        raw = {'sku': 'SKU-1', 'store': 'Main', 'quantity': 4}
+        self.assertEqual(bulk.clean_row('movement', {**raw, 'movement': 'receive'}, 0)['delta'], 4)
+        self.assertEqual(bulk.clean_row('movement', {**raw, 'movement': 'sell'}, 0)['delta'], -4)
+        self.assertEqual(bulk.clean_row('movement', {**raw, 'movement': 'adjust', 'quantity': -2}, 0)['delta'], -2)
+        with self.assertRaisesMessage(bulk.RowError, 'quantity must be at least 0'):
+            bulk.clean_row('movement', {**raw, 'movement': 'sell', 'quantity': -2}, 0)
+        with self.assertRaisesMessage(bulk.RowError, 'movement must be one of'):
+            bulk.clean_row('movement', {**raw, 'movement': 'steal'}, 0)
+
+    def test_unknown_kind(self):
+        for kind, raw in (('widgets', {}), ('stock', ['not', 'a', 'dict'])):
+            with self.assertRaises(bulk.RowError):
+                bulk.clean_row(kind, raw, 0)
+
+
+class CronScheduleTests(SimpleTestCase):
+
+    def test_fields(self):
+        schedule = CronSchedule('*/15 2-4 1,15 * 1-5')
+        self.assertEqual(schedule.minutes, {0, 15, 30, 45})
+        self.assertEqual(schedule.hours, {2, 3, 4})
+        self.assertEqual(schedule.days, {1, 15})
+        self.assertEqual(schedule.months, set(range(1, 13)))
+        self.assertEqual(schedule.weekdays, {1, 2, 3, 4, 5})
+
+    def test_stepped_value_runs_to_the_end_of_the_range(self):
+        self.assertEqual(CronSchedule('50/5 * * * *').minutes, {50, 55})
+
+    def test_sunday_is_zero_or_seven(self):
+        sunday = datetime(2026, 10, 18, 6, 0)
+        self.assertTrue(CronSchedule('0 6 * * 7').matches(sunday))
+        self.assertTrue(CronSchedule('0 6 * * 0').matches(sunday))
+        self.assertFalse(CronSchedule('0 6 * * 1').matches(sunday))
+
+    def test_matches(self):
+        schedule = CronSchedule('30 2 * * *')
+        self.assertTrue(schedule.matches(datetime(2026, 10, 17, 2, 30, 59)))
+        self.assertFalse(schedule.matches(datetime(2026, 10, 17, 2, 31)))
+
+    def test_restricted_day_fields_match_either(self):
+        schedule = CronSchedule('0 0 1 * 1')
+        self.assertTrue(schedule.matches(datetime(2026, 10, 1)))   # Thursday, day 1
+        self.assertTrue(schedule.matches(datetime(2026, 10, 19)))  # Monday
+        self.assertFalse(schedule.matches(datetime(2026, 10, 20)))
+
+    def test_stepped_wildcard_day_requires_both(self):
+        schedule = CronSchedule('0 3 */2 * 1')
+        self.assertTrue(schedule.matches(datetime(2026, 10, 5, 3)))    # Monday, odd day
+        self.assertFalse(schedule.matches(datetime(2026, 10, 12, 3)))  # Monday, even day
+        self.assertFalse(schedule.matches(datetime(2026, 10, 7, 3)))   # Wednesday, odd day
+
+    def test_invalid_expressions(self):
+        for expression in ('* * * *', '60 * * * *', '*/0 * * * *', 'a * * * *', '5-1 * * * *', '* * 0 * *'):
+            with self.assertRaises(ScheduleError, msg=expression):
+                CronSchedule(expression)
+
+
+class ValidatorTests(SimpleTestCase):
+
+    def test_etag_follows_version(self):
+        etag, last_modified = _validators((1700000000.5, 1700000100.25, 7))
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(last_modified, 1700000100)
+        self.assertEqual(_validators((1700000000.5, 1700000100.25, 7))[0], etag)
+        self.assertNotEqual(_validators((1700000000.5, 1700000100.25, 8))[0], etag)
+
+    def test_etag_follows_low_stock_threshold(self):
+        etag, _ = _validators((1700000000.5,))
+        with self.settings(SUPPLIERS_LOW_STOCK_THRESHOLD=settings.SUPPLIERS_LOW_STOCK_THRESHOLD + 1):
+            self.assertNotEqual(_validators((1700000000.5,))[0], etag)
+
+    def test_no_timestamps(self):
+        self.assertIsNone(_validators((3, None))[1])
+
+
+@override_settings(CACHES=LOCAL_CACHE, SUPPLIERS_CACHE_ALIAS='default')
+class CacheKeyTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+
+    def test_generations_are_stable_until_invalidated(self):
+        generation = cache._generations('Supplier', 'SUPPLIES')
+        self.assertEqual(cache._generations('Supplier', 'SUPPLIES'), generation)
+        cache.invalidate('SUPPLIES')
+        changed = cache._generations('Supplier', 'SUPPLIES')
+        self.assertNotEqual(changed, generation)
+        self.assertEqual(changed.split('.')[0], generation.split('.')[0])
+
+    def test_invalidate_node_label(self):
+        before = cache._generations('Product', 'SUPPLIES', 'AVAILABLE_AT')
+        cache.invalidate_node_label('Product')
+        after = cache._generations('Product', 'SUPPLIES', 'AVAILABLE_AT')
+        self.assertEqual([a == b for a, b in zip(before.split('.'), after.split('.'))], [False, True, True])
+        cache.invalidate_node_label('Product', detached=True)
+        detached = cache._generations('Product', 'SUPPLIES', 'AVAILABLE_AT')
+        self.assertTrue(all(a != b for a, b in zip(after.split('.'), detached.split('.'))))
+
+    def test_relationship_writes_invalidate_counting_labels(self):
+        before = cache._generations('Supplier', 'Product', 'Store')
+        cache.invalidate_relationships('SUPPLIES')
+        after = cache._generations('Supplier', 'Product', 'Store')
+        self.assertEqual([a == b for a, b in zip(before.split('.'), after.split('.'))], [False, False, True])
+        cache.invalidate_node_label('Store', detached=True)
+        detached = cache._generations('Supplier', 'Product', 'Store')
+        self.assertEqual([a == b for a, b in zip(after.split('.'), detached.split('.'))], [True, True, False])
+
+    def test_invalidate_all(self):
+        namespaces = (*cache.NODE_LABELS, *cache.REL_TYPES)
+        before = cache._generations(*namespaces).split('.')
+        cache.invalidate_all()
+        after = cache._generations(*namespaces).split('.')
+        self.assertTrue(all(a != b for a, b in zip(before, after)))
+
+
+@override_settings(SUPPLIERS_API_TOKENS=['s3cret'])
+class JsonWriteTests(SimpleTestCase):
+
+    view = staticmethod(json_write(lambda request: JsonResponse({'ok': True})))
+
+    def post(self, content_type='application/json', user=AnonymousUser(), **headers):
+        request = RequestFactory().post('/api/stock/bulk/', '{}', content_type=content_type, headers=headers)
+        request.user = user
+        return self.view(request)
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.post().status_code, 401)
+        self.assertEqual(self.post(Authorization='Bearer wrong').status_code, 401)
+
+    def test_session_request_needs_csrf_token(self):
+        user = type('User', (), {'is_authenticated': True})()
+        self.assertEqual(self.post(user=user).status_code, 403)
+
+    def test_token_request(self):
+        self.assertEqual(self.post(Authorization='Bearer s3cret').status_code, 200)
+
+    def test_requires_json(self):
+        response = self.post(content_type='application/x-www-form-urlencoded', Authorization='Bearer s3cret')
+        self.assertEqual(response.status_code, 415)
+
+    def test_post_only(self):
+        request = RequestFactory().get('/api/stock/bulk/', headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(self.view(request).status_code, 405)
+
+
+@override_settings(CACHES=LOCAL_CACHE, SUPPLIERS_CACHE_ALIAS='default', SUPPLIERS_API_TOKENS=['s3cret'])
+class CacheStatsTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.metrics.reset()
+        cache.metrics.record('node', hit=True)
+
+    def test_get_does_not_reset(self):
+        cache_stats(RequestFactory().get('/api/cache/stats/', {'reset': '1'}))
+        self.assertEqual(cache.metrics.snapshot()['lookups']['node']['hits'], 1)
+
+    def test_reset_returns_previous_counters(self):
+        request = RequestFactory().post(
+            '/api/cache/stats/reset/', '{}', content_type='application/json',
+            headers={'Authorization': 'Bearer s3cret'}
+        )
+        response = cache_stats_reset(request)
+        self.assertEqual(json.loads(response.content)['lookups']['node']['hits'], 1)
+        self.assertEqual(cache.metrics.snapshot()['lookups'], {})
+
+
+@override_settings(SUPPLIERS_QUERY_PROFILER=True, SUPPLIERS_QUERY_PANEL=False)
+class QueryProfilerMiddlewareTests(SimpleTestCase):
+
+    def get(self, response):
+        return QueryProfilerMiddleware(lambda request: response)(RequestFactory().get('/'))
+
+    def test_server_timing(self):
+        self.assertIn('neo4j;dur=', self.get(HttpResponse('ok'))['Server-Timing'])
+
+    def test_streamed_response_has_no_server_timing(self):
+        self.assertFalse(self.get(StreamingHttpResponse(iter(['ok']))).has_header('Server-Timing'))
+
+    def test_disabled(self):
+        with self.settings(SUPPLIERS_QUERY_PROFILER=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                QueryProfilerMiddleware(lambda request: HttpResponse())
+
+
+class ExportCommandTests(SimpleTestCase):
+
+    def test_exports_every_dataset_by_default(self):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.object(export, 'csv_chunks', lambda dataset, fetch_size: iter(['header\n'])):
+            call_command('export_supply_chain', '--output-dir', output_dir, stdout=StringIO())
+            self.assertEqual(sorted(os.listdir(output_dir)), sorted(f'{name}.csv' for name in export.DATASETS))
+
+    def test_unknown_dataset(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown dataset(s) widgets'):
+            call_command('export_supply_chain', 'widgets', stdout=StringIO())
+
+
+class BenchmarkTargetsTests(SimpleTestCase):
+
+    def test_every_url_is_benchmarked_or_skipped(self):
+        uids = {Supplier: 'supplier-uid', Product: 'product-uid', Store: 'store-uid'}
+        benchmarked = {name for name, _, _ in benchmark.benchmark_targets(uids)}
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(names - benchmark.SKIPPED_URLS, benchmarked)
+
+    def test_every_benchmarked_url_has_a_query_budget(self):
+        names = {pattern.name for pattern in urlpatterns} - benchmark.SKIPPED_URLS
+        self.assertEqual(names - set(benchmark.VIEW_QUERY_BUDGETS), set())
+
+
+class Neo4jTestCase(SimpleTestCase):
+    """
+    Base for tests that write to Neo4j.
+
+    Connects neomodel (and the async driver, through NEO4J_BOLT_URL) to
+    NEO4J_TEST_BOLT_URL for the duration of the class, and skips the class
+    when no test database is configured or reachable.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        url = settings.NEO4J_TEST_BOLT_URL
+        if not url:
+            raise SkipTest('NEO4J_TEST_BOLT_URL is not set')
+        cls._test_database = override_settings(NEO4J_BOLT_URL=url)
+        cls._test_database.enable()
+        try:
+            db.set_connection(url=f'bolt://{settings.NEO4J_USERNAME}:{settings.NEO4J_PASSWORD}@{url.split("//")[1]}')
+            db.cypher_query('RETURN 1')
+        except Exception as e:
+            cls._restore_connection()
+            raise SkipTest(f'Neo4j test database is not available: {e}')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._restore_connection()
+        super().tearDownClass()
+
+    @classmethod
+    def _restore_connection(cls):
+        db.close_connection()
+        cls._test_database.disable()
+        db.set_connection(url=neomodel_config.DATABASE_URL)
+
+
+class QueryBudgetTests(Neo4jTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.seed_graph(TEST_GRAPH_SIZE)
+
+    @classmethod
+    def tearDownClass(cls):
+        benchmark.clear_seeded()
+        super().tearDownClass()
+
+    def test_views_within_query_budget(self):
+        # Latency depends on the machine running the tests; only query counts are asserted
+        report = benchmark.run_benchmark(repeat=1)
+        failures = {
+            result['url']: (result['statuses'], result['queries'], result['query_budget'])
+            for result in report['results']
+            if any(status >= 400 for status in result['statuses']) or result['queries'] > result['query_budget']
+        }
+        self.assertEqual(failures, {})
+
+
+class ReportTests(Neo4jTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.seed_graph(TEST_GRAPH_SIZE)
+
+    @classmethod
+    def tearDownClass(cls):
+        db.cypher_query('MATCH (row:ReportRow) DELETE row')
+        benchmark.clear_seeded()
+        super().tearDownClass()
+
+    def test_every_report_computes_rows(self):
+        for name, report in reports.REPORTS.items():
+            with self.subTest(report=name):
+                groups = reports._groups(report.all_groups, {'report': name})[:1]
+                self.assertEqual(len(groups), 1)
+                self.assertGreater(reports._recompute(name, report, groups, epoch_now()), 0)
+
+
+class DedupeSuppliesTests(Neo4jTestCase):
+
+    def tearDown(self):
+        benchmark.clear_seeded()
+
+    def test_keeps_latest_edge_without_last_updated(self):
+        # Edges written before last_updated existed only have since
+        db.cypher_query(f"""
+        CREATE (supplier:Supplier {{uid: 'dedupe-supplier', name: '{benchmark.SEED_PREFIX} Supplier dedupe', supply_count: 3}})
+        CREATE (product:Product {{uid: 'dedupe-product', sku: '{benchmark.SEED_SKU_PREFIX}DEDUPE', name: 'Dedupe', supplier_count: 3}})
+        WITH supplier, product
+        UNWIND [[100, 1.0], [300, 3.0], [200, 2.0]] AS edge
+        CREATE (supplier)-[:SUPPLIES {{since: edge[0], unit_price: edge[1]}}]->(product)
+        """)
+        call_command('dedupe_supplies', stdout=StringIO())
+        results, _ = db.cypher_query("""
+        MATCH (supplier:Supplier {uid: 'dedupe-supplier'})-[rel:SUPPLIES]->(product:Product {uid: 'dedupe-product'})
+        RETURN rel.unit_price, rel.since, supplier.supply_count, product.supplier_count
+        """)
+        self.assertEqual(results, [[3.0, 100, 1, 1]])
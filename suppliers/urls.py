@@ -1,25 +1,34 @@
 """
 URL configuration for suppliers app.
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, api, api_v1
+
+# Read-only pages are served by the async views under ASGI when enabled
+if settings.SUPPLIERS_ASYNC_VIEWS:
+    from . import async_views as read_views
+    low_stock_view = read_views.low_stock
+else:
+    read_views = views
+    low_stock_view = api.low_stock
 
 urlpatterns = [
     # Supplier URLs
-    path('', views.supplier_list, name='supplier_list'),
+    path('', read_views.supplier_list, name='supplier_list'),
     path('create/', views.supplier_create, name='supplier_create'),
     
     # Product URLs (must come before <str:uid>/ to avoid conflicts)
-    path('products/', views.product_list, name='product_list'),
+    path('products/', read_views.product_list, name='product_list'),
     path('products/create/', views.product_create, name='product_create'),
-    path('products/<str:uid>/', views.product_detail, name='product_detail'),
+    path('products/<str:uid>/', read_views.product_detail, name='product_detail'),
     path('products/<str:uid>/edit/', views.product_edit, name='product_edit'),
     path('products/<str:uid>/delete/', views.product_delete, name='product_delete'),
     
     # Store URLs
-    path('stores/', views.store_list, name='store_list'),
+    path('stores/', read_views.store_list, name='store_list'),
     path('stores/create/', views.store_create, name='store_create'),
-    path('stores/<str:uid>/', views.store_detail, name='store_detail'),
+    path('stores/<str:uid>/', read_views.store_detail, name='store_detail'),
     path('stores/<str:uid>/edit/', views.store_edit, name='store_edit'),
     path('stores/<str:uid>/delete/', views.store_delete, name='store_delete'),
     
@@ -27,13 +36,50 @@ urlpatterns = [
     path('stock/assign/', views.stock_assignment, name='stock_assignment'),
     
     # Analytics URLs
-    path('analytics/dashboard/', views.dashboard, name='dashboard'),
+    path('analytics/dashboard/', read_views.dashboard, name='dashboard'),
+    path('analytics/risk/', views.supply_risk, name='supply_risk'),
+    path('analytics/risk/<str:uid>/', views.supplier_risk, name='supplier_risk'),
+    path('analytics/reports/', views.report_index, name='reports'),
+    path('analytics/reports/<str:report>/', views.report_detail, name='report_detail'),
+    
+    # Search URLs
+    path('search/', views.search, name='search'),
+    
+    # Sourcing URLs
+    path('sourcing/', views.sourcing_view, name='sourcing'),
+    
+    # Export URLs
+    path('export/<str:dataset>/', views.export_dataset, name='export_dataset'),
+    
+    # JSON API URLs
+    path('api/typeahead/<str:kind>/', api.typeahead, name='typeahead'),
+    path('api/search/', api.search, name='search_api'),
+    path('api/low-stock/', low_stock_view, name='low_stock_feed'),
+    path('api/risk/single-source/', api.risk_single_source, name='risk_single_source'),
+    path('api/risk/suppliers/', api.risk_suppliers, name='risk_suppliers'),
+    path('api/risk/suppliers/<str:uid>/', api.risk_blast_radius, name='risk_blast_radius'),
+    path('api/products/<str:uid>/price-history/', api.product_price_history, name='product_price_history'),
+    path('api/stores/<str:uid>/inventory/', api.store_inventory, name='store_inventory'),
+    path('api/stores/<str:uid>/stock-ledger/', api.store_stock_ledger, name='store_stock_ledger'),
+    path('api/reports/<str:report>/', api.report_rows, name='report_rows'),
+    path('api/health/', api.health, name='health'),
+    path('api/cache/stats/', api.cache_stats, name='cache_stats'),
+    path('api/cache/stats/reset/', api.cache_stats_reset, name='cache_stats_reset'),
+    path('api/supplies/bulk/', api.supplies_bulk_update, name='supplies_bulk_update'),
+    path('api/stock/bulk/', api.stock_bulk_update, name='stock_bulk_update'),
+    path('api/stock/movements/', api.stock_movements, name='stock_movements'),
+    path('api/sourcing/best-suppliers/', api.sourcing_best_suppliers, name='sourcing_best_suppliers'),
+    
+    # Read-only JSON API
+    path('api/v1/', api_v1.index, name='api_v1_index'),
+    path('api/v1/<str:resource>/', api_v1.collection, name='api_v1_collection'),
+    path('api/v1/<str:resource>/<str:uid>/', api_v1.detail, name='api_v1_detail'),
     
     # Relationship URLs (must come before <str:uid>/ to avoid conflicts)
     path('link/supplier-product/', views.link_supplier_product, name='link_supplier_product'),
     
     # Supplier detail URLs (must come LAST because <str:uid> catches everything)
-    path('<str:uid>/', views.supplier_detail, name='supplier_detail'),
+    path('<str:uid>/', read_views.supplier_detail, name='supplier_detail'),
     path('<str:uid>/edit/', views.supplier_edit, name='supplier_edit'),
     path('<str:uid>/delete/', views.supplier_delete, name='supplier_delete'),
 ]
@@ -4,22 +4,41 @@ Views for Supplier and Product management.
 
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import Http404
-from neomodel import db
+from django.http import Http404, StreamingHttpResponse
 from datetime import datetime
+from neomodel import db
 
-from .models import Supplier, Product, Store
-from .forms import SupplierForm, ProductForm, LinkSupplierProductForm, StoreForm, StockAssignmentForm
+from .models import Supplier, Product, Store, DASHBOARD_LOW_STOCK_LIMIT
+from .forms import (
+    SupplierForm, ProductForm, LinkSupplierProductForm, StoreForm, StockAssignmentForm, SourcingForm
+)
+from . import bulk, cache, export, reports, risk, search as fulltext, sourcing
+from .api import search_params
+from .conditional import conditional_view, list_version, detail_version
+from .graph import is_asgi
+from .pagination import get_page_size, list_options
+
+
+def list_context(request, model, page, name):
+    """Template context of a node listing: the page under ``name`` plus its sort and filter choices."""
+    sort, list_filter = list_options(request, model)
+    return {
+        name: page.items,
+        'page': page,
+        'sort': sort,
+        'filter': list_filter,
+        'sort_choices': [(key, label) for key, (_, _, label) in model.sort_orders.items()],
+        'filter_choices': [(key, label) for key, (_, label) in model.list_filters.items()],
+    }
 
 
 # ==================== SUPPLIER VIEWS ====================
 
+@conditional_view(list_version(Supplier))
 def supplier_list(request):
-    """Display list of all suppliers."""
-    suppliers = Supplier.nodes.all()
-    return render(request, 'suppliers/supplier_list.html', {
-        'suppliers': suppliers
-    })
+    """Display a page of suppliers ordered by name or products supplied (keyset pagination)."""
+    page = cache.paginate(request, Supplier)
+    return render(request, 'suppliers/supplier_list.html', list_context(request, Supplier, page, 'suppliers'))
 
 
 def supplier_create(request):
@@ -37,6 +56,7 @@ def supplier_create(request):
                     address=form.cleaned_data['address'],
                     country=form.cleaned_data['country']
                 ).save()
+                cache.invalidate_node_label('Supplier')
                 
                 messages.success(request, f'Supplier "{supplier.name}" created successfully!')
                 return redirect('supplier_list')
@@ -51,12 +71,13 @@ def supplier_create(request):
     })
 
 
+@conditional_view(detail_version(Supplier))
 def supplier_detail(request, uid):
     """Display details of a specific supplier."""
     try:
-        supplier = Supplier.nodes.get(uid=uid)
-        # Get all products supplied by this supplier
-        supplied_products = supplier.supplies.all()
+        supplier = cache.get_node(Supplier, uid)
+        # Get all products supplied by this supplier with price and lead time
+        supplied_products = supplier.supply_terms()
         
         return render(request, 'suppliers/supplier_detail.html', {
             'supplier': supplier,
@@ -69,7 +90,7 @@ def supplier_detail(request, uid):
 def supplier_edit(request, uid):
     """Edit an existing supplier."""
     try:
-        supplier = Supplier.nodes.get(uid=uid)
+        supplier = cache.get_node(Supplier, uid, fresh=request.method == 'POST')
     except Supplier.DoesNotExist:
         raise Http404("Supplier not found")
     
@@ -86,6 +107,7 @@ def supplier_edit(request, uid):
                 supplier.country = form.cleaned_data['country']
                 supplier.updated_at = datetime.now()
                 supplier.save()
+                cache.invalidate_node_label('Supplier')
                 
                 messages.success(request, f'Supplier "{supplier.name}" updated successfully!')
                 return redirect('supplier_detail', uid=uid)
@@ -112,9 +134,12 @@ def supplier_edit(request, uid):
 def supplier_delete(request, uid):
     """Delete a supplier."""
     try:
-        supplier = Supplier.nodes.get(uid=uid)
+        supplier = cache.get_node(Supplier, uid)
         supplier_name = supplier.name
-        supplier.delete()
+        # Neighbour counters are released in the same transaction (pre_delete)
+        with db.transaction:
+            supplier.delete()
+        cache.invalidate_node_label('Supplier', detached=True)
         messages.success(request, f'Supplier "{supplier_name}" deleted successfully!')
     except Supplier.DoesNotExist:
         messages.error(request, 'Supplier not found')
@@ -126,12 +151,11 @@ def supplier_delete(request, uid):
 
 # ==================== PRODUCT VIEWS ====================
 
+@conditional_view(list_version(Product))
 def product_list(request):
-    """Display list of all products."""
-    products = Product.nodes.all()
-    return render(request, 'suppliers/product_list.html', {
-        'products': products
-    })
+    """Display a page of products ordered by SKU or number of suppliers (keyset pagination)."""
+    page = cache.paginate(request, Product)
+    return render(request, 'suppliers/product_list.html', list_context(request, Product, page, 'products'))
 
 
 def product_create(request):
@@ -146,8 +170,10 @@ def product_create(request):
                     sku=form.cleaned_data['sku'],
                     description=form.cleaned_data['description'],
                     category=form.cleaned_data['category'],
-                    unit_of_measure=form.cleaned_data['unit_of_measure']
+                    unit_of_measure=form.cleaned_data['unit_of_measure'],
+                    reorder_level=form.cleaned_data['reorder_level']
                 ).save()
+                cache.invalidate_node_label('Product')
                 
                 messages.success(request, f'Product "{product.name}" created successfully!')
                 return redirect('product_list')
@@ -162,12 +188,13 @@ def product_create(request):
     })
 
 
+@conditional_view(detail_version(Product))
 def product_detail(request, uid):
     """Display details of a specific product."""
     try:
-        product = Product.nodes.get(uid=uid)
-        # Get all suppliers for this product
-        suppliers = product.supplied_by.all()
+        product = cache.get_node(Product, uid)
+        # Get all suppliers for this product with price and lead time
+        suppliers = product.supplier_terms()
         
         return render(request, 'suppliers/product_detail.html', {
             'product': product,
@@ -180,7 +207,7 @@ def product_detail(request, uid):
 def product_edit(request, uid):
     """Edit an existing product."""
     try:
-        product = Product.nodes.get(uid=uid)
+        product = cache.get_node(Product, uid, fresh=request.method == 'POST')
     except Product.DoesNotExist:
         raise Http404("Product not found")
     
@@ -194,8 +221,14 @@ def product_edit(request, uid):
                 product.description = form.cleaned_data['description']
                 product.category = form.cleaned_data['category']
                 product.unit_of_measure = form.cleaned_data['unit_of_measure']
+                reorder_level_changed = product.reorder_level != form.cleaned_data['reorder_level']
+                product.reorder_level = form.cleaned_data['reorder_level']
                 product.updated_at = datetime.now()
                 product.save()
+                cache.invalidate_node_label('Product')
+                if reorder_level_changed:
+                    product.refresh_low_stock()
+                    cache.invalidate('AVAILABLE_AT')
                 
                 messages.success(request, f'Product "{product.name}" updated successfully!')
                 return redirect('product_detail', uid=uid)
@@ -208,7 +241,8 @@ def product_edit(request, uid):
             'sku': product.sku,
             'description': product.description,
             'category': product.category,
-            'unit_of_measure': product.unit_of_measure
+            'unit_of_measure': product.unit_of_measure,
+            'reorder_level': product.reorder_level
         })
     
     return render(request, 'suppliers/product_form.html', {
@@ -221,9 +255,11 @@ def product_edit(request, uid):
 def product_delete(request, uid):
     """Delete a product."""
     try:
-        product = Product.nodes.get(uid=uid)
+        product = cache.get_node(Product, uid)
         product_name = product.name
-        product.delete()
+        with db.transaction:
+            product.delete()
+        cache.invalidate_node_label('Product', detached=True)
         messages.success(request, f'Product "{product_name}" deleted successfully!')
     except Product.DoesNotExist:
         messages.error(request, 'Product not found')
@@ -241,30 +277,23 @@ def link_supplier_product(request):
         form = LinkSupplierProductForm(request.POST)
         if form.is_valid():
             try:
-                supplier_uid = form.cleaned_data['supplier_uid']
-                product_uid = form.cleaned_data['product_uid']
-                unit_price = form.cleaned_data.get('unit_price')
-                lead_time_days = form.cleaned_data.get('lead_time_days')
+                # Nodes were resolved by the form in a single existence query
+                supplier = form.cleaned_data['supplier']
+                product = form.cleaned_data['product']
                 
-                # Get nodes
-                supplier = Supplier.nodes.get(uid=supplier_uid)
-                product = Product.nodes.get(uid=product_uid)
-                
-                # Create relationship
-                rel_props = {}
-                if unit_price is not None:
-                    rel_props['unit_price'] = unit_price
-                if lead_time_days is not None:
-                    rel_props['lead_time_days'] = lead_time_days
-                
-                supplier.supplies.connect(product, rel_props)
+                # Create or update the SUPPLIES relationship and both counters in one statement
+                row = bulk.clean_row('supplies', {
+                    'supplier_uid': supplier.uid,
+                    'product_uid': product.uid,
+                    'unit_price': form.cleaned_data.get('unit_price'),
+                    'lead_time_days': form.cleaned_data.get('lead_time_days')
+                }, 0)
+                applied, rejected = bulk.upsert_supplies([row])
+                if rejected:
+                    raise ValueError(rejected[0][1])
                 
                 messages.success(request, f'Successfully linked "{supplier.name}" to "{product.name}"!')
-                return redirect('supplier_detail', uid=supplier_uid)
-            except Supplier.DoesNotExist:
-                messages.error(request, 'Supplier not found')
-            except Product.DoesNotExist:
-                messages.error(request, 'Product not found')
+                return redirect('supplier_detail', uid=supplier.uid)
             except Exception as e:
                 messages.error(request, f'Error linking supplier to product: {str(e)}')
     else:
@@ -278,12 +307,11 @@ def link_supplier_product(request):
 
 # ==================== STORE VIEWS ====================
 
+@conditional_view(list_version(Store))
 def store_list(request):
-    """Display list of all stores."""
-    stores = Store.nodes.all()
-    return render(request, 'suppliers/store_list.html', {
-        'stores': stores
-    })
+    """Display a page of stores ordered by name, products stocked or units in stock (keyset pagination)."""
+    page = cache.paginate(request, Store)
+    return render(request, 'suppliers/store_list.html', list_context(request, Store, page, 'stores'))
 
 
 def store_create(request):
@@ -296,8 +324,10 @@ def store_create(request):
                 store = Store(
                     name=form.cleaned_data['name'],
                     location=form.cleaned_data['location'],
-                    store_type=form.cleaned_data['store_type']
+                    store_type=form.cleaned_data['store_type'],
+                    low_stock_threshold=form.cleaned_data['low_stock_threshold']
                 ).save()
+                cache.invalidate_node_label('Store')
                 
                 messages.success(request, f'Store "{store.name}" created successfully!')
                 return redirect('store_list')
@@ -312,22 +342,14 @@ def store_create(request):
     })
 
 
+@conditional_view(detail_version(Store))
 def store_detail(request, uid):
     """Display details of a specific store."""
     try:
-        store = Store.nodes.get(uid=uid)
+        store = cache.get_node(Store, uid)
         
         # Get all products available at this store with their quantities
-        products_data = []
-        for product in store.has_products.all():
-            # Get relationship properties
-            rel = store.has_products.relationship(product)
-            products_data.append({
-                'product': product,
-                'quantity': rel.quantity,
-                'aisle': rel.aisle,
-                'last_updated': rel.last_updated
-            })
+        products_data = store.stocked_products()
         
         return render(request, 'suppliers/store_detail.html', {
             'store': store,
@@ -340,7 +362,7 @@ def store_detail(request, uid):
 def store_edit(request, uid):
     """Edit an existing store."""
     try:
-        store = Store.nodes.get(uid=uid)
+        store = cache.get_node(Store, uid, fresh=request.method == 'POST')
         
         if request.method == 'POST':
             form = StoreForm(request.POST)
@@ -349,8 +371,14 @@ def store_edit(request, uid):
                     store.name = form.cleaned_data['name']
                     store.location = form.cleaned_data['location']
                     store.store_type = form.cleaned_data['store_type']
+                    threshold_changed = store.low_stock_threshold != form.cleaned_data['low_stock_threshold']
+                    store.low_stock_threshold = form.cleaned_data['low_stock_threshold']
                     store.updated_at = datetime.now()
                     store.save()
+                    cache.invalidate_node_label('Store')
+                    if threshold_changed:
+                        store.refresh_low_stock()
+                        cache.invalidate('AVAILABLE_AT')
                     
                     messages.success(request, f'Store "{store.name}" updated successfully!')
                     return redirect('store_detail', uid=uid)
@@ -362,6 +390,7 @@ def store_edit(request, uid):
                 'name': store.name,
                 'location': store.location,
                 'store_type': store.store_type,
+                'low_stock_threshold': store.low_stock_threshold,
             })
         
         return render(request, 'suppliers/store_form.html', {
@@ -376,9 +405,11 @@ def store_edit(request, uid):
 def store_delete(request, uid):
     """Delete a store."""
     try:
-        store = Store.nodes.get(uid=uid)
+        store = cache.get_node(Store, uid)
         store_name = store.name
-        store.delete()
+        with db.transaction:
+            store.delete()
+        cache.invalidate_node_label('Store', detached=True)
         messages.success(request, f'Store "{store_name}" deleted successfully!')
     except Store.DoesNotExist:
         messages.error(request, 'Store not found')
@@ -395,42 +426,26 @@ def stock_assignment(request):
     if request.method == 'POST':
         form = StockAssignmentForm(request.POST)
         if form.is_valid():
-            product_uid = form.cleaned_data['product_uid']
-            store_uid = form.cleaned_data['store_uid']
+            # Nodes were resolved by the form in a single existence query
+            product = form.cleaned_data['product']
+            store = form.cleaned_data['store']
             quantity = form.cleaned_data['quantity']
             aisle = form.cleaned_data['aisle']
             
             try:
-                product = Product.nodes.get(uid=product_uid)
-                store = Store.nodes.get(uid=store_uid)
-                
-                # Check if relationship already exists
-                if product.available_at.is_connected(store):
-                    # Update existing relationship
-                    rel = product.available_at.relationship(store)
-                    rel.quantity = quantity
-                    if aisle:
-                        rel.aisle = aisle
-                    rel.last_updated = datetime.now()
-                    rel.save()
-                    messages.success(request, f'Updated stock: "{product.name}" at "{store.name}" - Quantity: {quantity}')
-                else:
-                    # Create new relationship
-                    rel_props = {
-                        'quantity': quantity,
-                        'last_updated': datetime.now()
-                    }
-                    if aisle:
-                        rel_props['aisle'] = aisle
-                    
-                    product.available_at.connect(store, rel_props)
-                    messages.success(request, f'Successfully assigned "{product.name}" to "{store.name}" - Quantity: {quantity}')
+                # Create or update the AVAILABLE_AT relationship in one statement
+                row = bulk.clean_row('stock', {
+                    'product_uid': product.uid,
+                    'store_uid': store.uid,
+                    'quantity': quantity,
+                    'aisle': aisle
+                }, 0)
+                applied, rejected = bulk.upsert_stock([row])
+                if rejected:
+                    raise ValueError(rejected[0][1])
+                messages.success(request, f'Stock of "{product.name}" at "{store.name}" set to Quantity: {quantity}')
                 
-                return redirect('store_detail', uid=store_uid)
-            except Product.DoesNotExist:
-                messages.error(request, 'Product not found')
-            except Store.DoesNotExist:
-                messages.error(request, 'Store not found')
+                return redirect('store_detail', uid=store.uid)
             except Exception as e:
                 messages.error(request, f'Error assigning stock: {str(e)}')
     else:
@@ -446,42 +461,168 @@ def stock_assignment(request):
 
 def dashboard(request):
     """
-    Dashboard showing products with low stock (quantity < 10).
+    Dashboard showing stock levels below their reorder level.
+    All statistics are fetched in a single Cypher round trip; the low stock
+    table is paged with ?after=<cursor>.
+    """
+    stats = cache.dashboard_stats(low_stock_after=request.GET.get('after'))
+    return render(request, 'suppliers/dashboard.html', dashboard_context(request, stats))
+
+
+def dashboard_context(request, stats):
+    """Template context of the dashboard for a dashboard_stats() result."""
+    return {
+        'low_stock_items': stats['low_stock_items'],
+        'total_products': stats['total_products'],
+        'total_stores': stats['total_stores'],
+        'total_suppliers': stats['total_suppliers'],
+        'low_stock_count': stats['low_stock_count'],
+        'low_stock_limit': DASHBOARD_LOW_STOCK_LIMIT,
+        'low_stock_next_cursor': stats['low_stock_next_cursor'],
+        'low_stock_paged': bool(request.GET.get('after'))
+    }
+
+
+def supply_risk(request):
     """
-    # Cypher query to find all products with quantity < 10 at any store
-    query = """
-    MATCH (product:Product)-[rel:AVAILABLE_AT]->(store:Store)
-    WHERE rel.quantity < 10
-    RETURN product, store, rel.quantity as quantity, rel.aisle as aisle
-    ORDER BY rel.quantity ASC
+    Network-wide supply risk: single-source products and the suppliers whose
+    failure would hurt most. Reads the precomputed figures only.
     """
+    products, next_cursor = risk.single_source_products(request.GET.get('after'), limit=get_page_size(request))
+    return render(request, 'suppliers/supply_risk.html', {
+        'summary': risk.summary(),
+        'suppliers': risk.supplier_ranking(limit=10),
+        'single_source': products,
+        'next_cursor': next_cursor,
+        'paged': bool(request.GET.get('after'))
+    })
+
+
+def supplier_risk(request, uid):
+    """Stores and stocked quantity affected if one supplier fails (live traversal of its neighbourhood)."""
+    radius = risk.blast_radius(uid)
+    if radius is None:
+        raise Http404('Supplier not found')
+    return render(request, 'suppliers/supplier_risk.html', {
+        'supplier': radius['supplier'],
+        'stores': radius['stores'],
+        'quantity': sum(row['quantity'] for row in radius['stores']),
+        'sole_quantity': sum(row['sole_quantity'] for row in radius['stores'])
+    })
+
+
+def _report_state(state):
+    """ReportState dict with its epoch timestamps as datetimes, for templates."""
+    if state is None:
+        return None
+    return {
+        key: datetime.fromtimestamp(value) if key.endswith('_at') and value is not None else value
+        for key, value in state.items()
+    }
+
+
+def report_index(request):
+    """The precomputed reports and when each was last refreshed."""
+    states = reports.report_states()
+    return render(request, 'suppliers/reports.html', {
+        'reports': [
+            (name, report, _report_state(states.get(name)))
+            for name, report in reports.REPORTS.items()
+        ]
+    })
+
+
+def report_detail(request, report):
+    """One page of a precomputed report (?after=, ?group=). Reads stored rows only."""
+    group = request.GET.get('group') or None
+    try:
+        state, rows, next_cursor = reports.report_page(
+            report, request.GET.get('after'), limit=get_page_size(request), group=group
+        )
+    except reports.ReportError:
+        raise Http404('Report not found')
+    definition = reports.REPORTS[report]
+    return render(request, 'suppliers/report_detail.html', {
+        'name': report,
+        'report': definition,
+        'state': _report_state(state),
+        'rows': [(row['group'], [row.get(prop) for prop, _ in definition.columns]) for row in rows],
+        'next_cursor': next_cursor,
+        'group': group,
+        'paged': bool(request.GET.get('after'))
+    })
+
+
+# ==================== SEARCH VIEWS ====================
+
+def search(request):
+    """Ranked full-text search across suppliers, products and stores (?q=, ?type=, ?page=)."""
+    text, kinds, page, limit = search_params(request)
+    results = fulltext.search(text, kinds=kinds, page=page, limit=limit)
+    return render(request, 'suppliers/search.html', {
+        'query': text,
+        'type': kinds[0] if kinds else '',
+        'types': fulltext.SEARCH_MODELS,
+        'results': results
+    })
+
+
+# ==================== SOURCING VIEWS ====================
+
+def sourcing_view(request):
+    """
+    Rank the suppliers of a list of SKUs by price, lead time or weighted score.
+    All products are ranked in batched aggregate queries, not one per SKU.
+    """
+    results, not_found = None, []
+    if request.method == 'POST':
+        form = SourcingForm(request.POST)
+        if form.is_valid():
+            data = form.cleaned_data
+            weights = {}
+            if data['price_weight'] is not None:
+                weights['unit_price'] = data['price_weight']
+            if data['lead_time_weight'] is not None:
+                weights['lead_time_days'] = data['lead_time_weight']
+            try:
+                results, not_found = sourcing.best_suppliers(
+                    data['skus'],
+                    strategy=data['strategy'],
+                    alternatives=data['alternatives'],
+                    countries=data['countries'],
+                    weights=weights
+                )
+            except sourcing.SourcingError as e:
+                messages.error(request, str(e))
+    else:
+        form = SourcingForm()
     
-    results, meta = db.cypher_query(query)
-    
-    # Process results
-    low_stock_items = []
-    for row in results:
-        product_node = Product.inflate(row[0])
-        store_node = Store.inflate(row[1])
-        quantity = row[2]
-        aisle = row[3] if row[3] else 'N/A'
-        
-        low_stock_items.append({
-            'product': product_node,
-            'store': store_node,
-            'quantity': quantity,
-            'aisle': aisle
-        })
-    
-    # Get total counts for statistics
-    total_products = len(Product.nodes.all())
-    total_stores = len(Store.nodes.all())
-    total_suppliers = len(Supplier.nodes.all())
-    
-    return render(request, 'suppliers/dashboard.html', {
-        'low_stock_items': low_stock_items,
-        'total_products': total_products,
-        'total_stores': total_stores,
-        'total_suppliers': total_suppliers,
-        'low_stock_count': len(low_stock_items)
+    return render(request, 'suppliers/sourcing.html', {
+        'form': form,
+        'results': results,
+        'not_found': not_found
     })
+
+
+# ==================== EXPORT VIEWS ====================
+
+def export_dataset(request, dataset):
+    """
+    Stream a dataset as CSV or JSON lines (?format=csv|jsonl).
+    Rows are encoded as they arrive from Neo4j, so memory use stays flat;
+    under ASGI they are read with the async driver.
+    """
+    if dataset not in export.DATASETS:
+        raise Http404('Unknown dataset')
+    file_format = request.GET.get('format', 'csv')
+    asgi = is_asgi(request)
+    if file_format == 'csv':
+        chunks, content_type = (export.acsv_chunks if asgi else export.csv_chunks)(dataset), 'text/csv'
+    elif file_format == 'jsonl':
+        chunks, content_type = (export.ajsonl_chunks if asgi else export.jsonl_chunks)(dataset), 'application/x-ndjson'
+    else:
+        raise Http404('Unsupported export format')
+    
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{file_format}"'
+    return response
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'suppliers.middleware.QueryProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,9 +67,129 @@ WSGI_APPLICATION = 'supply_chain.wsgi.application'
 NEO4J_BOLT_URL = os.getenv('NEO4J_BOLT_URL', 'bolt://localhost:7687')
 NEO4J_USERNAME = os.getenv('NEO4J_USERNAME', 'neo4j')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD', 'password123')
+# Disposable Neo4j instance for the tests that seed and clear graph data
+# (same credentials). Those tests are skipped unless it is set, so they never
+# run against the database above.
+NEO4J_TEST_BOLT_URL = os.getenv('NEO4J_TEST_BOLT_URL')
+
+# Bolt connection pool, per process. Size it so that
+# (workers x NEO4J_MAX_CONNECTION_POOL_SIZE) stays within what Neo4j can serve;
+# /suppliers/api/health/ reports in-use connections and acquisition waits.
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv('NEO4J_MAX_CONNECTION_POOL_SIZE', '100'))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', '60'))
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv('NEO4J_CONNECTION_TIMEOUT', '30'))
+NEO4J_MAX_CONNECTION_LIFETIME = int(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', '3600'))
+NEO4J_KEEP_ALIVE = os.getenv('NEO4J_KEEP_ALIVE', 'True') == 'True'
+# Connections opened when the WSGI/ASGI application starts (0 disables warm-up)
+NEO4J_POOL_WARMUP = int(os.getenv('NEO4J_POOL_WARMUP', '0'))
 
 # Configure neomodel
 neomodel_config.DATABASE_URL = f'bolt://{NEO4J_USERNAME}:{NEO4J_PASSWORD}@{NEO4J_BOLT_URL.split("//")[1]}'
+neomodel_config.MAX_CONNECTION_POOL_SIZE = NEO4J_MAX_CONNECTION_POOL_SIZE
+neomodel_config.CONNECTION_ACQUISITION_TIMEOUT = NEO4J_CONNECTION_ACQUISITION_TIMEOUT
+neomodel_config.CONNECTION_TIMEOUT = NEO4J_CONNECTION_TIMEOUT
+neomodel_config.MAX_CONNECTION_LIFETIME = NEO4J_MAX_CONNECTION_LIFETIME
+neomodel_config.KEEP_ALIVE = NEO4J_KEEP_ALIVE
+
+# Pagination for supplier, product and store listings
+SUPPLIERS_PAGE_SIZE = int(os.getenv('SUPPLIERS_PAGE_SIZE', '25'))
+SUPPLIERS_MAX_PAGE_SIZE = int(os.getenv('SUPPLIERS_MAX_PAGE_SIZE', '100'))
+
+# Bulk JSON endpoints: rows accepted per request and rows written per transaction
+SUPPLIERS_BULK_MAX_ROWS = int(os.getenv('SUPPLIERS_BULK_MAX_ROWS', '10000'))
+SUPPLIERS_BULK_BATCH_SIZE = int(os.getenv('SUPPLIERS_BULK_BATCH_SIZE', '1000'))
+# Tokens accepted by the JSON write endpoints (comma separated), sent as
+# "Authorization: Bearer <token>". Without a token a logged-in session and a
+# CSRF token are required.
+SUPPLIERS_API_TOKENS = [token for token in os.getenv('SUPPLIERS_API_TOKENS', '').split(',') if token]
+
+# Products ranked per sourcing query (suppliers.sourcing)
+SUPPLIERS_SOURCING_BATCH_SIZE = int(os.getenv('SUPPLIERS_SOURCING_BATCH_SIZE', '1000'))
+
+# Flagged products and suppliers recomputed per supply risk refresh step
+# (suppliers.risk, run by the refresh_supply_risk command)
+SUPPLIERS_RISK_REFRESH_LIMIT = int(os.getenv('SUPPLIERS_RISK_REFRESH_LIMIT', '1000'))
+
+# Supplier price history (suppliers.price_history): observations are grouped
+# into one node per supplier/product pair and period of CHUNK_DAYS (do not
+# change it once history exists). `manage.py compact_price_history` keeps one
+# observation per BUCKET_HOURS after RAW_DAYS and deletes it after RETENTION_DAYS.
+SUPPLIERS_PRICE_HISTORY_CHUNK_DAYS = int(os.getenv('SUPPLIERS_PRICE_HISTORY_CHUNK_DAYS', '30'))
+SUPPLIERS_PRICE_HISTORY_RAW_DAYS = int(os.getenv('SUPPLIERS_PRICE_HISTORY_RAW_DAYS', '90'))
+SUPPLIERS_PRICE_HISTORY_BUCKET_HOURS = int(os.getenv('SUPPLIERS_PRICE_HISTORY_BUCKET_HOURS', '24'))
+SUPPLIERS_PRICE_HISTORY_RETENTION_DAYS = int(os.getenv('SUPPLIERS_PRICE_HISTORY_RETENTION_DAYS', '730'))
+
+# Stock ledger (suppliers.stock_ledger): movements are grouped into one node
+# per product/store pair and period of CHUNK_HOURS (do not change it once the
+# ledger exists). `manage.py snapshot_stock` snapshots stores whose latest
+# snapshot is SNAPSHOT_HOURS old and deletes snapshots after RETENTION_DAYS.
+SUPPLIERS_STOCK_LEDGER_CHUNK_HOURS = int(os.getenv('SUPPLIERS_STOCK_LEDGER_CHUNK_HOURS', '24'))
+SUPPLIERS_STOCK_SNAPSHOT_HOURS = int(os.getenv('SUPPLIERS_STOCK_SNAPSHOT_HOURS', '24'))
+SUPPLIERS_STOCK_SNAPSHOT_RETENTION_DAYS = int(os.getenv('SUPPLIERS_STOCK_SNAPSHOT_RETENTION_DAYS', '365'))
+
+# Report groups (stores, countries, categories) recomputed per statement by
+# `manage.py refresh_reports` (suppliers.reports)
+SUPPLIERS_REPORT_BATCH_SIZE = int(os.getenv('SUPPLIERS_REPORT_BATCH_SIZE', '100'))
+
+# Background jobs of `manage.py run_scheduler` (suppliers.scheduler):
+# (name, cron expression in server local time, management command, arguments)
+SUPPLIERS_SCHEDULE = (
+    ('reports', '*/5 * * * *', 'refresh_reports', ()),
+    ('reports-full', '30 2 * * *', 'refresh_reports', ('--full',)),
+    ('supply-risk', '*/10 * * * *', 'refresh_supply_risk', ()),
+    ('stock-snapshots', '15 * * * *', 'snapshot_stock', ()),
+    ('price-history', '45 3 * * *', 'compact_price_history', ()),
+)
+
+# Allow bulk JSON request bodies up to 10 MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('DATA_UPLOAD_MAX_MEMORY_SIZE', str(10 * 1024 * 1024)))
+
+# Default stock level below which a product counts as low at a store.
+# Overridden per product (reorder_level) and per store (low_stock_threshold);
+# run `manage.py refresh_low_stock` after changing it.
+SUPPLIERS_LOW_STOCK_THRESHOLD = int(os.getenv('SUPPLIERS_LOW_STOCK_THRESHOLD', '10'))
+
+# Cache for node lookups, list pages and the dashboard (suppliers.cache).
+# Uses Redis when REDIS_URL is set, a file cache when CACHE_DIR is set and
+# process-local memory otherwise. With the local backends each process
+# invalidates only its own cache, so other processes may serve entries up to
+# SUPPLIERS_CACHE_TIMEOUT seconds old; use Redis when running several workers.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif os.getenv('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+SUPPLIERS_CACHE_ALIAS = 'default'
+SUPPLIERS_CACHE_TIMEOUT = int(os.getenv('SUPPLIERS_CACHE_TIMEOUT', '300'))
+
+# Serve the read-only pages with suppliers.async_views on the async Neo4j
+# driver. Only enable under an ASGI server (e.g. uvicorn supply_chain.asgi:application).
+SUPPLIERS_ASYNC_VIEWS = os.getenv('SUPPLIERS_ASYNC_VIEWS', 'False') == 'True'
+
+# Per-request Cypher profiling (suppliers.middleware), on by default with
+# DEBUG: requests over either budget are logged with their slowest and
+# repeated statements
+SUPPLIERS_QUERY_PROFILER = os.getenv('SUPPLIERS_QUERY_PROFILER', str(DEBUG)) == 'True'
+SUPPLIERS_QUERY_BUDGET = int(os.getenv('SUPPLIERS_QUERY_BUDGET', '20'))
+SUPPLIERS_QUERY_TIME_BUDGET_MS = float(os.getenv('SUPPLIERS_QUERY_TIME_BUDGET_MS', '500'))
+# Append the query profile panel to HTML pages
+SUPPLIERS_QUERY_PANEL = os.getenv('SUPPLIERS_QUERY_PANEL', str(DEBUG)) == 'True'
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
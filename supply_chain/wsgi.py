@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'supply_chain.settings')
 
 application = get_wsgi_application()
+
+# Open NEO4J_POOL_WARMUP connections before the first request arrives
+from suppliers.instrumentation import warm_up_pool  # noqa: E402
+
+warm_up_pool()